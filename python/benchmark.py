@@ -0,0 +1,825 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+性能計測スクリプト
+
+合成したBML CSVを使って、パーサー・判定エンジン・転記処理の
+処理時間を計測する。
+
+使い方:
+    python benchmark.py encoding --patients 20000
+"""
+
+import gc
+import math
+import sys
+import time
+import random
+import tracemalloc
+import json
+import argparse
+import tempfile
+from pathlib import Path
+from typing import Callable, Dict, List
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from common import (
+    BMLResultParser,
+    JudgmentEngine,
+    ParseDiagnostics,
+    CohortStats,
+    TemplateCache,
+    OoxmlTemplate,
+    CriteriaSnapshot,
+    diff_snapshots,
+    rejudge,
+    SUPPORTED_ENCODINGS,
+    CODE_TO_CRITERIA,
+    GENDER_CODE_TO_INTERNAL,
+)
+from common.constants import TOKENIZER_CSV, TOKENIZER_SPLIT, QUALITATIVE_CLASSES
+from common.decision_table import judge_rules
+from common.judgment import judge_qualitative
+from common.batch import DECIMALS_TEXT
+from common.constants import EGFR_CODE, CREATININE_CODE
+from common.derived import calculate_egfr, egfr_array, derive_egfr
+from common import codegen
+
+
+# 合成データに含める検査コード（判定基準のある項目 + 定性項目）
+SAMPLE_CODES = list(CODE_TO_CRITERIA.keys()) + ["0003891", "0003892", "0003893"]
+
+
+def make_sample_csv(
+    csv_path: Path,
+    patients: int,
+    encoding: str = 'cp932',
+    cp932_tail: bool = True,
+    seed: int = 0,
+    quoted_comments: float = 0.0
+) -> Path:
+    """
+    BML形式の合成CSVを作成
+
+    Args:
+        csv_path: 出力パス
+        patients: 患者数（行数）
+        encoding: 書き込みエンコーディング
+        cp932_tail: 最終行に cp932 にしかない文字（①）を入れるか
+        seed: 乱数シード
+        quoted_comments: カンマを含む引用符付きコメントにする割合
+
+    Returns:
+        作成したCSVパス
+    """
+    rng = random.Random(seed)
+    lines = []
+    for n in range(patients):
+        fields = [
+            '203017', f"{900000 + n:06d}", '20251120', '0000', '',
+            f"{rng.randint(100000, 999999)}", rng.choice(['1', '2']), '', '', '1', '60',
+        ]
+        for code in SAMPLE_CODES:
+            value = f"{rng.uniform(0.1, 200):.1f}"
+            flag = rng.choice(['', '', '', 'H', 'L'])
+            if rng.random() < quoted_comments:
+                comment = '"溶血あり, 再検査済み"'
+            elif rng.random() < 0.05:
+                comment = '再検査済み'
+            else:
+                comment = ''
+            fields += [code, value, flag, comment]
+        lines.append(','.join(fields))
+
+    if cp932_tail and lines:
+        lines[-1] += '①'
+
+    with open(csv_path, 'w', encoding=encoding, newline='\r\n') as f:
+        f.write('\n'.join(lines) + '\n')
+    return csv_path
+
+
+def _legacy_read_file(csv_path: Path) -> str:
+    """旧実装: SUPPORTED_ENCODINGS を順に全体デコードで試す"""
+    for enc in SUPPORTED_ENCODINGS:
+        try:
+            with open(csv_path, 'r', encoding=enc) as f:
+                return f.read()
+        except UnicodeDecodeError:
+            continue
+    raise ValueError(f"ファイルのエンコーディングを検出できません: {csv_path}")
+
+
+def _legacy_parse(csv_path: Path) -> List[Dict]:
+    """旧実装: 全体を読み込んでから split で行分割"""
+    parser = BMLResultParser()
+    content = _legacy_read_file(csv_path)
+    results = []
+    for line in content.strip().split('\n'):
+        if not line.strip():
+            continue
+        parsed = parser._parse_line(line)
+        if parsed:
+            results.append(parsed)
+    return results
+
+
+def _legacy_transfer_test_results(transcriber, wb, test_results: list, gender: str) -> int:
+    """旧実装: 検査コードごとにマッピングを引き、シート名・座標文字列で書き込む"""
+    count = 0
+    sheet_cache = {}
+    for result in test_results:
+        code = result.get('code') or result.get('item_code')
+        if not code or code not in transcriber.flat_mapping:
+            continue
+        spec = transcriber.flat_mapping[code]
+        sheet_name = spec.get('sheet', '４ページ')
+        try:
+            if sheet_name not in sheet_cache:
+                sheet_cache[sheet_name] = wb[sheet_name]
+            ws = sheet_cache[sheet_name]
+            value_cell = spec.get('value_cell')
+            if value_cell:
+                raw_value = result.get('value')
+                if raw_value is not None and raw_value != '':
+                    ws[value_cell] = transcriber._cell_value(result)
+                    count += 1
+            judgment_cell = spec.get('judgment_cell')
+            if judgment_cell:
+                judgment = result.get('judgment') or transcriber.judgment_engine.judge_result(result, gender)
+                if judgment:
+                    ws[judgment_cell] = judgment
+                    count += 1
+            flag_cell = spec.get('flag_cell')
+            if flag_cell and result.get('flag'):
+                ws[flag_cell] = result['flag']
+                count += 1
+        except Exception:
+            pass
+    return count
+
+
+def load_criteria() -> Dict:
+    """設計書_設定ファイル/mapping.json の判定基準を読み込む"""
+    mapping_path = Path(__file__).parent.parent / '設計書_設定ファイル' / 'mapping.json'
+    with open(mapping_path, 'r', encoding='utf-8') as f:
+        return json.load(f).get('judgment_criteria', {}).get('items', {})
+
+
+def measure_memory(func: Callable):
+    """func() の戻り値が保持しているメモリ量（バイト）と戻り値を返す"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = func()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return after - before, result
+
+
+def timeit(func: Callable, repeat: int = 3) -> float:
+    """最良値（秒）を返す"""
+    best = float('inf')
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def report(label: str, baseline: float, current: float):
+    """計測結果を表示"""
+    ratio = current / baseline if baseline else 0.0
+    print(f"  {label:<28} 旧: {baseline * 1000:9.1f} ms  新: {current * 1000:9.1f} ms  ({ratio:.2f}x)")
+
+
+def bench_encoding(args, work_dir: Path):
+    """エンコーディング検出 + デコードの計測"""
+    csv_path = make_sample_csv(work_dir / 'encoding.csv', args.patients)
+    parser = BMLResultParser()
+
+    print(f"📊 encoding: {args.patients}患者, {csv_path.stat().st_size / 1e6:.1f} MB (末尾にcp932専用文字)")
+    report(
+        'decode only',
+        timeit(lambda: _legacy_read_file(csv_path), args.repeat),
+        timeit(lambda: sum(1 for _ in parser._iter_lines(csv_path)), args.repeat),
+    )
+    report(
+        'parse',
+        timeit(lambda: _legacy_parse(csv_path), args.repeat),
+        timeit(lambda: parser.parse(csv_path), args.repeat),
+    )
+
+
+def bench_batch(args, work_dir: Path):
+    """辞書リストと ParsedBatch のメモリ量・判定時間の比較"""
+    csv_path = make_sample_csv(work_dir / 'batch.csv', args.patients)
+    parser = BMLResultParser()
+    engine = JudgmentEngine(load_criteria())
+
+    list_bytes, records = measure_memory(lambda: parser.parse(csv_path))
+    batch_bytes, batch = measure_memory(lambda: parser.parse_batch(csv_path))
+    assert list(batch) == records
+
+    def judge_records():
+        grades = []
+        for record in records:
+            gender = GENDER_CODE_TO_INTERNAL.get(record['patient_info']['gender'], 'M')
+            for r in record['test_results']:
+                grades.append(engine.judge_result(r, gender))
+        return grades
+
+    assert judge_records() == engine.judge_batch(batch)
+
+    print(f"📊 batch: {args.patients}患者, {batch.value_count}検査値")
+    print(f"  {'memory':<28} 旧: {list_bytes / 1e6:9.1f} MB  新: {batch_bytes / 1e6:9.1f} MB  "
+          f"({batch_bytes / list_bytes:.2f}x)")
+    report(
+        'judge',
+        timeit(judge_records, args.repeat),
+        timeit(lambda: engine.judge_batch(batch), args.repeat),
+    )
+
+
+def bench_tokenizer(args, work_dir: Path):
+    """str.split と引用符対応分割（TOKENIZER_CSV）の比較"""
+    csv_path = make_sample_csv(work_dir / 'tokenizer.csv', args.patients, quoted_comments=0.002)
+    split_parser = BMLResultParser(tokenizer=TOKENIZER_SPLIT)
+    csv_parser = BMLResultParser(tokenizer=TOKENIZER_CSV)
+
+    records = csv_parser.parse(csv_path)
+    misaligned = sum(
+        1 for a, b in zip(split_parser.parse(csv_path), records) if a != b
+    )
+
+    print(f"📊 tokenizer: {args.patients}患者, 引用符付きコメント0.2% "
+          f"(split で列ずれした患者: {misaligned})")
+    report(
+        'parse (旧=split, 新=csv)',
+        timeit(lambda: split_parser.parse(csv_path), args.repeat),
+        timeit(lambda: csv_parser.parse(csv_path), args.repeat),
+    )
+
+
+def bench_validate(args, work_dir: Path):
+    """解析時検証のオーバーヘッド（不正行のない合成CSV）"""
+    csv_path = make_sample_csv(work_dir / 'validate.csv', args.patients, cp932_tail=False)
+    parser = BMLResultParser()
+
+    diagnostics = ParseDiagnostics(csv_path)
+    assert parser.parse(csv_path, diagnostics) == parser.parse(csv_path)
+
+    print(f"📊 validate: {args.patients}患者 (診断: {diagnostics.total}件)")
+    report(
+        'parse (旧=検証なし, 新=検証あり)',
+        timeit(lambda: parser.parse(csv_path), args.repeat),
+        timeit(lambda: parser.parse(csv_path, ParseDiagnostics(csv_path)), args.repeat),
+    )
+
+
+# 決定表の一致確認用の追加基準（or 条件・性別限定・欠落グレード）
+EXTRA_CRITERIA = {
+    'OR_RULE': {'A': {'min': 10, 'max': 20}, 'B': {'min': 5, 'max': 9.9, 'or': {'min': 20.1, 'max': 30}},
+                'C': {'min': None, 'max': None, 'or': {'min': None, 'max': 4.9}}, 'D': {'min': 30.1, 'max': None}},
+    'GENDER_F': {'gender': 'F', 'A': {'min': 12, 'max': 16}, 'C': {'min': None, 'max': 11.9}},
+    'OVERLAP': {'A': {'min': 0, 'max': 50}, 'B': {'min': 40, 'max': 60}, 'D': {'min': 55, 'max': None}},
+}
+
+
+def boundary_probes(criteria: Dict, rng: random.Random, count: int = 5000) -> List[float]:
+    """判定の一致確認用の値（全境界値とその前後・NaN・無限大・乱数）"""
+    probes = [math.nan, math.inf, -math.inf, 0.0, -1.0]
+    for spec in criteria.values():
+        for rule in spec.values():
+            while isinstance(rule, dict):
+                for bound in (rule.get('min'), rule.get('max')):
+                    if bound is not None:
+                        probes += [bound, bound - 0.05, bound + 0.05, math.nextafter(bound, math.inf)]
+                rule = rule.get('or')
+    probes += [rng.uniform(-10, 700) for _ in range(count)]
+    return probes
+
+
+def random_criteria(rng: random.Random, items: int) -> Dict:
+    """ランダムな判定基準（重なり・隙間・or の連鎖・性別限定・None を含む）"""
+    def bound():
+        return rng.choice([None, rng.randint(0, 100), round(rng.uniform(0, 100), rng.randint(1, 3))])
+
+    def rule(depth=0):
+        r = {'min': bound(), 'max': bound()}
+        if depth < 2 and rng.random() < 0.3:
+            r['or'] = rule(depth + 1)
+        return r
+
+    criteria = {}
+    for i in range(items):
+        spec = {grade: rule() for grade in ('A', 'B', 'C', 'D') if rng.random() < 0.8}
+        if rng.random() < 0.2:
+            spec['gender'] = rng.choice(['M', 'F'])
+        criteria[f"RANDOM_{i}"] = spec
+    return criteria
+
+
+def bench_decision_table(args, work_dir: Path):
+    """判定基準の逐次評価と決定表（bisect）の比較"""
+    criteria = dict(load_criteria(), **EXTRA_CRITERIA)
+    engine = JudgmentEngine(criteria)
+    rng = random.Random(0)
+
+    # 境界値そのもの・前後・NaN・無限大を含めて全項目で一致を確認
+    probes = boundary_probes(criteria, rng)
+    for key, spec in criteria.items():
+        for gender in ('M', 'F', None):
+            for value in probes:
+                assert engine.judge(key, value, gender) == judge_rules(spec, value, gender), (key, value)
+
+    keys = list(load_criteria())
+    samples = [(rng.choice(keys), rng.uniform(0, 200), rng.choice(['M', 'F'])) for _ in range(args.patients * 10)]
+
+    def judge_interpreted():
+        return [judge_rules(criteria[k], v, g) for k, v, g in samples]
+
+    def judge_compiled():
+        return [engine.judge(k, v, g) for k, v, g in samples]
+
+    assert judge_interpreted() == judge_compiled()
+
+    print(f"📊 decision_table: {len(samples)}検査値, 一致確認 {len(probes) * len(criteria) * 3}件")
+    baseline = timeit(judge_interpreted, args.repeat)
+    current = timeit(judge_compiled, args.repeat)
+    report('judge (旧=逐次評価, 新=bisect)', baseline, current)
+    print(f"  {'per value':<28} 旧: {baseline / len(samples) * 1e9:9.0f} ns  "
+          f"新: {current / len(samples) * 1e9:9.0f} ns")
+
+
+def bench_judge_many(args, work_dir: Path):
+    """1件ずつの判定と judge_many（numpy 一括判定）の比較"""
+    try:
+        import numpy as np
+    except ImportError:
+        print("📊 judge_many: numpy がインストールされていないためスキップ")
+        return
+
+    csv_path = make_sample_csv(work_dir / 'judge_many.csv', args.patients)
+    batch = BMLResultParser().parse_batch(csv_path)
+    engine = JudgmentEngine(load_criteria())
+    for row in range(0, batch.value_count, 97):
+        # 数値化できない値・定性結果の混在
+        batch.raw_values[row] = '検体不足'
+        batch.values[row] = math.nan
+        batch.decimals[row] = DECIMALS_TEXT
+        if row % 2:
+            batch.raw_values[row] = batch.qualitatives[row] = random.choice(sorted(QUALITATIVE_CLASSES))
+
+    owners = np.frombuffer(batch.patient_of_rows(), dtype=np.uint32)
+    patient_genders = np.array([GENDER_CODE_TO_INTERNAL.get(g, 'M') for g in batch.patient_columns['gender']])
+    codes = np.array(batch.codes)[np.frombuffer(batch.code_ids, dtype=np.uint16)]
+    flags = np.array(batch.flags)[np.frombuffer(batch.flag_ids, dtype=np.uint16)]
+    values = np.frombuffer(batch.values, dtype=np.float64)
+    genders = patient_genders[owners]
+
+    qualitatives = np.array([batch.qualitatives.get(row, '') for row in range(batch.value_count)])
+    code_list, value_list, flag_list, gender_list = codes.tolist(), values.tolist(), flags.tolist(), genders.tolist()
+
+    def judge_each():
+        return [
+            engine._judge_numeric(c, v, f, g) if v == v else judge_qualitative(q)
+            for c, v, f, g, q in zip(code_list, value_list, flag_list, gender_list, qualitatives.tolist())
+        ]
+
+    assert judge_each() == engine.judge_many(codes, values, flags, genders, qualitatives).tolist()
+    assert engine.judge_batch(batch) == judge_each()
+
+    print(f"📊 judge_many: {len(values)}検査値")
+    report(
+        'judge (旧=1件ずつ, 新=numpy)',
+        timeit(judge_each, args.repeat),
+        timeit(lambda: engine.judge_many(codes, values, flags, genders, qualitatives), args.repeat),
+    )
+
+
+def bench_memo(args, work_dir: Path):
+    """judge_by_code のメモ化あり/なしの比較（値の重複が多い集団）"""
+    rng = random.Random(0)
+    codes = list(CODE_TO_CRITERIA)
+    # 実データ同様、項目ごとに出現する値の種類は限られる
+    samples = [
+        (code, f"{rng.gauss(60, 15):.0f}", rng.choice(['', '', '', 'H', 'L']), rng.choice(['M', 'F']))
+        for code in (rng.choice(codes) for _ in range(args.patients * 10))
+    ]
+    plain = JudgmentEngine(load_criteria())
+    memo = JudgmentEngine(load_criteria(), memo_size=4096)
+
+    assert [plain.judge_by_code(*s) for s in samples] == [memo.judge_by_code(*s) for s in samples]
+
+    print(f"📊 memo: {len(samples)}検査値")
+    report(
+        'judge_by_code (旧=なし, 新=LRU)',
+        timeit(lambda: [plain.judge_by_code(*s) for s in samples], args.repeat),
+        timeit(lambda: [memo.judge_by_code(*s) for s in samples], args.repeat),
+    )
+    stats = memo.memo_stats()
+    print(f"  {'hit rate':<28} {stats['hit_rate']:.1%} (保持 {stats['entries']} / 破棄 {stats['evictions']})")
+
+
+def bench_overall(args, work_dir: Path):
+    """総合判定（組合せ判定込み）の集団一括計算"""
+    csv_path = make_sample_csv(work_dir / 'overall.csv', args.patients)
+    parser = BMLResultParser()
+    records = parser.parse(csv_path)
+    batch = parser.parse_batch(csv_path)
+    engine = JudgmentEngine(load_criteria())
+
+    assert engine.judge_overall_many(records) == engine.judge_overall_many(batch)
+
+    print(f"📊 overall: {args.patients}患者")
+    report(
+        'judge_overall_many (旧=辞書, 新=batch)',
+        timeit(lambda: engine.judge_overall_many(records), args.repeat),
+        timeit(lambda: engine.judge_overall_many(batch), args.repeat),
+    )
+
+
+def bench_egfr(args, work_dir: Path):
+    """eGFR推算の1件ずつの計算と numpy 一括計算の比較"""
+    try:
+        import numpy as np
+    except ImportError:
+        print("📊 egfr: numpy がインストールされていないためスキップ")
+        return
+
+    csv_path = make_sample_csv(work_dir / 'egfr.csv', args.patients)
+    records = BMLResultParser().parse(csv_path)
+    rng = random.Random(0)
+    ages = [rng.randint(20, 90) for _ in records]
+    for record in records:
+        record['test_results'] = [r for r in record['test_results'] if r['code'] != EGFR_CODE]
+
+    creatinine, genders = [], []
+    for record in records:
+        cr = next((r['numeric'] for r in record['test_results'] if r['code'] == CREATININE_CODE), None)
+        creatinine.append(math.nan if cr is None or rng.random() < 0.05 else rng.uniform(0.4, 2.5))
+        genders.append(GENDER_CODE_TO_INTERNAL.get(record['patient_info']['gender'], 'M'))
+    is_female = np.array([g == 'F' for g in genders])
+
+    def egfr_each():
+        return [calculate_egfr(cr, age, g) for cr, age, g in zip(creatinine, ages, genders)]
+
+    expected = egfr_each()
+    vectorized = egfr_array(creatinine, ages, is_female).tolist()
+    assert [None if v != v else int(v) for v in vectorized] == expected
+
+    for record, cr in zip(records, creatinine):
+        for r in record['test_results']:
+            if r['code'] == CREATININE_CODE:
+                r['numeric'] = None if cr != cr else cr
+    added = derive_egfr(records, ages)
+    derived = [next((int(r['numeric']) for r in record['test_results'] if r.get('derived')), None)
+               for record in records]
+    assert derived == expected and added == sum(v is not None for v in expected)
+
+    print(f"📊 egfr: {len(records)}患者（推算 {added}件）")
+    report(
+        'egfr (旧=1件ずつ, 新=numpy)',
+        timeit(egfr_each, args.repeat),
+        timeit(lambda: egfr_array(creatinine, ages, is_female), args.repeat),
+    )
+
+
+def bench_codegen(args, work_dir: Path):
+    """決定表（bisect）と生成コード版の判定の比較"""
+    rng = random.Random(0)
+    cache_dir = work_dir / 'criteria_cache'
+
+    # 実基準 + ランダム基準の全項目で、逐次評価（元の基準の解釈）と完全一致を確認
+    checked = 0
+    for criteria in [dict(load_criteria(), **EXTRA_CRITERIA)] + [random_criteria(rng, 50) for _ in range(20)]:
+        engine = JudgmentEngine(criteria)
+        engine.enable_codegen(cache_dir)
+        probes = boundary_probes(criteria, rng, 500)
+        for key, spec in criteria.items():
+            for gender in ('M', 'F', None):
+                for value in probes:
+                    assert engine.judge(key, value, gender) == judge_rules(spec, value, gender), (spec, value)
+                checked += len(probes)
+
+    # 生成済みモジュールの再利用（別プロセスの起動時と同じく、ディスクから import のみ）
+    criteria = load_criteria()
+    JudgmentEngine(criteria).enable_codegen(cache_dir)
+    codegen._modules.clear()
+    reloaded = JudgmentEngine(criteria)
+    start = time.perf_counter()
+    reloaded.enable_codegen(cache_dir)
+    load_ms = (time.perf_counter() - start) * 1000
+
+    keys = list(criteria)
+    samples = [(rng.choice(keys), rng.uniform(0, 200), rng.choice(['M', 'F'])) for _ in range(args.patients * 10)]
+    tables = JudgmentEngine(criteria)
+
+    def judge_tables():
+        return [tables.judge(k, v, g) for k, v, g in samples]
+
+    def judge_generated():
+        return [reloaded.judge(k, v, g) for k, v, g in samples]
+
+    assert judge_tables() == judge_generated()
+
+    print(f"📊 codegen: {len(samples)}検査値, 一致確認 {checked}件, 生成済みモジュール読込 {load_ms:.1f} ms")
+    report(
+        'judge (旧=bisect, 新=生成コード)',
+        timeit(judge_tables, args.repeat),
+        timeit(judge_generated, args.repeat),
+    )
+
+
+def bench_cohort(args, work_dir: Path):
+    """集団統計の集計（1パス）と分割集計の合算の一致"""
+    csv_path = make_sample_csv(work_dir / 'cohort.csv', args.patients)
+    records = BMLResultParser().parse(csv_path)
+    engine = JudgmentEngine(load_criteria())
+
+    def company(record):
+        return f"CO{int(record['patient_info']['request_id'][-2:]) % 7:02d}"
+
+    whole = CohortStats(engine, group_by=company).add_all(records).summary()
+    half = len(records) // 2
+    merged = CohortStats(engine, group_by=company).add_all(records[:half]).merge(
+        CohortStats(engine, group_by=company).add_all(records[half:])
+    ).summary()
+    assert whole == merged
+    assert whole['patients'] == len(records)
+
+    print(f"📊 cohort: {len(records)}患者, {len(whole['groups'])}グループ, "
+          f"JSON {len(json.dumps(whole, ensure_ascii=False, separators=(',', ':'))) // 1024} KB")
+    seconds = timeit(lambda: CohortStats(engine, group_by=company).add_all(records).summary(), args.repeat)
+    print(f"  {'add_all + summary':<28} {seconds * 1000:9.1f} ms")
+
+
+def bench_rejudge(args, work_dir: Path):
+    """差分再判定と全件再判定の比較（判定が変わる値の一致）"""
+    rng = random.Random(0)
+    csv_path = make_sample_csv(work_dir / 'rejudge.csv', args.patients)
+    records = BMLResultParser().parse(csv_path)
+    old_criteria = load_criteria()
+
+    # 年度更新を模して一部の項目の境界値をずらし、1項目は性別限定に変える
+    new_criteria = json.loads(json.dumps(old_criteria))
+    for key in rng.sample(sorted(new_criteria), 3):
+        for rule in new_criteria[key].values():
+            if isinstance(rule, dict) and rule.get('max') is not None:
+                rule['max'] = round(rule['max'] + rng.choice([-5, -1, 1, 5]), 1)
+    new_criteria[sorted(new_criteria)[0]]['gender'] = 'F'
+
+    old = CriteriaSnapshot.compile(old_criteria)
+    new = CriteriaSnapshot.compile(new_criteria)
+    old_engine = JudgmentEngine.from_snapshot(old)
+    new_engine = JudgmentEngine.from_snapshot(new)
+
+    def rejudge_all():
+        changed = []
+        for record in records:
+            gender = GENDER_CODE_TO_INTERNAL.get(record['patient_info']['gender'], 'M')
+            for result in record['test_results']:
+                old_grade = old_engine.judge_result(result, gender)
+                new_grade = new_engine.judge_result(result, gender)
+                if old_grade != new_grade:
+                    changed.append((record['patient_info']['request_id'], result['code'], old_grade, new_grade))
+        return changed
+
+    def rejudge_diff():
+        return rejudge(records, old_engine, new_engine, diff_snapshots(old, new))
+
+    result = rejudge_diff()
+    assert rejudge_all() == [
+        (patient['request_id'], change['code'], change['old'], change['new'])
+        for patient in result['patients'] for change in patient['changes']
+    ]
+
+    print(f"📊 rejudge: {result['checked']}検査値, 再判定 {result['candidates']}件, "
+          f"変更 {result['changed']}件 / {len(result['patients'])}患者")
+    report(
+        'rejudge (旧=全件, 新=差分区間のみ)',
+        timeit(rejudge_all, args.repeat),
+        timeit(rejudge_diff, args.repeat),
+    )
+
+
+def bench_template(args, work_dir: Path):
+    """テンプレート読み込み（毎回 load_workbook / メモリ上の原本の複製）の比較"""
+    from openpyxl import load_workbook
+
+    template_path = Path(__file__).parent.parent / 'templates' / '10_doc' / '1221_template_new_default.xlsm'
+    if not template_path.exists():
+        print(f"📊 template: {template_path.name} がないためスキップ")
+        return
+
+    cache = TemplateCache()
+    cache.load(template_path, keep_vba=True)
+
+    # 複製したワークブックは原本の読み込みと同じ値・スタイルを持つ
+    def cells(workbook):
+        return [(ws.title, cell.coordinate, cell.value, cell.style_id)
+                for ws in workbook.worksheets for row in ws.iter_rows() for cell in row]
+
+    direct = load_workbook(template_path, keep_vba=True)
+    cloned = cache.load(template_path, keep_vba=True)
+    assert cells(direct) == cells(cloned)
+    cloned.save(work_dir / 'cloned.xlsm')
+    direct.save(work_dir / 'direct.xlsm')
+    assert cells(load_workbook(work_dir / 'cloned.xlsm')) == cells(load_workbook(work_dir / 'direct.xlsm'))
+
+    repeat = max(1, args.repeat)
+    print(f"📊 template: {template_path.name}")
+    report(
+        'load (旧=load_workbook, 新=原本の複製)',
+        timeit(lambda: load_workbook(template_path, keep_vba=True), repeat),
+        timeit(lambda: cache.load(template_path, keep_vba=True), repeat),
+    )
+
+
+def bench_ooxml(args, work_dir: Path):
+    """1患者分の転記・保存（openpyxl で再保存 / シートXMLへの直接書き込み）の比較"""
+    import zipfile
+    from openpyxl import load_workbook
+
+    root = Path(__file__).parent.parent
+    template_path = root / 'templates' / '10_doc' / '1221_template_new_default.xlsm'
+    mapping_path = root / '設計書_設定ファイル' / 'human_dock_cell_mapping.json'
+    if not template_path.exists() or not mapping_path.exists():
+        print("📊 ooxml: テンプレートまたはマッピングがないためスキップ")
+        return
+
+    # マッピングの全セルに値を書く（値: 数値、判定: 文字列、フラグ: 文字列）
+    with open(mapping_path, 'r', encoding='utf-8') as f:
+        mapping = json.load(f)
+    rng = random.Random(0)
+    writes = []
+    for category, items in mapping.get('test_items', {}).get('items', {}).items():
+        if category.startswith('_comment') or not isinstance(items, dict):
+            continue
+        for code, spec in items.items():
+            if code.startswith('_comment') or not isinstance(spec, dict) or 'value_cell' not in spec:
+                continue
+            sheet = spec.get('sheet', '４ページ')
+            writes.append((sheet, spec['value_cell'], round(rng.uniform(0, 300), 1)))
+            if spec.get('judgment_cell'):
+                writes.append((sheet, spec['judgment_cell'], rng.choice('ABCD')))
+            if spec.get('flag_cell'):
+                writes.append((sheet, spec['flag_cell'], rng.choice('HL')))
+
+    def fill(workbook) -> int:
+        count = 0
+        for sheet, coordinate, value in writes:
+            try:
+                workbook[sheet][coordinate] = value
+                count += 1
+            except AttributeError:
+                pass  # 結合セルの左上以外（どちらの方式でも書けない）
+        return count
+
+    def save_openpyxl(output_path):
+        workbook = load_workbook(template_path, keep_vba=True)
+        fill(workbook)
+        workbook.save(output_path)
+
+    template = OoxmlTemplate.from_file(template_path)
+
+    def save_ooxml(output_path):
+        buffer = template.buffer()
+        fill(buffer)
+        template.write(output_path, buffer)
+
+    # 書き込んだ結果はセル値・表示形式とも openpyxl で保存したものと同じ
+    save_openpyxl(work_dir / 'openpyxl.xlsm')
+    save_ooxml(work_dir / 'ooxml.xlsm')
+
+    def cells(path):
+        workbook = load_workbook(path)
+        return [(ws.title, cell.coordinate, cell.value, cell.number_format)
+                for ws in workbook.worksheets for row in ws.iter_rows() for cell in row
+                if cell.value is not None]
+
+    assert cells(work_dir / 'openpyxl.xlsm') == cells(work_dir / 'ooxml.xlsm')
+
+    # 書き込まないメンバー（VBA等）はテンプレートのバイト列のまま
+    vba_path = work_dir / 'vba_template.xlsm'
+    vba_bin = bytes(rng.randrange(256) for _ in range(4096))
+    with zipfile.ZipFile(template_path) as src, zipfile.ZipFile(vba_path, 'w', zipfile.ZIP_DEFLATED) as dst:
+        for info in src.infolist():
+            dst.writestr(info, src.read(info.filename))
+        dst.writestr('xl/vbaProject.bin', vba_bin)
+    vba_template = OoxmlTemplate.from_file(vba_path)
+    buffer = vba_template.buffer()
+    written = fill(buffer)
+    vba_template.write(work_dir / 'vba_out.xlsm', buffer)
+    with zipfile.ZipFile(vba_path) as src, zipfile.ZipFile(work_dir / 'vba_out.xlsm') as out:
+        modified = {vba_template.sheet_parts[sheet] for sheet in buffer.sheets} | {'xl/workbook.xml'}
+        assert out.read('xl/vbaProject.bin') == vba_bin
+        assert all(src.read(name) == out.read(name) for name in src.namelist() if name not in modified)
+
+    repeat = max(1, args.repeat)
+    print(f"📊 ooxml: {template_path.name}, {written}セル")
+    report(
+        'save (旧=openpyxl, 新=直接書き込み)',
+        timeit(lambda: save_openpyxl(work_dir / 'openpyxl.xlsm'), repeat),
+        timeit(lambda: save_ooxml(work_dir / 'ooxml.xlsm'), repeat),
+    )
+
+
+def bench_write_plan(args, work_dir: Path):
+    """患者ごとの検査結果転記（座標文字列で書き込み / コンパイル済みの書き込み計画）の比較"""
+    import logging
+    from unified_transcriber import HumanDockTranscriber
+
+    root = Path(__file__).parent.parent
+    template_path = root / 'templates' / '10_doc' / '1221_template_new_default.xlsm'
+    mapping_path = root / '設計書_設定ファイル' / 'human_dock_cell_mapping.json'
+    if not template_path.exists() or not mapping_path.exists():
+        print("📊 write_plan: テンプレートまたはマッピングがないためスキップ")
+        return
+
+    # JSON は YAML としても読める
+    settings_path = work_dir / 'write_plan_settings.yaml'
+    settings_path.write_text(json.dumps({
+        'exam_types': {'HUMAN_DOCK': {'template_path': str(template_path), 'mapping_path': str(mapping_path)}},
+        'output_dir': str(work_dir),
+    }), encoding='utf-8')
+
+    transcriber_logger = logging.getLogger('unified_transcriber')
+    level = transcriber_logger.level
+    transcriber_logger.setLevel(logging.ERROR)  # 患者ごとのログを抑止
+    try:
+        transcriber = HumanDockTranscriber(settings_path)
+        patients = min(args.patients, 500)
+        batch = BMLResultParser().parse_batch(make_sample_csv(work_dir / 'write_plan.csv', patients))
+        records = [(record['test_results'], GENDER_CODE_TO_INTERNAL.get(record['patient_info']['gender'], 'M'))
+                   for record in batch]
+
+        # 書き込み計画で転記したセルは旧実装と同じ
+        def cells(workbook):
+            return [(ws.title, cell.coordinate, cell.value)
+                    for ws in workbook.worksheets for row in ws.iter_rows() for cell in row]
+
+        cache = TemplateCache()
+        for test_results, gender in records[:20]:
+            legacy = cache.load(template_path, keep_vba=True)
+            planned = cache.load(template_path, keep_vba=True)
+            assert (_legacy_transfer_test_results(transcriber, legacy, test_results, gender)
+                    == transcriber._transfer_test_results(planned, test_results, gender))
+            assert cells(legacy) == cells(planned)
+
+        workbook = cache.load(template_path, keep_vba=True)
+        buffer = OoxmlTemplate.from_file(template_path).buffer()
+        writes = sum(transcriber._transfer_test_results(workbook, r, g) for r, g in records)
+
+        print(f"📊 write_plan: {patients}患者, {writes / patients:.1f}セル/患者, "
+              f"{len(transcriber.write_plan)}検査コード")
+        for label, target in (('openpyxl', workbook), ('直接書き込み', buffer)):
+            report(
+                f'transfer x{patients} ({label})',
+                timeit(lambda: [_legacy_transfer_test_results(transcriber, target, r, g) for r, g in records],
+                       args.repeat),
+                timeit(lambda: [transcriber._transfer_test_results(target, r, g) for r, g in records],
+                       args.repeat),
+            )
+    finally:
+        transcriber_logger.setLevel(level)
+
+
+BENCHMARKS = {
+    'encoding': bench_encoding,
+    'batch': bench_batch,
+    'tokenizer': bench_tokenizer,
+    'validate': bench_validate,
+    'decision_table': bench_decision_table,
+    'judge_many': bench_judge_many,
+    'memo': bench_memo,
+    'overall': bench_overall,
+    'egfr': bench_egfr,
+    'codegen': bench_codegen,
+    'cohort': bench_cohort,
+    'rejudge': bench_rejudge,
+    'template': bench_template,
+    'ooxml': bench_ooxml,
+    'write_plan': bench_write_plan,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='性能計測スクリプト')
+    parser.add_argument('target', nargs='?', choices=list(BENCHMARKS),
+                        help='計測対象（省略時は全て）')
+    parser.add_argument('--patients', type=int, default=20000, help='合成CSVの患者数')
+    parser.add_argument('--repeat', type=int, default=3, help='繰り返し回数（最良値を採用）')
+
+    args = parser.parse_args()
+    targets = [args.target] if args.target else list(BENCHMARKS)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in targets:
+            BENCHMARKS[name](args, Path(tmp))
+
+
+if __name__ == '__main__':
+    main()
@@ -2,11 +2,33 @@
 共通モジュール
 - parser: BML CSV解析
 - judgment: 判定ロジック
+- decision_table: 判定基準の決定表コンパイラ
+- criteria_snapshot: 判定基準スナップショット（変更時の差し替え）
+- codegen: 判定基準の生成コード版バックエンド
+- criteria_diff: 判定基準の差分と差分再判定
+- normalize: 検査値の正規化
+- derived: 推算項目（eGFR）
+- cohort_stats: 集団統計（企業別集計）
+- batch: 検査結果の列指向コンテナ
+- parse_cache: 解析結果キャッシュ
+- template_cache: Excelテンプレートのメモリキャッシュ
+- ooxml_writer: テンプレートへの直接セル書き込み
+- validation: 解析時検証（診断レポート）
 - constants: 定数定義
 """
 
 from .parser import BMLResultParser
+from .normalize import normalize_value
+from .derived import calculate_egfr, derive_egfr
+from .batch import ParsedBatch
+from .validation import ParseDiagnostics, write_diagnostics
+from .parse_cache import ParseCache, get_parse_cache, configure_parse_cache
+from .template_cache import TemplateCache, get_template_cache, configure_template_cache
+from .ooxml_writer import OoxmlTemplate, OoxmlUnsupported, get_ooxml_template
 from .judgment import JudgmentEngine
+from .criteria_snapshot import CriteriaSnapshot, CriteriaStore, get_criteria_store
+from .cohort_stats import CohortStats, previous_grades
+from .criteria_diff import diff_snapshots, rejudge, rejudge_report
 from .constants import (
     CODE_TO_CRITERIA,
     SUPPORTED_ENCODINGS,
@@ -17,7 +39,30 @@ from .constants import (
 
 __all__ = [
     "BMLResultParser",
+    "normalize_value",
+    "calculate_egfr",
+    "derive_egfr",
+    "ParsedBatch",
+    "ParseDiagnostics",
+    "write_diagnostics",
+    "ParseCache",
+    "get_parse_cache",
+    "configure_parse_cache",
+    "TemplateCache",
+    "get_template_cache",
+    "configure_template_cache",
+    "OoxmlTemplate",
+    "OoxmlUnsupported",
+    "get_ooxml_template",
     "JudgmentEngine",
+    "CriteriaSnapshot",
+    "CriteriaStore",
+    "get_criteria_store",
+    "CohortStats",
+    "previous_grades",
+    "diff_snapshots",
+    "rejudge",
+    "rejudge_report",
     "CODE_TO_CRITERIA",
     "SUPPORTED_ENCODINGS",
     "MIN_CSV_FIELDS",
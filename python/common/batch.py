@@ -0,0 +1,225 @@
+"""
+検査結果の列指向コンテナ
+
+患者ごとの辞書リスト（parse() の出力）の代わりに、
+全患者の検査結果を型付き配列にまとめて保持する。
+"""
+
+import sys
+from array import array
+from typing import Dict, List, Iterable, Iterator, Optional
+
+from .normalize import normalize_value
+
+# decimals 列の特殊値
+DECIMALS_TEXT = 255      # 数値化できない値（raw_values に原文を保持、values は NaN）
+DECIMALS_VERBATIM = 254  # 数値だが書式を復元できない値（raw_values に原文を保持）
+
+NAN = float('nan')
+
+
+class ParsedBatch:
+    """
+    BML検査結果の列指向コンテナ
+
+    1検査値あたり コードID(2byte) + 値(float64) + 小数桁数(1byte) + フラグID(2byte)
+    で保持し、文字列は検査コード・フラグのインターン表と、
+    数値化できない値・打ち切り値・定性区分・コメントの疎な副表にだけ残す。
+
+    Attributes:
+        patient_columns: 患者情報の列（項目名 → 患者ごとの値リスト）
+        patient_count: 患者数
+        offsets: 患者iの検査結果は [offsets[i], offsets[i+1]) の範囲
+        codes: 検査コード表（code_ids が参照）
+        code_index: 検査コード → コードID
+        code_ids: 検査コードID列
+        values: 正規化済み数値列（float64、数値化できない値は NaN）
+        decimals: 小数桁数列（値文字列の復元用）
+        flags: フラグ表（flag_ids が参照、0番は空文字）
+        flag_ids: フラグID列
+        raw_values: 行番号 → 値の原文（DECIMALS_TEXT / DECIMALS_VERBATIM の行のみ）
+        qualifiers: 行番号 → 打ち切り修飾子 "<" / ">"（該当行のみ）
+        qualitatives: 行番号 → 定性区分 "(-)" 等（該当行のみ）
+        comments: 行番号 → コメント（空でない行のみ）
+        diagnostics: 解析時検証の診断レポート（検証なしで解析した場合None）
+    """
+
+    # 患者情報の列（BMLResultParser._extract_patient_info のキー順）
+    PATIENT_FIELDS = ('facility_code', 'request_id', 'exam_date', 'time', 'insurance_no', 'gender')
+
+    def __init__(self):
+        self.patient_columns: Dict[str, List[str]] = {key: [] for key in self.PATIENT_FIELDS}
+        self.patient_count = 0
+        self.offsets = array('I', [0])
+        self.codes: List[str] = []
+        self.code_index: Dict[str, int] = {}
+        self.code_ids = array('H')
+        self.values = array('d')
+        self.decimals = array('B')
+        self.flags: List[str] = ['']
+        self.flag_index: Dict[str, int] = {'': 0}
+        self.flag_ids = array('H')
+        self.raw_values: Dict[int, str] = {}
+        self.qualifiers: Dict[int, str] = {}
+        self.qualitatives: Dict[int, str] = {}
+        self.comments: Dict[int, str] = {}
+        self.diagnostics: Optional[Dict] = None
+
+    # ------------------------------------------------------------
+    # 構築
+    # ------------------------------------------------------------
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict]) -> 'ParsedBatch':
+        """parse() / iter_records() 形式の辞書から構築"""
+        batch = cls()
+        for record in records:
+            batch.append(record)
+        return batch
+
+    def append(self, record: Dict):
+        """1患者分の辞書 {'patient_info': ..., 'test_results': [...]} を追加"""
+        patient_info = record['patient_info']
+        for key, column in self.patient_columns.items():
+            column.append(sys.intern(patient_info.get(key, '')))
+        self.patient_count += 1
+        for result in record['test_results']:
+            self._append_result(result)
+        self.offsets.append(len(self.values))
+
+    def _append_result(self, result: Dict):
+        row = len(self.values)
+        code = result['code']
+        value = result['value']
+        flag = result.get('flag', '')
+        comment = result.get('comment', '')
+
+        if 'numeric' in result:
+            numeric = result['numeric']
+            qualifier = result.get('qualifier', '')
+            qualitative = result.get('qualitative', '')
+        else:
+            numeric, qualifier, qualitative = normalize_value(value, code)
+
+        code_id = self.code_index.get(code)
+        if code_id is None:
+            code_id = len(self.codes)
+            self.codes.append(sys.intern(code))
+            self.code_index[code] = code_id
+        self.code_ids.append(code_id)
+
+        flag_id = self.flag_index.get(flag)
+        if flag_id is None:
+            flag_id = len(self.flags)
+            self.flags.append(sys.intern(flag))
+            self.flag_index[flag] = flag_id
+        self.flag_ids.append(flag_id)
+
+        decimals = _value_decimals(value, numeric, qualifier)
+        self.values.append(NAN if numeric is None else numeric)
+        self.decimals.append(decimals)
+        if decimals >= DECIMALS_VERBATIM:
+            self.raw_values[row] = value
+        if qualifier:
+            self.qualifiers[row] = qualifier
+        if qualitative:
+            self.qualitatives[row] = qualitative
+
+        if comment:
+            self.comments[row] = comment
+
+    # ------------------------------------------------------------
+    # 参照
+    # ------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return self.patient_count
+
+    def __getitem__(self, index: int) -> Dict:
+        if index < 0:
+            index += self.patient_count
+        if not 0 <= index < self.patient_count:
+            raise IndexError(index)
+        return self.record(index)
+
+    def __iter__(self) -> Iterator[Dict]:
+        for i in range(self.patient_count):
+            yield self.record(i)
+
+    @property
+    def value_count(self) -> int:
+        """検査値の総数"""
+        return len(self.values)
+
+    def record(self, index: int) -> Dict:
+        """患者 index の辞書ビュー（parse() の1要素と同じ形式）"""
+        return {
+            'patient_info': self.patient_info(index),
+            'test_results': [
+                self.result(row) for row in range(self.offsets[index], self.offsets[index + 1])
+            ],
+        }
+
+    def patient_info(self, index: int) -> Dict:
+        """患者 index の患者情報辞書"""
+        return {key: column[index] for key, column in self.patient_columns.items()}
+
+    def result(self, row: int) -> Dict:
+        """行 row の検査結果辞書（BMLResultParser の test_results 要素と同じ形式）"""
+        return {
+            'code': self.codes[self.code_ids[row]],
+            'value': self.value_str(row),
+            'flag': self.flags[self.flag_ids[row]],
+            'comment': self.comments.get(row, ''),
+            'numeric': self.values[row] if self.is_numeric(row) else None,
+            'qualifier': self.qualifiers.get(row, ''),
+            'qualitative': self.qualitatives.get(row, ''),
+        }
+
+    def value_str(self, row: int) -> str:
+        """行 row の値文字列（CSVの原文を復元）"""
+        decimals = self.decimals[row]
+        if decimals >= DECIMALS_VERBATIM:
+            return self.raw_values[row]
+        return f"{self.values[row]:.{decimals}f}"
+
+    def is_numeric(self, row: int) -> bool:
+        """行 row の値が数値として解釈できるか（正規化後の数値があるか）"""
+        return self.decimals[row] != DECIMALS_TEXT
+
+    def patient_rows(self, index: int) -> range:
+        """患者 index の行範囲"""
+        return range(self.offsets[index], self.offsets[index + 1])
+
+    def patient_of_rows(self) -> array:
+        """行 → 患者番号の列"""
+        owners = array('I')
+        for i in range(self.patient_count):
+            owners.extend([i] * (self.offsets[i + 1] - self.offsets[i]))
+        return owners
+
+    def nbytes(self) -> int:
+        """配列部分のバイト数（副表・患者情報は含まない）"""
+        return sum(
+            a.itemsize * len(a)
+            for a in (self.offsets, self.code_ids, self.values, self.decimals, self.flag_ids)
+        )
+
+
+def _value_decimals(value: str, numeric, qualifier: str) -> int:
+    """
+    値文字列の復元方法を返す
+
+    打ち切り修飾子がなく f"{数値:.{桁数}f}" で原文が復元できる場合のみ桁数を返し、
+    それ以外は DECIMALS_VERBATIM（数値あり）/ DECIMALS_TEXT（数値なし）を返す。
+    """
+    if numeric is None:
+        return DECIMALS_TEXT
+    if qualifier:
+        return DECIMALS_VERBATIM
+
+    dot = value.find('.')
+    decimals = 0 if dot == -1 else len(value) - dot - 1
+    if decimals < DECIMALS_VERBATIM and f"{numeric:.{decimals}f}" == value:
+        return decimals
+    return DECIMALS_VERBATIM
@@ -0,0 +1,192 @@
+"""
+判定基準の生成コード版バックエンド
+
+コンパイル済みの決定表（DecisionTable）を、項目ごとに比較を直列に並べた
+Python関数のモジュールに変換し、判定基準の版IDをキーにディスクへ保存する。
+2回目以降の起動では生成済みのモジュールを import するだけで、
+判定は bisect・添字参照なしの if 文の連鎖になる。
+
+生成する関数（境界値 p0 < p1 < ... の決定表から）:
+    def _t0(v, gender=None):
+        if v != v: return <NaN の判定>
+        if v < p0: return <区間0>
+        if v <= p0: return <境界値p0>    # 隣接区間と同じ判定なら比較をまとめる
+        ...
+        return <最後の区間>
+
+RuleTable（決定表にできない項目）は生成対象外で、そのまま逐次評価する。
+"""
+
+import os
+import math
+import threading
+import logging
+import importlib.util
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+from .constants import CODEGEN_CACHE_DIRNAME, CODEGEN_MODULE_PREFIX, CODEGEN_FORMAT_VERSION
+from .decision_table import DecisionTable
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parent.parent / CODEGEN_CACHE_DIRNAME
+
+# 読み込み済みモジュール（生成ファイルのパス → モジュール、プロセス内で共有）
+_modules: Dict[str, Any] = {}
+_modules_lock = threading.Lock()
+
+
+class GeneratedTable:
+    """
+    生成コードの判定関数を DecisionTable と同じインターフェースで包む
+
+    grade はインスタンス属性として生成関数そのものを持つ（メソッド呼び出しを挟まない）。
+    grade_array は元の DecisionTable（numpy 版）に委譲する。
+    """
+
+    __slots__ = ('grade', 'table')
+
+    def __init__(self, grade, table: DecisionTable):
+        self.grade = grade
+        self.table = table
+
+    def grade_array(self, values, gender: Optional[str] = None):
+        return self.table.grade_array(values, gender)
+
+
+def generate_source(tables: Dict[str, Any], version: str) -> str:
+    """
+    決定表から判定モジュールのソースを生成
+
+    Args:
+        tables: 項目キー → DecisionTable / RuleTable（compile_criteria の結果）
+        version: 判定基準の版ID
+
+    Returns:
+        Pythonソース（TABLES = {項目キー: 判定関数}）
+    """
+    lines = [
+        '"""判定基準 {} から生成（編集しないこと）"""'.format(version),
+        '',
+        'VERSION = {!r}'.format(version),
+        'FORMAT_VERSION = {!r}'.format(CODEGEN_FORMAT_VERSION),
+        '',
+    ]
+    entries = []
+    for i, (key, table) in enumerate(sorted(
+            (k, t) for k, t in tables.items() if isinstance(t, DecisionTable))):
+        name = f"_t{i}"
+        lines.extend(_function_source(name, key, table))
+        lines.append('')
+        entries.append(f"    {key!r}: {name},")
+
+    lines.append('TABLES = {')
+    lines.extend(entries)
+    lines.append('}')
+    return '\n'.join(lines) + '\n'
+
+
+def load_generated_tables(
+    tables: Dict[str, Any],
+    version: str,
+    cache_dir: Optional[Path] = None
+) -> Dict[str, Any]:
+    """
+    版IDに対応する生成モジュールを読み込み（なければ生成して保存）、判定表を差し替える
+
+    Args:
+        tables: 項目キー → DecisionTable / RuleTable
+        version: 判定基準の版ID（キャッシュのキー）
+        cache_dir: 生成モジュールの保存先（省略時は python/.criteria_cache）
+
+    Returns:
+        項目キー → GeneratedTable（RuleTable はそのまま）
+
+    Raises:
+        OSError: 保存先に書き込めない場合
+    """
+    cache_dir = Path(cache_dir) if cache_dir else DEFAULT_CACHE_DIR
+    key = str(cache_dir.resolve() / version)
+    with _modules_lock:
+        module = _modules.get(key)
+        if module is None or set(module.TABLES) != _generated_keys(tables):
+            module = _modules[key] = _load_module(tables, version, cache_dir)
+    generated = module.TABLES
+    return {
+        key: GeneratedTable(generated[key], table) if key in generated else table
+        for key, table in tables.items()
+    }
+
+
+def _load_module(tables: Dict[str, Any], version: str, cache_dir: Path):
+    """生成モジュールを import（壊れている・版が違う場合は作り直す）"""
+    module_name = f"{CODEGEN_MODULE_PREFIX}{version}_v{CODEGEN_FORMAT_VERSION}"
+    path = cache_dir / f"{module_name}.py"
+
+    if path.exists():
+        try:
+            module = _import_file(module_name, path)
+            if module.VERSION == version and set(module.TABLES) == _generated_keys(tables):
+                return module
+        except Exception as e:
+            logger.warning(f"⚠️ 生成済み判定モジュールを読めません、再生成 {path.name}: {e}")
+
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(generate_source(tables, version))
+    os.replace(tmp_path, path)
+    logger.info(f"🛠️ 判定モジュール生成: {path}")
+    return _import_file(module_name, path)
+
+
+def _import_file(module_name: str, path: Path):
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _generated_keys(tables: Dict[str, Any]) -> set:
+    return {key for key, table in tables.items() if isinstance(table, DecisionTable)}
+
+
+def _function_source(name: str, key: str, table: DecisionTable) -> List[str]:
+    lines = [f"def {name}(v, gender=None):", f"    # {key!r}"]
+    if table.gender is not None:
+        lines.append(f"    if gender != {table.gender!r}: return ''")
+    lines.append(f"    if v != v: return {table.nan_grade!r}")
+    for op, point, grade in _branches(table):
+        lines.append(f"    if v {op} {_literal(point)}: return {grade!r}")
+    lines.append(f"    return {table.grades[-1]!r}")
+    return lines
+
+
+def _branches(table: DecisionTable) -> List[Tuple[str, float, str]]:
+    """
+    区間ごとの判定を (比較演算子, 境界値, 判定) の連鎖に変換
+
+    上限の小さい順に並べるので、同じ判定が続く比較は最後の1つだけ残せばよい。
+    最後の区間（上限なし）と同じ判定の比較は末尾の return に含まれるため省く。
+    """
+    branches = []
+    for i, point in enumerate(table.points):
+        branches.append(('<', point, table.grades[2 * i]))
+        branches.append(('<=', point, table.grades[2 * i + 1]))
+
+    merged = []
+    for branch in branches:
+        if merged and merged[-1][2] == branch[2]:
+            merged[-1] = branch
+        else:
+            merged.append(branch)
+    while merged and merged[-1][2] == table.grades[-1]:
+        merged.pop()
+    return merged
+
+
+def _literal(value: float) -> str:
+    if isinstance(value, float) and not math.isfinite(value):
+        return "float('inf')" if value > 0 else "float('-inf')"
+    return repr(value)
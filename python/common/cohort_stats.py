@@ -0,0 +1,284 @@
+"""
+集団統計（企業別の判定分布・平均・パーセンタイル・悪化人数）
+
+解析・判定済みの患者を1回ずつ流し込み、グループ（企業）× 検査項目ごとの
+集計器に積み上げる。集計器は merge() で合算できるため、ファイルごとに
+別プロセスで集計した結果をまとめることもできる。
+summary() はGASが1回の setValues で貼り付けられる2次元配列（header / rows）を含む。
+"""
+
+import json
+import math
+from array import array
+from pathlib import Path
+from typing import Dict, Any, Optional, List, Iterable, Callable, Union
+
+from .constants import (
+    CODE_TO_CRITERIA,
+    GENDER_CODE_TO_INTERNAL,
+    JUDGMENT_WEIGHT,
+    COHORT_STATS_VERSION,
+    COHORT_PERCENTILES,
+    COHORT_STATS_DECIMALS,
+    COHORT_GROUP_ALL,
+    COHORT_DEFAULT_GROUP_FIELD,
+    COHORT_DEFAULT_PATIENT_KEY,
+)
+
+# 判定の並び（集計表の列順）
+GRADE_COLUMNS = tuple(JUDGMENT_WEIGHT)
+
+
+class ItemStats:
+    """
+    1グループ × 1検査項目の集計器
+
+    Attributes:
+        values: 数値結果（平均・パーセンタイル計算用、float64）
+        grades: 判定 → 人数
+        compared: 前回判定と比較できた人数
+        worsened: 前回より判定が悪化した人数
+    """
+
+    __slots__ = ('values', 'grades', 'compared', 'worsened')
+
+    def __init__(self):
+        self.values = array('d')
+        self.grades: Dict[str, int] = {}
+        self.compared = 0
+        self.worsened = 0
+
+    def add(self, value: Optional[float], grade: str, previous_grade: Optional[str] = None):
+        """1人分の結果を追加（value は数値化できない結果ならNone）"""
+        if value is not None and value == value:
+            self.values.append(value)
+        if grade:
+            self.grades[grade] = self.grades.get(grade, 0) + 1
+            if previous_grade:
+                self.compared += 1
+                if JUDGMENT_WEIGHT.get(grade, 0) > JUDGMENT_WEIGHT.get(previous_grade, 0):
+                    self.worsened += 1
+
+    def merge(self, other: 'ItemStats'):
+        """別の集計器の内容を合算"""
+        self.values.extend(other.values)
+        for grade, count in other.grades.items():
+            self.grades[grade] = self.grades.get(grade, 0) + count
+        self.compared += other.compared
+        self.worsened += other.worsened
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        集計結果（数値結果がない項目は mean / percentiles がNone）
+
+        平均は math.fsum で計算するため、追加・合算の順序によらず同じ値になる。
+        """
+        count = len(self.values)
+        ordered = sorted(self.values) if count else []
+        return {
+            'n': count,
+            'judged': sum(self.grades.values()),
+            'mean': _round(math.fsum(self.values) / count) if count else None,
+            'min': ordered[0] if count else None,
+            'max': ordered[-1] if count else None,
+            'percentiles': {
+                f"p{p}": _round(_percentile(ordered, p)) if count else None for p in COHORT_PERCENTILES
+            },
+            'grades': {grade: self.grades.get(grade, 0) for grade in GRADE_COLUMNS if grade in self.grades},
+            'compared': self.compared,
+            'worsened': self.worsened,
+        }
+
+
+class CohortStats:
+    """
+    グループ × 検査項目の集団統計
+
+    Args:
+        engine: 判定に使う JudgmentEngine（結果に 'judgment' があればそれを優先）
+        group_by: グループ名を決める患者情報の項目名、または record → グループ名 の関数
+        previous: 前回の判定 {患者キー: {検査コード: 判定}}（previous_grades() で作成）
+        patient_key: previous と突き合わせる患者情報の項目名
+    """
+
+    def __init__(
+        self,
+        engine=None,
+        group_by: Union[str, Callable[[Dict], str]] = COHORT_DEFAULT_GROUP_FIELD,
+        previous: Optional[Dict[str, Dict[str, str]]] = None,
+        patient_key: str = COHORT_DEFAULT_PATIENT_KEY
+    ):
+        self.engine = engine
+        self.group_by = group_by
+        self.previous = previous or {}
+        self.patient_key = patient_key
+        self.groups: Dict[str, Dict[str, ItemStats]] = {}
+        self.patients: Dict[str, int] = {}
+
+    def add(self, record: Dict, group: Optional[str] = None):
+        """
+        1患者分を追加
+
+        Args:
+            record: parse() 形式の1患者 {'patient_info': ..., 'test_results': [...]}
+            group: グループ名（省略時は group_by から決定）
+        """
+        patient_info = record['patient_info']
+        if group is None:
+            group = self._group_of(record)
+        gender = GENDER_CODE_TO_INTERNAL.get(patient_info.get('gender', ''), patient_info.get('gender') or 'M')
+        previous = self.previous.get(patient_info.get(self.patient_key, ''), {})
+
+        items = self.groups.setdefault(group, {})
+        self.patients[group] = self.patients.get(group, 0) + 1
+        for result in record['test_results']:
+            code = result.get('code') or result.get('item_code')
+            if not code:
+                continue
+            stats = items.get(code)
+            if stats is None:
+                stats = items[code] = ItemStats()
+            stats.add(_numeric_of(result), self._grade_of(result, gender), previous.get(code))
+
+    def add_all(self, records: Iterable[Dict]) -> 'CohortStats':
+        """患者を順に追加（iter_records() 等のストリームも1回だけ読む）"""
+        for record in records:
+            self.add(record)
+        return self
+
+    def merge(self, other: 'CohortStats') -> 'CohortStats':
+        """別の集計（別ファイル・別プロセス分）を合算"""
+        for group, items in other.groups.items():
+            mine = self.groups.setdefault(group, {})
+            for code, stats in items.items():
+                if code not in mine:
+                    mine[code] = ItemStats()
+                mine[code].merge(stats)
+        for group, count in other.patients.items():
+            self.patients[group] = self.patients.get(group, 0) + count
+        return self
+
+    def summary(self, include_all: bool = True) -> Dict[str, Any]:
+        """
+        集計結果
+
+        Args:
+            include_all: Trueなら全グループの合算（COHORT_GROUP_ALL）も含める
+
+        Returns:
+            {
+                'version', 'patients',
+                'groups': {グループ: {'patients': 人数, 'items': {検査コード: ItemStats.summary()}}},
+                'header': 集計表の見出し行,
+                'rows': 集計表の行（グループ・検査コード順、GASの setValues にそのまま渡せる）
+            }
+        """
+        groups = {name: (self.patients.get(name, 0), items) for name, items in sorted(self.groups.items())}
+        if include_all and len(groups) > 1:
+            merged: Dict[str, ItemStats] = {}
+            for items in self.groups.values():
+                for code, stats in items.items():
+                    merged.setdefault(code, ItemStats()).merge(stats)
+            groups[COHORT_GROUP_ALL] = (sum(self.patients.values()), merged)
+
+        header = (['group', 'code', 'item', 'n', 'mean']
+                  + [f"p{p}" for p in COHORT_PERCENTILES]
+                  + list(GRADE_COLUMNS) + ['compared', 'worsened'])
+        rows = []
+        summary_groups = {}
+        for name, (patients, items) in groups.items():
+            item_summaries = {}
+            for code in sorted(items):
+                item = item_summaries[code] = items[code].summary()
+                rows.append(
+                    [name, code, CODE_TO_CRITERIA.get(code, ''), item['n'], _cell(item['mean'])]
+                    + [_cell(item['percentiles'][f"p{p}"]) for p in COHORT_PERCENTILES]
+                    + [item['grades'].get(grade, 0) for grade in GRADE_COLUMNS]
+                    + [item['compared'], item['worsened']]
+                )
+            summary_groups[name] = {'patients': patients, 'items': item_summaries}
+
+        return {
+            'version': COHORT_STATS_VERSION,
+            'patients': sum(self.patients.values()),
+            'groups': summary_groups,
+            'header': header,
+            'rows': rows,
+        }
+
+    def write_json(self, output_path: Path) -> Path:
+        """集計結果をコンパクトなJSONで保存（GASに渡す用）"""
+        output_path = Path(output_path)
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump(self.summary(), f, ensure_ascii=False, separators=(',', ':'))
+        return output_path
+
+    def _group_of(self, record: Dict) -> str:
+        if callable(self.group_by):
+            return str(self.group_by(record))
+        return str(record['patient_info'].get(self.group_by, '') or '')
+
+    def _grade_of(self, result: Dict, gender: str) -> str:
+        grade = result.get('judgment')
+        if grade:
+            return grade
+        if self.engine is None:
+            return ''
+        return self.engine.judge_result(result, gender)
+
+
+def previous_grades(
+    records: Iterable[Dict],
+    engine=None,
+    patient_key: str = COHORT_DEFAULT_PATIENT_KEY
+) -> Dict[str, Dict[str, str]]:
+    """
+    前回の結果から {患者キー: {検査コード: 判定}} を作成（CohortStats の previous 用）
+
+    Args:
+        records: 前回の parse() 形式の患者リスト
+        engine: 判定に使う JudgmentEngine（結果に 'judgment' があればそれを優先）
+        patient_key: 患者を突き合わせる患者情報の項目名
+    """
+    stats = CohortStats(engine)
+    grades: Dict[str, Dict[str, str]] = {}
+    for record in records:
+        patient_info = record['patient_info']
+        key = patient_info.get(patient_key, '')
+        if not key:
+            continue
+        gender = GENDER_CODE_TO_INTERNAL.get(patient_info.get('gender', ''), patient_info.get('gender') or 'M')
+        patient = grades.setdefault(key, {})
+        for result in record['test_results']:
+            code = result.get('code') or result.get('item_code')
+            grade = stats._grade_of(result, gender)
+            if code and grade:
+                patient[code] = grade
+    return grades
+
+
+def _numeric_of(result: Dict) -> Optional[float]:
+    if 'numeric' in result:
+        return result['numeric']
+    try:
+        value = float(result.get('value'))
+    except (ValueError, TypeError):
+        return None
+    return None if value != value else value
+
+
+def _percentile(ordered: List[float], p: float) -> float:
+    """線形補間のパーセンタイル（numpy.percentile の既定と同じ）"""
+    position = (len(ordered) - 1) * p / 100
+    low = math.floor(position)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+
+def _round(value: float) -> float:
+    return round(value, COHORT_STATS_DECIMALS)
+
+
+def _cell(value: Optional[float]):
+    """集計表のセル値（値なしは空文字）"""
+    return '' if value is None else value
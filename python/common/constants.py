@@ -5,9 +5,64 @@
 # CSVパース設定
 SUPPORTED_ENCODINGS = ['shift_jis', 'cp932', 'utf-8']
 MIN_CSV_FIELDS = 12
+ENCODING_SNIFF_BYTES = 64 * 1024  # エンコーディング推定に使う先頭バイト数
+READ_CHUNK_SIZE = 1024 * 1024  # ストリーミング読み込み時のチャンクサイズ（バイト）
 TEST_RESULT_START_INDEX = 11
 TEST_RESULT_FIELD_COUNT = 4
 
+# 行の分割方式
+TOKENIZER_CSV = 'csv'      # 引用符を含む行のみ csv モジュールで分割
+TOKENIZER_SPLIT = 'split'  # 常に str.split(',')
+
+# 行オフセットインデックス（サイドカーファイル）
+LINE_INDEX_SUFFIX = '.idx.json'
+LINE_INDEX_VERSION = 2
+
+# 追記監視（parse_appended）: 確定位置の直前のバイト数（ファイルの置き換え検出用）
+TAIL_FINGERPRINT_BYTES = 64
+
+# 解析結果キャッシュ
+PARSE_CACHE_MAX_ENTRIES = 32
+
+# 一括転記（1つのCSVの全患者を出力）の出力一覧ファイル（<CSV名>_manifest.json）
+BATCH_MANIFEST_SUFFIX = '_manifest.json'
+BATCH_MANIFEST_VERSION = 1
+
+# テンプレートキャッシュ（保持するテンプレートの数）
+TEMPLATE_CACHE_MAX_ENTRIES = 4
+
+# 判定結果メモ（JudgmentEngine.enable_memo の既定件数）
+JUDGMENT_MEMO_MAX_ENTRIES = 4096
+
+# 判定基準スナップショット（版ID = 正規化JSONのハッシュ、バイト数）
+CRITERIA_VERSION_DIGEST_SIZE = 8
+
+# 判定基準の生成コード（ディスクキャッシュ）
+CODEGEN_CACHE_DIRNAME = '.criteria_cache'  # python/ 直下に作成
+CODEGEN_MODULE_PREFIX = 'judgment_'
+CODEGEN_FORMAT_VERSION = 1                 # 生成コードの形式を変えたら上げる
+
+# 集団統計（企業別一覧表の集計）
+COHORT_STATS_VERSION = 1
+COHORT_PERCENTILES = (5, 25, 50, 75, 95)
+COHORT_STATS_DECIMALS = 3       # 平均・パーセンタイルの丸め桁数
+COHORT_GROUP_ALL = '全体'       # 全グループを合算した集計のグループ名
+COHORT_DEFAULT_GROUP_FIELD = 'facility_code'
+COHORT_DEFAULT_PATIENT_KEY = 'insurance_no'  # 前回結果との突き合わせに使う患者情報
+
+# 解析時検証（診断レポート）
+DIAG_TOO_FEW_FIELDS = 'too_few_fields'          # 列数が MIN_CSV_FIELDS 未満（行ごと破棄）
+DIAG_MISSING_REQUEST_ID = 'missing_request_id'  # 依頼IDが空
+DIAG_INVALID_CODE = 'invalid_code'              # 検査コード位置に数字以外
+DIAG_MISALIGNED_RESULT = 'misaligned_result'    # 検査コードが4列単位の位置からずれている
+DIAG_EMPTY_VALUE = 'empty_value'                # 結果値が空（項目ごと破棄）
+DIAG_TRUNCATED_RESULT = 'truncated_result'      # 行末の検査コードに結果値がない
+DIAG_NON_NUMERIC_VALUE = 'non_numeric_value'    # 数値検査の値を数値化できない
+DIAG_UNTERMINATED_QUOTE = 'unterminated_quote'  # 引用符が閉じないままファイル末尾
+DIAG_MAX_SAMPLES = 20                           # 種別ごとに保持する診断の件数
+DIAG_EXCERPT_CHARS = 80                         # 診断に残す行の抜粋の長さ
+DIAGNOSTICS_SUFFIX = '_diagnostics.json'
+
 # 検査コード → 判定基準キーのマッピング
 CODE_TO_CRITERIA = {
     "0000481": "AST_GOT",
@@ -27,6 +82,76 @@ CODE_TO_CRITERIA = {
     "0000413": "CREATININE",  # クレアチニン（性別サフィックス付加）
 }
 
+# 定性検査のBMLコード（GAS normalizeBmlValue と同じ）
+QUALITATIVE_CODES = {
+    # 尿検査
+    "0000051", "0000055", "0000057", "0000059", "0000062", "0000063",
+    # 感染症
+    "0000740", "0003795", "0000905", "0000911",
+    # 判定系
+    "0003891", "0004821",
+}
+
+# 数値検査のBMLコード（GAS normalizeBmlValue と同じ、不等号等を除去して数値化）
+NUMERIC_CODES = {
+    # 血液学検査
+    "0000301", "0000302", "0000303", "0000304", "0000305", "0000306", "0000307", "0000308",
+    "0001881", "0001882", "0001883", "0001884", "0001885", "0001886", "0001887", "0001888",
+    "0001889", "0001890",
+    # 蛋白・肝機能
+    "0000401", "0000417", "0000481", "0000482", "0000484", "0013067", "0013380", "0000491",
+    "0000501", "0000472",
+    # 脂質検査
+    "0000453", "0000454", "0000460", "0000410", "0003845",
+    # 糖代謝
+    "0000503", "0003317",
+    # 腎機能
+    "0000413", "0000409", "0002696", "0000407",
+    # 電解質・酵素
+    "0000497", "0000421", "0000423", "0000425", "0000427", "0000658",
+    # 心臓マーカー
+    "0003550",
+    # 定量値
+    "0004822", "0003892", "0003893",
+    # 尿検査（数値系）
+    "0000060", "0000061",
+}
+
+# 定性結果の表記ゆれ → 正規表記（GAS BML_VALUE_TRANSFORMS.qualitative と同じ）
+QUALITATIVE_TRANSFORMS = {
+    "-": "(-)", "±": "(±)", "+": "(+)", "++": "(++)", "+++": "(+++)",
+    "陰性": "(-)", "擬陽性": "(±)", "疑陽性": "(±)", "陽性": "(+)",
+    "ネガティブ": "(-)", "ポジティブ": "(+)",
+    "1-": "(-)", "1+": "(+)", "2+": "(++)", "3+": "(+++)",
+}
+
+# 定性結果の正規表記
+QUALITATIVE_CLASSES = {"(-)", "(±)", "(+)", "(++)", "(+++)"}
+
+# 定性結果 → 判定（GAS getQualitativeJudgment と同じ、正規表記以外の表記も含む）
+QUALITATIVE_JUDGMENT = {
+    "(-)": "A", "-": "A", "陰性": "A",
+    "(±)": "B", "±": "B", "疑陽性": "B",
+    "(+)": "C", "+": "C", "1+": "C", "陽性": "C",
+    "(++)": "C", "++": "C", "2+": "C",
+    "(+++)": "D", "+++": "D", "3+": "D",
+}
+
+# 打ち切り値の記号 → 修飾子（"<": 検出下限未満側, ">": 測定上限超過側）
+CENSOR_MARKS = {
+    "<": "<", "≦": "<", "未満": "<", "以下": "<",
+    ">": ">", "≧": ">", "以上": ">",
+}
+
+# eGFR推算（日本腎臓学会 CKD診療ガイド2012、GAS calculateEgfr と同じ）
+EGFR_CODE = "0002696"
+CREATININE_CODE = "0000413"
+EGFR_COEFFICIENT = 194
+EGFR_CREATININE_EXPONENT = -1.094
+EGFR_AGE_EXPONENT = -0.287
+EGFR_FEMALE_FACTOR = 0.739
+DERIVED_COMMENT = "計算値（クレアチニン・年齢・性別から推算）"
+
 # 性別依存の検査コード
 GENDER_DEPENDENT_CODES = {"0000303", "0000413"}
 
@@ -54,3 +179,46 @@ JUDGMENT_GRADES = ["A", "B", "C", "D"]
 # デフォルト判定
 DEFAULT_JUDGMENT_NORMAL = "A"
 DEFAULT_JUDGMENT_ABNORMAL = "C"
+
+# 判定の重み（大きいほど悪い、GAS JUDGMENT_WEIGHT と同じ）
+JUDGMENT_WEIGHT = {"A": 1, "B": 2, "C": 3, "D": 4, "E": 5, "F": 3}
+
+# 判定ラベル（GAS Config.js JUDGMENT_LABELS と同じ）
+JUDGMENT_LABELS = {
+    "A": "異常なし",
+    "B": "軽度異常",
+    "C": "要再検査・生活改善",
+    "D": "要精密検査・治療",
+    "E": "治療中",
+    "F": "経過観察中",
+}
+
+# 糖代謝の組合せ判定（GAS getGlucoseHbA1cJudgment と同じ）
+FBS_CODE = "0000503"
+HBA1C_CODE = "0003317"
+FBS_RANK_BREAKS = (100, 110, 126)      # 空腹時血糖ランク 0〜3 の境界（未満）
+HBA1C_RANK_BREAKS = (5.6, 6.0, 6.5)    # HbA1cランク 0〜3 の境界（未満）
+GLUCOSE_MATRIX = (                     # [HbA1cランク][FBSランク]
+    ("A", "A", "B", "C"),
+    ("A", "B", "C", "C"),
+    ("B", "C", "C", "D"),
+    ("C", "D", "D", "D"),
+)
+
+# 血圧の判定基準キー（収縮期・拡張期の悪い方）
+BP_SYSTOLIC_KEY = "BP_SYSTOLIC"
+BP_DIASTOLIC_KEY = "BP_DIASTOLIC"
+
+# 総合判定のカテゴリ（GAS CODE_TO_CATEGORY と同じ）
+CATEGORY_GLUCOSE = "糖代謝"
+CATEGORY_BLOOD_PRESSURE = "血圧"
+CODE_TO_CATEGORY = {
+    "0000301": "血液学", "0000302": "血液学", "0000303": "血液学",
+    "0000304": "血液学", "0000308": "血液学",
+    "0000481": "肝機能", "0000482": "肝機能", "0000484": "肝機能",
+    "0000460": "脂質", "0000410": "脂質", "0000454": "脂質",
+    "0000503": CATEGORY_GLUCOSE, "0003317": CATEGORY_GLUCOSE,
+    "0000413": "腎機能", "0002696": "腎機能", "0000407": "腎機能",
+    "0000658": "炎症",
+}
+CATEGORY_OTHER = "その他"
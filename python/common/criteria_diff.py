@@ -0,0 +1,230 @@
+"""
+判定基準の差分と差分再判定
+
+新旧2つの判定基準スナップショットを比較し、判定が変わる項目と値の区間を求める。
+集団の解析結果（--ingest の出力等）のうち、その区間に入る値だけを新基準で
+再判定し、出力の作り直しが必要な患者を列挙する。
+
+区間の求め方:
+    新旧の決定表の境界値を合わせて p0 < p1 < ... とすると、
+    (-inf, p0), [p0], (p0, p1), ... の各区間の中では新旧どちらの判定も変わらない
+    （decision_table と同じ考え方）。区間の代表値で新旧を比較すれば、
+    判定が変わる区間を漏れなく求められる。
+"""
+
+import math
+from bisect import bisect_left
+from typing import Dict, Any, Optional, List, Iterable
+
+from .constants import GENDER_CODE_TO_INTERNAL
+from .decision_table import DecisionTable
+from .normalize import normalize_value
+
+# 性別限定の項目も含めて比較する性別
+_GENDERS = ('M', 'F')
+
+
+class ItemDiff:
+    """
+    1項目分の判定が変わる区間
+
+    Attributes:
+        points: 新旧の境界値を合わせたソート済みの値
+        changed: 区間番号 → 判定が変わるか（長さ 2*len(points)+1）
+        nan_changed: NaN の判定が変わるか
+        all_changed: 区間に分けられない（追加・削除された項目、決定表にできない基準）
+    """
+
+    __slots__ = ('points', 'changed', 'nan_changed', 'all_changed')
+
+    def __init__(self, points: List[float], changed: List[bool], nan_changed: bool, all_changed: bool = False):
+        self.points = points
+        self.changed = changed
+        self.nan_changed = nan_changed
+        self.all_changed = all_changed
+
+    def contains(self, value: float) -> bool:
+        """値が判定の変わる区間に入るか"""
+        if self.all_changed:
+            return True
+        if value != value:
+            return self.nan_changed
+        i = bisect_left(self.points, value)
+        if i < len(self.points) and self.points[i] == value:
+            return self.changed[2 * i + 1]
+        return self.changed[2 * i]
+
+    def intervals(self) -> List[Dict[str, Any]]:
+        """判定が変わる区間（隣り合う区間はまとめる、None は無限）"""
+        if self.all_changed:
+            return [{'min': None, 'max': None, 'min_inclusive': False, 'max_inclusive': False}]
+
+        intervals = []
+        for region, changed in enumerate(self.changed):
+            if not changed:
+                continue
+            i, is_point = divmod(region, 2)
+            if is_point:
+                low = high = self.points[i]
+                low_inclusive = high_inclusive = True
+            else:
+                low = self.points[i - 1] if i > 0 else None
+                high = self.points[i] if i < len(self.points) else None
+                low_inclusive = high_inclusive = False
+
+            last = intervals[-1] if intervals else None
+            if last is not None and last['max'] == low and (last['max_inclusive'] or low_inclusive):
+                last['max'] = high
+                last['max_inclusive'] = high_inclusive
+            else:
+                intervals.append({'min': low, 'max': high,
+                                  'min_inclusive': low_inclusive, 'max_inclusive': high_inclusive})
+        return intervals
+
+
+def diff_snapshots(old, new) -> Dict[str, ItemDiff]:
+    """
+    2つの判定基準スナップショットの差分
+
+    Args:
+        old: 旧基準の CriteriaSnapshot
+        new: 新基準の CriteriaSnapshot
+
+    Returns:
+        項目キー → ItemDiff（判定が変わらない項目は含まない）
+    """
+    diffs = {}
+    for key in sorted(set(old.tables) | set(new.tables)):
+        if old.criteria.get(key) == new.criteria.get(key):
+            continue
+        old_table = old.tables.get(key)
+        new_table = new.tables.get(key)
+        if not isinstance(old_table, DecisionTable) or not isinstance(new_table, DecisionTable):
+            diffs[key] = ItemDiff([], [], True, all_changed=True)
+            continue
+        diff = _diff_tables(old_table, new_table)
+        if diff.nan_changed or any(diff.changed):
+            diffs[key] = diff
+    return diffs
+
+
+def rejudge(
+    records: Iterable[Dict],
+    old_engine,
+    new_engine,
+    diffs: Dict[str, ItemDiff]
+) -> Dict[str, Any]:
+    """
+    判定が変わる区間の値だけを新旧の基準で再判定
+
+    Args:
+        records: parse() 形式の患者リスト（--ingest の 'results' 等）
+        old_engine: 旧基準の JudgmentEngine
+        new_engine: 新基準の JudgmentEngine
+        diffs: diff_snapshots() の結果
+
+    Returns:
+        {
+            'patients': [{'request_id', 'patient_info', 'changes': [{'code', 'item', 'value', 'old', 'new'}]}],
+            'checked': 確認した検査値の数,
+            'candidates': 区間に入り再判定した数,
+            'changed': 判定が変わった数
+        }
+    """
+    patients = []
+    checked = candidates = changed = 0
+    for record in records:
+        patient_info = record['patient_info']
+        gender = GENDER_CODE_TO_INTERNAL.get(patient_info.get('gender', ''), 'M')
+        changes = []
+        for result in record['test_results']:
+            checked += 1
+            code = result.get('code') or result.get('item_code')
+            item = new_engine._get_criteria_key(code, gender)
+            diff = diffs.get(item) if item else None
+            if diff is None:
+                continue
+            value = _numeric_value(result, code)
+            if value is None or not diff.contains(value):
+                continue
+
+            candidates += 1
+            old_grade = old_engine.judge_result(result, gender)
+            new_grade = new_engine.judge_result(result, gender)
+            if old_grade != new_grade:
+                changed += 1
+                changes.append({'code': code, 'item': item, 'value': result.get('value'),
+                                'old': old_grade, 'new': new_grade})
+        if changes:
+            patients.append({
+                'request_id': patient_info.get('request_id', ''),
+                'patient_info': patient_info,
+                'changes': changes,
+            })
+
+    return {'patients': patients, 'checked': checked, 'candidates': candidates, 'changed': changed}
+
+
+def rejudge_report(old, new, records: Iterable[Dict]) -> Dict[str, Any]:
+    """
+    スナップショットの差分から集団を差分再判定したレポート
+
+    Args:
+        old: 旧基準の CriteriaSnapshot
+        new: 新基準の CriteriaSnapshot
+        records: parse() 形式の患者リスト
+
+    Returns:
+        rejudge() の結果に 'old_version' / 'new_version' /
+        'items'（項目キー → 判定が変わる区間のリスト）を加えたもの
+    """
+    from .judgment import JudgmentEngine
+
+    diffs = diff_snapshots(old, new)
+    report = {
+        'old_version': old.version,
+        'new_version': new.version,
+        'items': {key: diff.intervals() for key, diff in diffs.items()},
+    }
+    report.update(rejudge(records, JudgmentEngine.from_snapshot(old), JudgmentEngine.from_snapshot(new), diffs))
+    return report
+
+
+def _diff_tables(old: DecisionTable, new: DecisionTable) -> ItemDiff:
+    points = sorted(set(old.points) | set(new.points))
+    changed = []
+    for region in range(2 * len(points) + 1):
+        value = _representative(points, region)
+        changed.append(any(old.grade(value, g) != new.grade(value, g) for g in _GENDERS))
+    nan_changed = any(old.grade(math.nan, g) != new.grade(math.nan, g) for g in _GENDERS)
+    return ItemDiff(points, changed, nan_changed)
+
+
+def _representative(points: List[float], region: int) -> float:
+    """区間内の値を1つ返す（境界値の区間はその値、開区間は中点、端は ±1）"""
+    i, is_point = divmod(region, 2)
+    if is_point:
+        return points[i]
+    if not points:
+        return 0.0
+    if i == 0:
+        return points[0] - 1
+    if i == len(points):
+        return points[-1] + 1
+    low, high = points[i - 1], points[i]
+    middle = (low + high) / 2
+    # 隣接する浮動小数点数の間は中点が端点に丸められる
+    return middle if low < middle < high else math.nextafter(low, high)
+
+
+def _numeric_value(result: Dict, code: str) -> Optional[float]:
+    """再判定の対象を決める数値（judge_result と同じ正規化、数値でない結果はNone）"""
+    if 'numeric' in result:
+        return result['numeric']
+    value = result.get('value')
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        if not isinstance(value, str):
+            return None
+        return normalize_value(value.strip(), code)[0]
@@ -0,0 +1,190 @@
+"""
+判定基準スナップショット
+
+マッピングJSON（judgment_criteria.items）の判定基準を決定表にコンパイルした
+変更不可のスナップショットとして保持する。版IDは判定基準の正規化JSONの
+ハッシュで、内容が同じなら同じ版になる。
+
+CriteriaStore はマッピングファイルの更新時刻(ns)・サイズを監視し、
+変更があった場合だけ再コンパイルして新しいスナップショットに差し替える。
+差し替えは参照の代入1回なので、処理中のリクエストは古い版のまま完了する。
+"""
+
+import json
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple
+
+from .constants import CRITERIA_VERSION_DIGEST_SIZE
+from .decision_table import compile_criteria
+
+logger = logging.getLogger(__name__)
+
+
+class CriteriaSnapshot:
+    """
+    コンパイル済み判定基準（変更不可）
+
+    Attributes:
+        version: 版ID（判定基準の正規化JSONのハッシュ）
+        criteria: 判定基準辞書（スナップショット専用のコピー、変更しないこと）
+        tables: 項目キー → DecisionTable / RuleTable
+        source: 読み込み元のマッピングファイル（辞書から作成した場合None）
+        mtime_ns: 読み込み時の更新時刻(ns)
+    """
+
+    __slots__ = ('version', 'criteria', 'tables', 'source', 'mtime_ns')
+
+    def __init__(self, version: str, criteria: Dict[str, Any], tables: Dict[str, Any],
+                 source: Optional[Path] = None, mtime_ns: Optional[int] = None):
+        for name, value in (('version', version), ('criteria', criteria), ('tables', tables),
+                            ('source', source), ('mtime_ns', mtime_ns)):
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"CriteriaSnapshot は変更できません: {name}")
+
+    def __repr__(self) -> str:
+        return f"CriteriaSnapshot(version={self.version!r}, items={len(self.tables)})"
+
+    @classmethod
+    def compile(cls, criteria: Dict[str, Any], source: Optional[Path] = None,
+                mtime_ns: Optional[int] = None) -> 'CriteriaSnapshot':
+        """
+        判定基準辞書からスナップショットを作成
+
+        Args:
+            criteria: 判定基準辞書 {項目キー: {A: {min, max}, B: {...}, ...}}
+            source: 読み込み元のマッピングファイル
+            mtime_ns: 読み込み時の更新時刻(ns)
+
+        Returns:
+            CriteriaSnapshot（criteria は呼び出し側の辞書と共有しないコピー）
+        """
+        canonical = _canonical_json(criteria)
+        criteria = json.loads(canonical)
+        return cls(_version_of(canonical), criteria, compile_criteria(criteria), source, mtime_ns)
+
+    @classmethod
+    def from_mapping_file(cls, mapping_path: Path) -> 'CriteriaSnapshot':
+        """
+        マッピングJSONの judgment_criteria.items からスナップショットを作成
+
+        Raises:
+            OSError: ファイルを読めない場合
+            ValueError: JSONとして解釈できない場合
+        """
+        mapping_path = Path(mapping_path)
+        mtime_ns = mapping_path.stat().st_mtime_ns
+        with open(mapping_path, 'r', encoding='utf-8') as f:
+            mapping = json.load(f)
+        return cls.compile(_criteria_of(mapping), mapping_path, mtime_ns)
+
+
+class CriteriaStore:
+    """
+    マッピングファイルの判定基準スナップショットを保持し、変更時に差し替える（スレッドセーフ）
+
+    current() はファイルの stat だけで変更を判定し、更新時刻・サイズが
+    変わった場合のみ再読み込みする。判定基準の内容が変わっていなければ
+    （他の項目だけ編集された場合など）コンパイルせず同じスナップショットを返す。
+    読み込みに失敗した場合（書き込み途中のJSON等）は直前のスナップショットを使い続ける。
+
+    Args:
+        mapping_path: マッピングJSONのパス
+    """
+
+    def __init__(self, mapping_path: Path):
+        self.mapping_path = Path(mapping_path)
+        self.reloads = 0
+        self._snapshot: Optional[CriteriaSnapshot] = None
+        self._stat_key: Optional[Tuple[int, int]] = None
+        self._lock = threading.Lock()
+
+    def current(self) -> CriteriaSnapshot:
+        """
+        最新のスナップショットを返す（ファイルが変わっていれば再コンパイル）
+
+        Raises:
+            OSError / ValueError: 初回の読み込みに失敗した場合
+        """
+        try:
+            stat = self.mapping_path.stat()
+            stat_key = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            if self._snapshot is None:
+                raise
+            return self._snapshot
+
+        snapshot = self._snapshot
+        if snapshot is not None and stat_key == self._stat_key:
+            return snapshot
+
+        with self._lock:
+            if self._snapshot is not None and stat_key == self._stat_key:
+                return self._snapshot
+            try:
+                self._reload(stat_key)
+            except (OSError, ValueError) as e:
+                if self._snapshot is None:
+                    raise
+                # 同じ内容で再試行しない（次にファイルが更新されたら再読み込み）
+                self._stat_key = stat_key
+                logger.warning(f"⚠️ 判定基準の再読み込みに失敗、現行版を継続 ({self._snapshot.version}): {e}")
+            return self._snapshot
+
+    def _reload(self, stat_key: Tuple[int, int]):
+        with open(self.mapping_path, 'r', encoding='utf-8') as f:
+            mapping = json.load(f)
+        canonical = _canonical_json(_criteria_of(mapping))
+        version = _version_of(canonical)
+        self._stat_key = stat_key
+
+        if self._snapshot is not None and self._snapshot.version == version:
+            return
+
+        criteria = json.loads(canonical)
+        previous = self._snapshot
+        self._snapshot = CriteriaSnapshot(
+            version, criteria, compile_criteria(criteria), self.mapping_path, stat_key[0]
+        )
+        if previous is not None:
+            self.reloads += 1
+            logger.info(f"🔄 判定基準を更新: {previous.version} → {version} ({self.mapping_path.name})")
+
+
+# プロセス内で共有するストア（マッピングファイルごと）
+_stores: Dict[str, CriteriaStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_criteria_store(mapping_path: Path) -> CriteriaStore:
+    """マッピングファイルのプロセス共有ストアを取得"""
+    key = str(Path(mapping_path).resolve())
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = _stores[key] = CriteriaStore(Path(mapping_path))
+        return store
+
+
+def criteria_version(criteria: Dict[str, Any]) -> str:
+    """判定基準辞書の版ID（CriteriaSnapshot.version と同じ）"""
+    return _version_of(_canonical_json(criteria))
+
+
+def _criteria_of(mapping: Dict) -> Dict[str, Any]:
+    criteria = (mapping.get('judgment_criteria') or {}).get('items') or {}
+    if not isinstance(criteria, dict):
+        raise ValueError("judgment_criteria.items が辞書ではありません")
+    return criteria
+
+
+def _canonical_json(criteria: Dict[str, Any]) -> str:
+    return json.dumps(criteria, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+
+
+def _version_of(canonical: str) -> str:
+    return hashlib.blake2b(canonical.encode('utf-8'), digest_size=CRITERIA_VERSION_DIGEST_SIZE).hexdigest()
@@ -0,0 +1,255 @@
+"""
+判定基準の決定表コンパイラ
+
+判定基準 {A: {min, max, or}, B: ..., ...} を項目ごとに
+「ソート済みの境界値配列 + 区間ごとの判定」に変換し、
+1回の bisect と添字参照で判定できるようにする。
+
+区間の作り方:
+    境界値（全グレードの min/max）を昇順に p0 < p1 < ... < p(n-1) とすると、
+    数直線は (-inf, p0), [p0], (p0, p1), [p1], ..., [p(n-1)], (p(n-1), inf)
+    の 2n+1 区間に分かれ、各区間の中では全ルールの成否が変わらない。
+    値 v の区間番号は i = bisect_left(points, v) として、
+    points[i] == v なら 2i+1（境界値そのもの）、そうでなければ 2i。
+"""
+
+import math
+from bisect import bisect_left
+from typing import Dict, Any, Optional, List, Tuple
+
+from .constants import JUDGMENT_GRADES
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# 閉区間 (下限, 上限)。None は無限
+Interval = Tuple[Optional[float], Optional[float]]
+
+
+class DecisionTable:
+    """
+    1項目分のコンパイル済み判定表
+
+    Attributes:
+        points: ソート済みの境界値
+        grades: 区間番号 → 判定（長さ 2*len(points)+1、該当なしは空文字）
+        nan_grade: 値が NaN の場合の判定（_check_range の比較がすべて偽になる挙動を再現）
+        gender: 性別限定の項目なら "M" / "F"、限定なしはNone
+    """
+
+    __slots__ = ('points', 'grades', 'nan_grade', 'gender', '_arrays')
+
+    def __init__(self, points: List[float], grades: List[str], nan_grade: str, gender: Optional[str]):
+        self.points = points
+        self.grades = grades
+        self.nan_grade = nan_grade
+        self.gender = gender
+        self._arrays = None
+
+    def grade(self, value: float, gender: Optional[str] = None) -> str:
+        """判定を返す（JudgmentEngine.judge と同じ結果）"""
+        if self.gender is not None and self.gender != gender:
+            return ""
+        if value != value:
+            return self.nan_grade
+        points = self.points
+        i = bisect_left(points, value)
+        if i < len(points) and points[i] == value:
+            return self.grades[2 * i + 1]
+        return self.grades[2 * i]
+
+    def grade_array(self, values: 'np.ndarray', gender: Optional[str] = None) -> 'np.ndarray':
+        """
+        float 配列をまとめて判定（np.searchsorted 版、要 numpy）
+
+        Args:
+            values: 検査値の配列（float64）
+            gender: 性別 ("M" or "F")
+
+        Returns:
+            判定の配列（dtype '<U1'、該当なしは空文字）
+        """
+        if self.gender is not None and self.gender != gender:
+            return np.full(len(values), "", dtype='<U1')
+
+        if self._arrays is None:
+            self._arrays = (np.asarray(self.points, dtype=np.float64),
+                            np.asarray(self.grades, dtype='<U1'))
+        points, grades = self._arrays
+
+        i = np.searchsorted(points, values, side='left')
+        exact = points[np.minimum(i, len(points) - 1)] == values if len(points) else False
+        result = grades[2 * i + exact]
+        result[np.isnan(values)] = self.nan_grade
+        return result
+
+
+class RuleTable:
+    """
+    決定表にできない判定基準（数値以外の境界値等）用の逐次評価版
+
+    DecisionTable と同じインターフェースで、従来の _check_range をそのまま実行する。
+    """
+
+    __slots__ = ('spec',)
+
+    def __init__(self, spec: Dict[str, Any]):
+        self.spec = spec
+
+    def grade(self, value: float, gender: Optional[str] = None) -> str:
+        return judge_rules(self.spec, value, gender)
+
+    def grade_array(self, values: 'np.ndarray', gender: Optional[str] = None) -> 'np.ndarray':
+        return np.array([judge_rules(self.spec, value, gender) for value in values.tolist()], dtype='<U1')
+
+
+def judge_rules(spec: Dict[str, Any], value: float, gender: Optional[str] = None) -> str:
+    """
+    判定基準を先頭グレードから順に評価（コンパイル前の基準そのものの解釈）
+
+    Args:
+        spec: 1項目分の判定基準 {gender?, A: {min, max, or}, B: ..., ...}
+        value: 検査値
+        gender: 性別 ("M" or "F")
+
+    Returns:
+        判定結果 ("A", "B", "C", "D") または空文字列
+    """
+    # 性別フィルタリング
+    if "gender" in spec and spec["gender"] != gender:
+        return ""
+
+    for grade in JUDGMENT_GRADES:
+        rule = spec.get(grade)
+        if rule is None:
+            continue
+        if check_range(value, rule):
+            return grade
+
+    return ""
+
+
+def check_range(value: float, rule: Dict) -> bool:
+    """
+    値が範囲内かチェック
+
+    Args:
+        value: 検査値
+        rule: 範囲ルール {min: float|None, max: float|None, or: {...}}
+
+    Returns:
+        範囲内ならTrue
+    """
+    min_val = rule.get("min")
+    max_val = rule.get("max")
+
+    in_main_range = True
+    if min_val is not None and value < min_val:
+        in_main_range = False
+    if max_val is not None and value > max_val:
+        in_main_range = False
+
+    if in_main_range and (min_val is not None or max_val is not None):
+        return True
+
+    # OR条件がある場合
+    if "or" in rule:
+        return check_range(value, rule["or"])
+
+    return False
+
+
+def compile_criteria(criteria: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    判定基準全体をコンパイル
+
+    Args:
+        criteria: 判定基準辞書 {項目キー: {A: {min, max}, B: {...}, ...}}
+
+    Returns:
+        項目キー → DecisionTable（コンパイルできない項目は RuleTable）
+    """
+    tables = {}
+    for key, spec in criteria.items():
+        if not isinstance(spec, dict):
+            continue
+        tables[key] = compile_spec(spec)
+    return tables
+
+
+def compile_spec(spec: Dict[str, Any]):
+    """1項目分の判定基準を DecisionTable に変換（できない場合は RuleTable）"""
+    rules = []
+    for grade in JUDGMENT_GRADES:
+        rule = spec.get(grade)
+        if rule is None:
+            continue
+        intervals = _rule_intervals(rule)
+        if intervals is None:
+            return RuleTable(spec)
+        rules.append((grade, intervals))
+
+    points = sorted({bound for _, intervals in rules for interval in intervals
+                     for bound in interval if bound is not None})
+
+    grades = []
+    for region in range(2 * len(points) + 1):
+        low, high = _region_bounds(points, region)
+        grades.append(next(
+            (grade for grade, intervals in rules
+             if any(_covers(interval, low, high) for interval in intervals)),
+            ""
+        ))
+
+    nan_grade = next((grade for grade, _ in rules if check_range(math.nan, spec[grade])), "")
+
+    return DecisionTable(points, grades, nan_grade, spec.get("gender"))
+
+
+def _rule_intervals(rule: Any) -> Optional[List[Interval]]:
+    """
+    範囲ルール（or の連鎖を含む）を閉区間のリストに展開
+
+    min/max の両方が None のルールは何にも一致しない（check_range と同じ）。
+    数値以外の境界値や辞書でないルールはNone（コンパイル不可）。
+    """
+    intervals = []
+    seen = set()
+    while rule is not None:
+        if not isinstance(rule, dict) or id(rule) in seen:
+            return None
+        seen.add(id(rule))
+
+        min_val = rule.get("min")
+        max_val = rule.get("max")
+        for bound in (min_val, max_val):
+            if bound is not None and (isinstance(bound, bool) or not isinstance(bound, (int, float))
+                                      or math.isnan(bound)):
+                return None
+        if min_val is not None or max_val is not None:
+            intervals.append((min_val, max_val))
+
+        rule = rule.get("or")
+    return intervals
+
+
+def _region_bounds(points: List[float], region: int) -> Tuple[Optional[float], Optional[float]]:
+    """区間番号 → (左端, 右端)。境界値そのものの区間は左端 == 右端、None は無限"""
+    i, is_point = divmod(region, 2)
+    if is_point:
+        return points[i], points[i]
+    low = points[i - 1] if i > 0 else None
+    high = points[i] if i < len(points) else None
+    return low, high
+
+
+def _covers(interval: Interval, low: Optional[float], high: Optional[float]) -> bool:
+    """閉区間 interval が区間 [low, high]（開区間の場合も端点は境界値）を含むか"""
+    min_val, max_val = interval
+    if min_val is not None and (low is None or low < min_val):
+        return False
+    if max_val is not None and (high is None or high > max_val):
+        return False
+    return True
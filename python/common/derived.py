@@ -0,0 +1,210 @@
+"""
+検査値からの推算項目（eGFR）
+
+検査機関がeGFRを報告しなかった患者について、クレアチニン・年齢・性別から
+推算値を補う。集団分は numpy で一括計算し、推算した結果には
+'derived': True を付けて転記・判定の入力で区別できるようにする。
+"""
+
+import math
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional, Iterable, Sequence
+
+from .constants import (
+    EGFR_CODE,
+    CREATININE_CODE,
+    EGFR_COEFFICIENT,
+    EGFR_CREATININE_EXPONENT,
+    EGFR_AGE_EXPONENT,
+    EGFR_FEMALE_FACTOR,
+    GENDER_TRANSFORMS,
+)
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+logger = logging.getLogger(__name__)
+
+# 生年月日・受診日の書式
+_DATE_FORMATS = ('%Y%m%d', '%Y-%m-%d', '%Y/%m/%d')
+
+
+def calculate_egfr(creatinine: float, age: float, gender: str) -> Optional[int]:
+    """
+    eGFRを計算（GAS calculateEgfr、日本人用GFR推算式）
+
+    eGFR = 194 × Cr^(-1.094) × Age^(-0.287)（女性は × 0.739）、四捨五入
+
+    Args:
+        creatinine: クレアチニン値（mg/dL）
+        age: 年齢
+        gender: 性別 ("M" or "F")
+
+    Returns:
+        eGFR、または計算できない値（0以下・欠測・NaN・性別不明）の場合None
+    """
+    if creatinine is None or age is None or not (creatinine > 0 and age > 0):
+        return None
+    if gender not in ('M', 'F'):
+        # 係数が性別で変わるため、不明な場合に男性として推算しない
+        return None
+    egfr = EGFR_COEFFICIENT * creatinine ** EGFR_CREATININE_EXPONENT * age ** EGFR_AGE_EXPONENT
+    if gender == 'F':
+        egfr *= EGFR_FEMALE_FACTOR
+    # JavaScript Math.round と同じ（0.5は切り上げ）
+    return math.floor(egfr + 0.5)
+
+
+def egfr_array(creatinine: 'np.ndarray', ages: 'np.ndarray', is_female: 'np.ndarray') -> 'np.ndarray':
+    """
+    eGFRを配列で一括計算（calculate_egfr の numpy 版）
+
+    Args:
+        creatinine: クレアチニン値の配列
+        ages: 年齢の配列
+        is_female: 女性なら True の配列
+
+    Returns:
+        eGFRの配列（float64、計算できない要素は NaN）
+    """
+    creatinine = np.asarray(creatinine, dtype=np.float64)
+    ages = np.asarray(ages, dtype=np.float64)
+    valid = (creatinine > 0) & (ages > 0)
+
+    egfr = np.full(len(creatinine), np.nan)
+    egfr[valid] = (EGFR_COEFFICIENT
+                   * np.power(creatinine[valid], EGFR_CREATININE_EXPONENT)
+                   * np.power(ages[valid], EGFR_AGE_EXPONENT))
+    egfr[valid & np.asarray(is_female, dtype=bool)] *= EGFR_FEMALE_FACTOR
+    return np.floor(egfr + 0.5)
+
+
+def patient_gender(patient_info: Dict) -> Optional[str]:
+    """
+    患者情報の性別を "M" / "F" に変換（BMLコード "1"/"2"、"M"/"F"、"男"/"女"）
+
+    Returns:
+        "M" / "F"、または空欄・不明なコードの場合None
+    """
+    gender = str(patient_info.get('gender') or '').strip()
+    return {'男': 'M', '女': 'F'}.get(GENDER_TRANSFORMS.get(gender, gender))
+
+
+def patient_age(patient_info: Dict) -> Optional[float]:
+    """
+    患者情報から年齢を取得（'age'、なければ 'birthdate' と 'exam_date' から計算）
+
+    Returns:
+        年齢、または不明な場合None
+    """
+    age = patient_info.get('age')
+    if age not in (None, ''):
+        try:
+            return float(age)
+        except (ValueError, TypeError):
+            return None
+
+    birthdate = _parse_date(patient_info.get('birthdate'))
+    if birthdate is None:
+        return None
+    exam_date = _parse_date(patient_info.get('exam_date') or patient_info.get('examDate')) or datetime.now()
+    years = exam_date.year - birthdate.year
+    if (exam_date.month, exam_date.day) < (birthdate.month, birthdate.day):
+        years -= 1
+    return float(years)
+
+
+def derive_egfr(records: Iterable[Dict], ages: Optional[Sequence[Optional[float]]] = None) -> int:
+    """
+    eGFRが報告されていない患者に推算値を追加（一括計算）
+
+    クレアチニンが数値で、年齢・性別が分かる患者のみ対象
+    （性別が空欄・不明なコードの患者は推算しない）。追加する結果は
+    parse() の test_results と同じ形式に 'derived': True を付けたもの。
+    numpy がない場合は1件ずつ計算する（結果は同じ）。
+
+    Args:
+        records: parse() 形式の患者リスト（test_results に追記する）
+        ages: 患者ごとの年齢（省略時は patient_age(patient_info)）
+
+    Returns:
+        推算値を追加した患者数
+    """
+    targets: List[Dict] = []
+    creatinine: List[float] = []
+    target_ages: List[float] = []
+    is_female: List[bool] = []
+
+    for i, record in enumerate(records):
+        test_results = record['test_results']
+        if any((r.get('code') or r.get('item_code')) == EGFR_CODE for r in test_results):
+            continue
+        value = next((v for v in (_numeric(r) for r in test_results
+                                               if (r.get('code') or r.get('item_code')) == CREATININE_CODE)
+                      if v is not None), None)
+        age = ages[i] if ages is not None else patient_age(record['patient_info'])
+        if value is None or age is None:
+            continue
+
+        gender = patient_gender(record['patient_info'])
+        if gender is None:
+            logger.info(f"  eGFR推算なし（性別不明: {record['patient_info'].get('gender')!r}, "
+                        f"request_id={record['patient_info'].get('request_id')}）")
+            continue
+        targets.append(record)
+        creatinine.append(value)
+        target_ages.append(age)
+        is_female.append(gender == 'F')
+
+    if not targets:
+        return 0
+
+    if np is not None:
+        egfr_values = egfr_array(creatinine, target_ages, is_female).tolist()
+    else:
+        egfr_values = [
+            calculate_egfr(cr, age, 'F' if female else 'M')
+            for cr, age, female in zip(creatinine, target_ages, is_female)
+        ]
+
+    added = 0
+    for record, egfr in zip(targets, egfr_values):
+        if egfr is None or egfr != egfr:
+            continue
+        record['test_results'].append({
+            'code': EGFR_CODE,
+            'value': str(int(egfr)),
+            'flag': '',
+            'comment': '',
+            'numeric': float(egfr),
+            'qualifier': '',
+            'qualitative': '',
+            'derived': True,
+        })
+        added += 1
+    return added
+
+
+def _numeric(result: Dict) -> Optional[float]:
+    """検査結果の数値（解析時に正規化済みならそれを使う、JSON直接データは値を変換）"""
+    if 'numeric' in result:
+        return result['numeric']
+    try:
+        value = float(result.get('value'))
+    except (ValueError, TypeError):
+        return None
+    return None if value != value else value
+
+
+def _parse_date(value) -> Optional[datetime]:
+    if not value:
+        return None
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(str(value)[:10], fmt)
+        except ValueError:
+            continue
+    return None
@@ -2,17 +2,50 @@
 判定ロジックエンジン（人間ドック学会2025年度基準）
 """
 
-from typing import Dict, Any, Optional
+import logging
+from bisect import bisect_right
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, Any, Optional, List, Tuple, Iterable
 
 from .constants import (
     CODE_TO_CRITERIA,
     GENDER_DEPENDENT_CODES,
+    GENDER_CODE_TO_INTERNAL,
     FLAG_HIGH,
     FLAG_LOW,
-    JUDGMENT_GRADES,
     DEFAULT_JUDGMENT_NORMAL,
     DEFAULT_JUDGMENT_ABNORMAL,
+    JUDGMENT_MEMO_MAX_ENTRIES,
+    JUDGMENT_GRADES,
+    JUDGMENT_WEIGHT,
+    JUDGMENT_LABELS,
+    FBS_CODE,
+    HBA1C_CODE,
+    FBS_RANK_BREAKS,
+    HBA1C_RANK_BREAKS,
+    GLUCOSE_MATRIX,
+    BP_SYSTOLIC_KEY,
+    BP_DIASTOLIC_KEY,
+    CODE_TO_CATEGORY,
+    CATEGORY_GLUCOSE,
+    CATEGORY_BLOOD_PRESSURE,
+    CATEGORY_OTHER,
+    QUALITATIVE_JUDGMENT,
 )
+from .batch import ParsedBatch, DECIMALS_TEXT
+from .decision_table import compile_criteria
+from .normalize import normalize_value
+from .criteria_snapshot import criteria_version
+
+if TYPE_CHECKING:
+    from .criteria_snapshot import CriteriaSnapshot
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+logger = logging.getLogger(__name__)
 
 
 class JudgmentEngine:
@@ -22,17 +55,165 @@ class JudgmentEngine:
     判定基準は人間ドック学会2025年度基準に基づく
     """
 
-    def __init__(self, criteria: Dict[str, Any]):
+    def __init__(self, criteria: Dict[str, Any], memo_size: int = 0):
         """
         Args:
             criteria: 判定基準辞書 {項目キー: {A: {min, max}, B: {...}, ...}}
+            memo_size: judge_by_code の結果を保持する件数（0ならメモ化しない）
+        """
+        self._memo = None
+        self._memo_base = {'hits': 0, 'misses': 0, 'evictions': 0}
+        self.snapshot = None
+        self._codegen_dir = None
+        self.load_criteria(criteria)
+        if memo_size > 0:
+            self.enable_memo(memo_size)
+
+    def load_criteria(self, criteria: Dict[str, Any]):
+        """
+        判定基準を設定し、決定表にコンパイル
+
+        criteria を直接書き換えた場合も、このメソッドで再設定すること。
+
+        Args:
+            criteria: 判定基準辞書 {項目キー: {A: {min, max}, B: {...}, ...}}
+        """
+        self._set_tables(criteria, compile_criteria(criteria), None)
+
+    @classmethod
+    def from_snapshot(cls, snapshot: 'CriteriaSnapshot', memo_size: int = 0) -> 'JudgmentEngine':
+        """
+        コンパイル済みの判定基準スナップショットからエンジンを作成（再コンパイルしない）
+
+        Args:
+            snapshot: CriteriaSnapshot
+            memo_size: judge_by_code の結果を保持する件数（0ならメモ化しない）
+        """
+        engine = cls({}, memo_size)
+        engine.load_snapshot(snapshot)
+        return engine
+
+    def load_snapshot(self, snapshot: 'CriteriaSnapshot'):
+        """
+        判定基準スナップショットに切り替え（同じ版なら何もしない）
+
+        Args:
+            snapshot: CriteriaSnapshot（決定表は他のエンジンと共有する）
+        """
+        if self.snapshot is not None and self.snapshot.version == snapshot.version:
+            return
+        self._set_tables(snapshot.criteria, snapshot.tables, snapshot)
+
+    @property
+    def criteria_version(self) -> Optional[str]:
+        """判定基準の版ID（スナップショットから読み込んだ場合のみ）"""
+        return self.snapshot.version if self.snapshot is not None else None
+
+    def enable_codegen(self, cache_dir: Optional[str] = None):
         """
+        生成コード版の判定に切り替える（common.codegen）
+
+        判定基準の版IDごとに比較を直列に並べたモジュールを生成してディスクに保存し、
+        以降は import するだけで使う。判定基準を再設定すると新しい版で作り直す。
+
+        Args:
+            cache_dir: 生成モジュールの保存先（省略時は python/.criteria_cache）
+
+        Raises:
+            OSError: 保存先に書き込めない場合
+        """
+        from .codegen import DEFAULT_CACHE_DIR
+        self._codegen_dir = cache_dir or DEFAULT_CACHE_DIR
+        self._tables = self._generated_tables(self._tables)
+        self._code_tables = {}
+
+    def disable_codegen(self):
+        """決定表（bisect）での判定に戻す"""
+        self._codegen_dir = None
+        self._tables = {key: getattr(table, 'table', table) for key, table in self._tables.items()}
+        self._code_tables = {}
+
+    def _generated_tables(self, tables: Dict[str, Any]) -> Dict[str, Any]:
+        from .codegen import load_generated_tables
+        tables = {key: getattr(table, 'table', table) for key, table in tables.items()}
+        version = self.snapshot.version if self.snapshot is not None else criteria_version(self.criteria)
+        return load_generated_tables(tables, version, self._codegen_dir)
+
+    def _set_tables(self, criteria: Dict[str, Any], tables: Dict[str, Any], snapshot):
         self.criteria = criteria
+        self.snapshot = snapshot
+        self._tables = tables
+        if self._codegen_dir is not None:
+            try:
+                self._tables = self._generated_tables(tables)
+            except OSError as e:
+                logger.warning(f"⚠️ 判定モジュールを生成できません、決定表で判定: {e}")
+        # (検査コード, 性別) → 判定表（判定基準のない組み合わせはNone）
+        self._code_tables: Dict[Tuple[str, Optional[str]], Any] = {}
+        # 旧基準での判定結果は使わない
+        if self._memo is not None:
+            self._clear_memo()
+
+    def enable_memo(self, max_entries: int = JUDGMENT_MEMO_MAX_ENTRIES):
+        """
+        judge_by_code のメモ化を有効にする（LRU）
+
+        同じ (検査コード, 値文字列, フラグ, 性別) は集団内で頻繁に繰り返すため、
+        float() 変換・判定基準キーの解決・範囲判定を省略する。
+        判定基準を load_criteria() / load_snapshot() で再設定すると自動的に破棄される。
+
+        Args:
+            max_entries: 保持する件数の上限
+        """
+        if self._memo is not None:
+            self._clear_memo()
+        self._memo = lru_cache(maxsize=max_entries)(self._judge_value)
+
+    def disable_memo(self):
+        """メモ化を無効にする（統計は保持）"""
+        if self._memo is not None:
+            self._clear_memo()
+        self._memo = None
+
+    def memo_stats(self) -> Dict:
+        """メモのヒット/ミス統計（有効化以降の累計）"""
+        hits = self._memo_base['hits']
+        misses = self._memo_base['misses']
+        evictions = self._memo_base['evictions']
+        entries = 0
+        max_entries = 0
+        if self._memo is not None:
+            info = self._memo.cache_info()
+            hits += info.hits
+            misses += info.misses
+            evictions += info.misses - info.currsize
+            entries = info.currsize
+            max_entries = info.maxsize
+
+        total = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'evictions': evictions,
+            'entries': entries,
+            'max_entries': max_entries,
+            'hit_rate': hits / total if total else 0.0,
+        }
+
+    def _clear_memo(self):
+        """メモを破棄（統計は累計に繰り入れる）"""
+        info = self._memo.cache_info()
+        self._memo_base['hits'] += info.hits
+        self._memo_base['misses'] += info.misses
+        self._memo_base['evictions'] += info.misses - info.currsize
+        self._memo.cache_clear()
 
     def judge(self, item_key: str, value: float, gender: Optional[str] = None) -> str:
         """
         検査値から判定を返す
 
+        コンパイル済みの決定表で、境界値の二分探索1回で判定する。
+
         Args:
             item_key: 判定基準キー
             value: 検査値（数値）
@@ -41,24 +222,10 @@ class JudgmentEngine:
         Returns:
             判定結果 ("A", "B", "C", "D") または空文字列
         """
-        if item_key not in self.criteria:
-            return ""
-
-        spec = self.criteria[item_key]
-
-        # 性別フィルタリング
-        if "gender" in spec and spec["gender"] != gender:
+        table = self._tables.get(item_key)
+        if table is None:
             return ""
-
-        # 各グレードをチェック
-        for grade in JUDGMENT_GRADES:
-            rule = spec.get(grade)
-            if rule is None:
-                continue
-            if self._check_range(value, rule):
-                return grade
-
-        return ""
+        return table.grade(value, gender)
 
     def judge_by_code(
         self,
@@ -79,23 +246,426 @@ class JudgmentEngine:
         Returns:
             判定結果 ("A", "B", "C", "D") または空文字列
         """
+        memo = self._memo
+        if memo is None:
+            return self._judge_value(code, value_str, flag, gender)
+
+        try:
+            return memo(code, value_str, flag, gender)
+        except TypeError:
+            # ハッシュできない値はメモ化しない
+            return self._judge_value(code, value_str, flag, gender)
+
+    def _judge_value(self, code: str, value_str: str, flag: str, gender: str) -> str:
+        """値文字列を数値化して判定（judge_by_code のメモ化しない処理）"""
         # 数値変換
         try:
             numeric_value = float(value_str)
         except (ValueError, TypeError):
+            # 定性結果・打ち切り値は解析時と同じ正規化で判定
+            if not isinstance(value_str, str):
+                return ""
+            numeric_value, _, qualitative = normalize_value(value_str.strip(), code)
+            if numeric_value is None:
+                return QUALITATIVE_JUDGMENT.get(qualitative, "")
+
+        return self._judge_numeric(code, numeric_value, flag, gender)
+
+    def judge_result(self, result: Dict, gender: str) -> str:
+        """
+        解析済みの検査結果辞書から判定を返す
+
+        解析時に正規化済みの数値（result['numeric']）があれば float() を再実行しない。
+        打ち切り値（"<0.1" 等）は境界値で、定性結果は QUALITATIVE_JUDGMENT で判定する。
+        'numeric' を持たない辞書（GASからのJSON等）は judge_by_code と同じ。
+
+        Args:
+            result: {'code', 'value', 'flag', ...}
+            gender: 性別 ("M" or "F")
+
+        Returns:
+            判定結果 ("A", "B", "C", "D") または空文字列
+        """
+        code = result.get('code') or result.get('item_code')
+        flag = result.get('flag', '')
+
+        if 'numeric' not in result:
+            return self.judge_by_code(code, result.get('value'), flag, gender)
+
+        numeric_value = result['numeric']
+        if numeric_value is None:
+            return QUALITATIVE_JUDGMENT.get(result.get('qualitative'), "")
+
+        return self._judge_numeric(code, numeric_value, flag, gender)
+
+    def judge_batch(self, batch: ParsedBatch) -> List[str]:
+        """
+        ParsedBatch の全検査値を判定
+
+        値は解析時に正規化済みのため float() を再実行しない（judge_result と同じ結果）。
+        性別は患者情報の性別コードから取得（不明時は "M"）。
+
+        Args:
+            batch: BMLResultParser.parse_batch() の結果
+
+        Returns:
+            行ごとの判定結果リスト（batch.values と同じ並び）
+        """
+        grades = [""] * batch.value_count
+        codes = batch.codes
+        flags = batch.flags
+        code_ids = batch.code_ids
+        flag_ids = batch.flag_ids
+        values = batch.values
+        decimals = batch.decimals
+        offsets = batch.offsets
+
+        for row, qualitative in batch.qualitatives.items():
+            grades[row] = QUALITATIVE_JUDGMENT.get(qualitative, "")
+
+        for i, gender_code in enumerate(batch.patient_columns['gender']):
+            gender = GENDER_CODE_TO_INTERNAL.get(gender_code, 'M')
+            for row in range(offsets[i], offsets[i + 1]):
+                if decimals[row] == DECIMALS_TEXT:
+                    continue
+                grades[row] = self._judge_numeric(
+                    codes[code_ids[row]], values[row], flags[flag_ids[row]], gender
+                )
+
+        return grades
+
+    def judge_many(self, codes, values, flags, genders, qualitatives=None) -> 'np.ndarray':
+        """
+        検査値の配列をまとめて判定（要 numpy）
+
+        (検査コード, 性別) の組み合わせごとに判定基準キーを1回だけ解決し、
+        組ごとにコンパイル済みの境界値を np.searchsorted で引く。
+        判定基準がない・範囲外の値はフラグ（H/L → C、それ以外 → A）をマスクで適用する。
+        各要素の結果は judge_result(..., gender) と同じ。
+
+        Args:
+            codes: BML検査コードの配列
+            values: 検査値の配列（float、数値化できない値は NaN）
+            flags: フラグの配列 (H/L/空)
+            genders: 性別の配列 ("M" or "F")、または全件共通の性別文字列
+            qualitatives: 定性区分の配列（"(-)" 等、該当しない要素は空文字）。
+                          指定時は NaN の要素を QUALITATIVE_JUDGMENT で判定する
+
+        Returns:
+            判定の配列（dtype '<U1'、判定できない NaN の値は空文字）
+
+        Raises:
+            ImportError: numpy がインストールされていない場合
+            ValueError: 配列の長さが揃っていない場合
+        """
+        if np is None:
+            raise ImportError("judge_many には numpy が必要です（pip install numpy）")
+
+        codes = np.asarray(codes, dtype=str)
+        values = np.asarray(values, dtype=np.float64)
+        flags = np.asarray(flags, dtype=str)
+        if isinstance(genders, str):
+            genders = np.full(len(codes), genders)
+        genders = np.asarray(genders, dtype=str)
+        if not len(codes) == len(values) == len(flags) == len(genders):
+            raise ValueError("codes / values / flags / genders の長さが一致しません")
+
+        grades = np.full(len(codes), "", dtype='<U1')
+        if not len(codes):
+            return grades
+
+        # (検査コード, 性別) の組み合わせ番号を振り、判定表のある組だけ処理
+        unique_codes, code_ids = _factorize(codes)
+        unique_genders, gender_ids = _factorize(genders)
+        pair_ids = code_ids * len(unique_genders) + gender_ids
+
+        for pair_id in np.flatnonzero(np.bincount(pair_ids)).tolist():
+            code, gender = divmod(pair_id, len(unique_genders))
+            code, gender = unique_codes[code], unique_genders[gender]
+            try:
+                table = self._code_tables[(code, gender)]
+            except KeyError:
+                table = self._resolve_table(code, gender)
+            if table is not None:
+                rows = np.flatnonzero(pair_ids == pair_id)
+                grades[rows] = table.grade_array(values[rows], gender)
+
+        # 判定できなかった数値はフラグから推定、数値化できない値は判定なし
+        missing = np.isnan(values)
+        fallback = (grades == "") & ~missing
+        abnormal = (flags == FLAG_HIGH) | (flags == FLAG_LOW)
+        grades[fallback & abnormal] = DEFAULT_JUDGMENT_ABNORMAL
+        grades[fallback & ~abnormal] = DEFAULT_JUDGMENT_NORMAL
+        grades[missing] = ""
+
+        if qualitatives is not None:
+            qualitatives = np.asarray(qualitatives, dtype=str)
+            for qualitative, grade in QUALITATIVE_JUDGMENT.items():
+                grades[missing & (qualitatives == qualitative)] = grade
+
+        return grades
+
+    # ------------------------------------------------------------
+    # 組合せ判定・総合判定（GAS judgmentEngine.js の移植）
+    # ------------------------------------------------------------
+
+    def judge_glucose(self, fbs: Optional[float], hba1c: Optional[float]) -> str:
+        """
+        空腹時血糖 + HbA1c の組合せ判定（GAS getGlucoseHbA1cJudgment）
+
+        両方ある場合は GLUCOSE_MATRIX、片方のみの場合はその項目の判定基準で判定する。
+
+        Args:
+            fbs: 空腹時血糖（None / NaN は欠測）
+            hba1c: HbA1c（None / NaN は欠測）
+
+        Returns:
+            判定結果 ("A", "B", "C", "D") または空文字列（両方欠測・判定基準なし）
+        """
+        fbs_missing = fbs is None or fbs != fbs
+        hba1c_missing = hba1c is None or hba1c != hba1c
+        if fbs_missing and hba1c_missing:
             return ""
+        if fbs_missing:
+            return self._grade_code(HBA1C_CODE, hba1c, None)
+        if hba1c_missing:
+            return self._grade_code(FBS_CODE, fbs, None)
 
-        # 判定基準キーを取得
-        criteria_key = self._get_criteria_key(code, gender)
+        fbs_rank = bisect_right(FBS_RANK_BREAKS, fbs)
+        hba1c_rank = bisect_right(HBA1C_RANK_BREAKS, hba1c)
+        return GLUCOSE_MATRIX[hba1c_rank][fbs_rank]
+
+    def judge_blood_pressure(self, systolic: Optional[float], diastolic: Optional[float]) -> str:
+        """
+        血圧の組合せ判定（GAS getBloodPressureJudgment、収縮期・拡張期の悪い方）
+
+        Args:
+            systolic: 収縮期血圧
+            diastolic: 拡張期血圧
+
+        Returns:
+            判定結果、または空文字列（判定基準 BP_SYSTOLIC / BP_DIASTOLIC がない場合）
+        """
+        systolic_grade = self._grade_key(BP_SYSTOLIC_KEY, systolic)
+        diastolic_grade = self._grade_key(BP_DIASTOLIC_KEY, diastolic)
+        if not systolic_grade:
+            return diastolic_grade
+        if not diastolic_grade:
+            return systolic_grade
+        return worse_judgment(systolic_grade, diastolic_grade)
+
+    def judge_overall(
+        self,
+        test_results: List[Dict],
+        gender: str,
+        vitals: Optional[Dict[str, float]] = None
+    ) -> Dict:
+        """
+        1患者の総合判定（GAS calculateOverallJudgmentDetailed）
+
+        判定基準のある項目だけを対象に最も悪い判定を総合判定とする
+        （フラグからの推定判定は含めない）。空腹時血糖・HbA1c は組合せ判定、
+        血圧は vitals に収縮期・拡張期の両方がある場合のみ組合せ判定する。
+        同じ検査コードが複数ある場合は後の値を使う。推算値（'derived': True の結果）から
+        判定した項目は details に 'derived': True を付ける。
+
+        Args:
+            test_results: BMLResultParser の test_results 形式のリスト
+            gender: 性別 ("M" or "F")
+            vitals: 血圧等 {'BP_SYSTOLIC': 値, 'BP_DIASTOLIC': 値}（_1 付きキーも可）
+
+        Returns:
+            {
+                'judgment': 総合判定,
+                'label': 判定ラベル,
+                'categories': {カテゴリ: そのカテゴリで最も悪い判定},
+                'details': [{'item', 'code', 'category', 'value', 'judgment'[, 'derived']}, ...],
+                'worst_items': 総合判定と同じ判定の details,
+                'summary': {'total_items', 'counts', 'worst_judgment'}
+            }
+        """
+        values = {}
+        derived = set()
+        for result in test_results:
+            value = _numeric_of(result)
+            if value is not None:
+                code = result.get('code') or result.get('item_code')
+                values[code] = value
+                if result.get('derived'):
+                    derived.add(code)
+                else:
+                    derived.discard(code)
+        return self._overall(values, gender, vitals, derived)
+
+    def judge_overall_many(self, records: Iterable[Dict]) -> List[Dict]:
+        """
+        集団全体の総合判定を一括計算
+
+        Args:
+            records: parse() の結果リスト、または ParsedBatch
+                     （リストの各要素に 'vitals' があれば血圧判定に使用、
+                      ParsedBatch は配列から直接計算し血圧は対象外）
 
-        if criteria_key:
-            result = self.judge(criteria_key, numeric_value, gender)
+        Returns:
+            患者ごとの judge_overall() の結果（'request_id' を追加）
+        """
+        if isinstance(records, ParsedBatch):
+            return self._overall_batch(records)
+
+        overall = []
+        for record in records:
+            patient_info = record['patient_info']
+            gender = GENDER_CODE_TO_INTERNAL.get(patient_info.get('gender', ''), 'M')
+            result = self.judge_overall(record['test_results'], gender, record.get('vitals'))
+            result['request_id'] = patient_info.get('request_id', '')
+            overall.append(result)
+        return overall
+
+    def _overall_batch(self, batch: ParsedBatch) -> List[Dict]:
+        """ParsedBatch の配列から直接、患者ごとの総合判定を計算（辞書ビューを作らない）"""
+        codes = batch.codes
+        code_ids = batch.code_ids
+        values = batch.values
+        offsets = batch.offsets
+        request_ids = batch.patient_columns['request_id']
+
+        overall = []
+        for i, gender_code in enumerate(batch.patient_columns['gender']):
+            patient_values = {}
+            for row in range(offsets[i], offsets[i + 1]):
+                value = values[row]
+                if value == value:
+                    patient_values[codes[code_ids[row]]] = value
+            result = self._overall(patient_values, GENDER_CODE_TO_INTERNAL.get(gender_code, 'M'), None)
+            result['request_id'] = request_ids[i]
+            overall.append(result)
+        return overall
+
+    def _overall(
+        self,
+        values: Dict[str, float],
+        gender: str,
+        vitals: Optional[Dict[str, float]],
+        derived: Iterable[str] = ()
+    ) -> Dict:
+        """検査コード → 数値 から総合判定を組み立てる（derived の項目は details に 'derived': True）"""
+        details = []
+
+        # 空腹時血糖 + HbA1c
+        fbs = values.get(FBS_CODE)
+        hba1c = values.get(HBA1C_CODE)
+        glucose = self.judge_glucose(fbs, hba1c)
+        if glucose:
+            details.append({
+                'item': 'GLUCOSE_COMBINED',
+                'code': None,
+                'category': CATEGORY_GLUCOSE,
+                'value': f"FBS:{_format_value(fbs)}, HbA1c:{_format_value(hba1c)}",
+                'judgment': glucose,
+            })
+
+        # 血圧
+        if vitals:
+            systolic = vitals.get('BP_SYSTOLIC_1') or vitals.get(BP_SYSTOLIC_KEY)
+            diastolic = vitals.get('BP_DIASTOLIC_1') or vitals.get(BP_DIASTOLIC_KEY)
+            if systolic is not None and diastolic is not None:
+                blood_pressure = self.judge_blood_pressure(systolic, diastolic)
+                if blood_pressure:
+                    details.append({
+                        'item': 'BP_COMBINED',
+                        'code': None,
+                        'category': CATEGORY_BLOOD_PRESSURE,
+                        'value': f"{_format_value(systolic)}/{_format_value(diastolic)}",
+                        'judgment': blood_pressure,
+                    })
+
+        # その他の項目
+        for code, value in values.items():
+            if code == FBS_CODE or code == HBA1C_CODE:
+                continue
+            grade = self._grade_code(code, value, gender)
+            if grade:
+                details.append({
+                    'item': self._get_criteria_key(code, gender),
+                    'code': code,
+                    'category': CODE_TO_CATEGORY.get(code, CATEGORY_OTHER),
+                    'value': value,
+                    'judgment': grade,
+                })
+                if code in derived:
+                    details[-1]['derived'] = True
+
+        worst = DEFAULT_JUDGMENT_NORMAL
+        categories: Dict[str, str] = {}
+        counts = {grade: 0 for grade in JUDGMENT_GRADES}
+        for detail in details:
+            grade = detail['judgment']
+            if _is_worse(grade, worst):
+                worst = grade
+            category = detail['category']
+            if category not in categories or _is_worse(grade, categories[category]):
+                categories[category] = grade
+            if grade in counts:
+                counts[grade] += 1
+
+        return {
+            'judgment': worst,
+            'label': JUDGMENT_LABELS.get(worst, worst),
+            'categories': categories,
+            'details': details,
+            'worst_items': [detail for detail in details if detail['judgment'] == worst],
+            'summary': {
+                'total_items': len(details),
+                'counts': counts,
+                'worst_judgment': worst,
+            },
+        }
+
+    def _grade_code(self, code: str, value: Optional[float], gender: Optional[str]) -> str:
+        """検査コードの判定基準だけで判定（フラグ推定なし、欠測・基準なしは空文字）"""
+        if value is None or value != value:
+            return ""
+        try:
+            table = self._code_tables[(code, gender)]
+        except KeyError:
+            table = self._resolve_table(code, gender)
+        if table is None:
+            return ""
+        return table.grade(value, gender)
+
+    def _grade_key(self, item_key: str, value: Optional[float]) -> str:
+        """判定基準キーで判定（値は数値・数値文字列、欠測・基準なしは空文字）"""
+        try:
+            value = float(value)
+        except (ValueError, TypeError):
+            return ""
+        if value != value:
+            return ""
+        return self.judge(item_key, value, None)
+
+    def _judge_numeric(self, code: str, numeric_value: float, flag: str, gender: str) -> str:
+        """数値化済みの検査値から判定（judge_by_code の数値変換後の処理）"""
+        # 検査コード → 判定表（判定基準キーの解決は組み合わせごとに1回）
+        try:
+            table = self._code_tables[(code, gender)]
+        except KeyError:
+            table = self._resolve_table(code, gender)
+
+        if table is not None:
+            result = table.grade(numeric_value, gender)
             if result:
                 return result
 
         # 判定基準がない場合はフラグから推定
         return self._judge_by_flag(flag)
 
+    def _resolve_table(self, code: str, gender: str):
+        """(検査コード, 性別) の判定表を引いて記憶"""
+        criteria_key = self._get_criteria_key(code, gender)
+        table = self._tables.get(criteria_key) if criteria_key else None
+        self._code_tables[(code, gender)] = table
+        return table
+
     def _get_criteria_key(self, code: str, gender: str) -> Optional[str]:
         """検査コードから判定基準キーを取得"""
         base_key = CODE_TO_CRITERIA.get(code)
@@ -115,31 +685,61 @@ class JudgmentEngine:
             return DEFAULT_JUDGMENT_ABNORMAL
         return DEFAULT_JUDGMENT_NORMAL
 
-    def _check_range(self, value: float, rule: Dict) -> bool:
-        """
-        値が範囲内かチェック
 
-        Args:
-            value: 検査値
-            rule: 範囲ルール {min: float|None, max: float|None, or: {...}}
+def _factorize(strings: 'np.ndarray') -> Tuple[List[str], 'np.ndarray']:
+    """
+    文字列配列を (一意な値のリスト, 各要素の番号) に変換
 
-        Returns:
-            範囲内ならTrue
-        """
-        min_val = rule.get("min")
-        max_val = rule.get("max")
+    短いASCII文字列（検査コード・性別）は1文字7bitで int64 に詰めてから一意化する
+    （文字列のまま np.unique でソートするより速い）。
+    """
+    strings = np.ascontiguousarray(strings)
+    width = strings.dtype.itemsize // 4
+    if 0 < width <= 9:
+        chars = strings.view(np.uint32).reshape(-1, width)
+        if chars.max(initial=0) < 128:
+            keys = np.zeros(len(strings), dtype=np.int64)
+            for j in range(width):
+                keys = keys * 128 + chars[:, j]
+            _, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+            return strings[first].tolist(), inverse.reshape(-1)
+
+    uniques, inverse = np.unique(strings, return_inverse=True)
+    return uniques.tolist(), inverse.reshape(-1)
+
+
+def judge_qualitative(value: Optional[str]) -> str:
+    """定性結果の判定（GAS getQualitativeJudgment、該当なしは空文字）"""
+    if not value:
+        return ""
+    return QUALITATIVE_JUDGMENT.get(str(value).strip(), "")
+
+
+def worse_judgment(j1: str, j2: str) -> str:
+    """2つの判定の悪い方（同じ重みなら j1、GAS getWorseJudgment と同じ）"""
+    return j1 if JUDGMENT_WEIGHT.get(j1, 0) >= JUDGMENT_WEIGHT.get(j2, 0) else j2
+
+
+def _is_worse(j1: str, j2: str) -> bool:
+    """j1 が j2 より悪いか（GAS isWorse と同じ）"""
+    return JUDGMENT_WEIGHT.get(j1, 0) > JUDGMENT_WEIGHT.get(j2, 0)
 
-        in_main_range = True
-        if min_val is not None and value < min_val:
-            in_main_range = False
-        if max_val is not None and value > max_val:
-            in_main_range = False
 
-        if in_main_range and (min_val is not None or max_val is not None):
-            return True
+def _numeric_of(result: Dict) -> Optional[float]:
+    """検査結果辞書の数値（解析時に正規化済みならそれを使う）"""
+    if 'numeric' in result:
+        return result['numeric']
+    try:
+        value = float(result.get('value'))
+    except (ValueError, TypeError):
+        return None
+    return None if value != value else value
 
-        # OR条件がある場合
-        if "or" in rule:
-            return self._check_range(value, rule["or"])
 
-        return False
+def _format_value(value: Optional[float]) -> str:
+    """組合せ判定の表示用（整数値は小数点なし）"""
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
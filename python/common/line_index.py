@@ -0,0 +1,149 @@
+"""
+BML CSV 行オフセットインデックス
+
+依頼ID → (バイトオフセット, バイト長) の対応表をCSVの横にサイドカーとして保存し、
+同じCSVから1患者だけ取り出す場合に全体を再解析せずシークで読めるようにする。
+インデックスはファイルサイズと更新時刻(ns)で有効性を判定する。
+"""
+
+import os
+import json
+import mmap
+import logging
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from .constants import LINE_INDEX_SUFFIX, LINE_INDEX_VERSION
+
+logger = logging.getLogger(__name__)
+
+
+class LineIndex:
+    """
+    BML CSVの行オフセットインデックス
+
+    Attributes:
+        size: 作成時のファイルサイズ
+        mtime_ns: 作成時の更新時刻(ns)
+        encoding: 作成時に推定したエンコーディング
+        offsets: 依頼ID → (オフセット, 長さ)
+    """
+
+    def __init__(self, size: int, mtime_ns: int, encoding: str, offsets: Dict[str, Tuple[int, int]]):
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.encoding = encoding
+        self.offsets = offsets
+
+    @staticmethod
+    def sidecar_path(csv_path: Path) -> Path:
+        """サイドカーファイルのパス（<CSV名>.idx.json）"""
+        csv_path = Path(csv_path)
+        return csv_path.with_name(csv_path.name + LINE_INDEX_SUFFIX)
+
+    def matches(self, stat: os.stat_result) -> bool:
+        """CSVが作成時から変更されていないか"""
+        return self.size == stat.st_size and self.mtime_ns == stat.st_mtime_ns
+
+    @classmethod
+    def build(cls, csv_path: Path, encoding: str) -> 'LineIndex':
+        """
+        CSVをmmapして行オフセットを収集
+
+        依頼IDは2列目。ASCIIのカンマはShift_JIS/UTF-8のマルチバイト文字の
+        一部にならないため、デコードせずバイト列のまま切り出せる。
+        引用符内の改行はレコードの区切りとみなさない（引用符の数が奇数の行は、
+        偶数になるまで後続行と合わせて1レコードとする。_join_quoted と同じ規則）。
+        同じ依頼IDが複数行ある場合は先頭の行を採用する。
+        """
+        csv_path = Path(csv_path)
+        stat = csv_path.stat()
+        offsets: Dict[str, Tuple[int, int]] = {}
+
+        if stat.st_size > 0:
+            with open(csv_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                quoted = mm.find(b'"') != -1
+                pos = 0
+                end = len(mm)
+                while pos < end:
+                    line_start = pos
+                    in_quotes = False
+                    while True:
+                        nl = mm.find(b'\n', line_start)
+                        line_end = end if nl == -1 else nl
+                        if quoted and mm[line_start:line_end].count(b'"') % 2:
+                            in_quotes = not in_quotes
+                        if not in_quotes or nl == -1:
+                            break
+                        line_start = nl + 1
+                    length = line_end - pos
+
+                    first = mm.find(b',', pos, line_end)
+                    if first != -1:
+                        second = mm.find(b',', first + 1, line_end)
+                        if second != -1:
+                            request_id = mm[first + 1:second].decode('ascii', 'replace').strip()
+                            if request_id and request_id not in offsets:
+                                offsets[request_id] = (pos, length)
+
+                    pos = line_end + 1
+
+        return cls(stat.st_size, stat.st_mtime_ns, encoding, offsets)
+
+    @classmethod
+    def load(cls, csv_path: Path) -> Optional['LineIndex']:
+        """サイドカーを読み込み（存在しない・古い・壊れている場合はNone）"""
+        sidecar = cls.sidecar_path(csv_path)
+        try:
+            with open(sidecar, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') != LINE_INDEX_VERSION:
+                return None
+            index = cls(
+                data['size'],
+                data['mtime_ns'],
+                data['encoding'],
+                {k: (v[0], v[1]) for k, v in data['offsets'].items()},
+            )
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+        if not index.matches(Path(csv_path).stat()):
+            return None
+        return index
+
+    def save(self, csv_path: Path) -> bool:
+        """サイドカーを書き込み（書き込めない場所でも処理は続行）"""
+        sidecar = self.sidecar_path(csv_path)
+        tmp_path = sidecar.with_name(sidecar.name + '.tmp')
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'version': LINE_INDEX_VERSION,
+                    'size': self.size,
+                    'mtime_ns': self.mtime_ns,
+                    'encoding': self.encoding,
+                    'offsets': self.offsets,
+                }, f)
+            os.replace(tmp_path, sidecar)
+            return True
+        except OSError as e:
+            logger.warning(f"⚠️ インデックス保存エラー {sidecar}: {e}")
+            return False
+
+    def read_line(self, csv_path: Path, request_id: str) -> Optional[bytes]:
+        """
+        依頼IDの行をシークして読み出す（末尾の改行を除いたバイト列）
+
+        引用符内の改行を含むレコードは、_iter_lines と同じく各行末の CR を除いて
+        LF で連結したものを返す。
+        """
+        entry = self.offsets.get(request_id)
+        if entry is None:
+            return None
+
+        offset, length = entry
+        with open(csv_path, 'rb') as f:
+            f.seek(offset)
+            data = f.read(length).rstrip(b'\r\n')
+        return data.replace(b'\r\n', b'\n')
@@ -0,0 +1,75 @@
+"""
+BML検査値の正規化（GAS csvImport.js normalizeBmlValue のPython移植）
+
+解析時に1回だけ実行し、数値・打ち切り修飾子・定性区分を
+原文の横に保持することで、転記・判定での再変換をなくす。
+"""
+
+import re
+from typing import Optional, Tuple
+
+from .constants import (
+    QUALITATIVE_CODES,
+    NUMERIC_CODES,
+    QUALITATIVE_TRANSFORMS,
+    QUALITATIVE_CLASSES,
+    CENSOR_MARKS,
+)
+
+# 不等号・「未満」等の除去（GAS: /[<>≦≧未満以上以下]/g）
+_CENSOR_CHARS = re.compile(r'[<>≦≧未満以上以下]')
+
+# JavaScript parseFloat 相当（先頭の数値部分のみ読む）
+_LEADING_NUMBER = re.compile(r'\s*([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)')
+
+
+def normalize_value(value: str, code: str) -> Tuple[Optional[float], str, str]:
+    """
+    検査値文字列を正規化
+
+    Args:
+        value: CSVの値文字列（前後空白除去済み）
+        code: BML検査コード
+
+    Returns:
+        (数値 or None, 打ち切り修飾子 "<" / ">" / "", 定性区分 "(-)" 等 / "")
+    """
+    if code in QUALITATIVE_CODES:
+        qualitative = QUALITATIVE_TRANSFORMS.get(value, value)
+        if qualitative in QUALITATIVE_CLASSES:
+            return None, '', qualitative
+        return _to_float(value), '', ''
+
+    if code in NUMERIC_CODES:
+        numeric = _to_float(value)
+        if numeric is not None:
+            return numeric, '', ''
+
+        cleaned = _CENSOR_CHARS.sub('', value).strip()
+        match = _LEADING_NUMBER.match(cleaned)
+        if not match:
+            return None, '', ''
+        return float(match.group(1)), _censor_qualifier(value), ''
+
+    # その他のコード: 数値化できず定性結果の表記なら区分として扱う
+    numeric = _to_float(value)
+    if numeric is None:
+        qualitative = QUALITATIVE_TRANSFORMS.get(value, value)
+        if qualitative in QUALITATIVE_CLASSES:
+            return None, '', qualitative
+    return numeric, '', ''
+
+
+def _to_float(value: str) -> Optional[float]:
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return None
+
+
+def _censor_qualifier(value: str) -> str:
+    """値に含まれる打ち切り記号から修飾子を返す"""
+    for mark, qualifier in CENSOR_MARKS.items():
+        if mark in value:
+            return qualifier
+    return ''
@@ -0,0 +1,488 @@
+"""
+テンプレートへの直接セル書き込み（OOXML）
+
+openpyxl はワークブック全体（全シート・スタイル・図形）を解析して書き直すため、
+1患者あたり数十セルの転記でも数秒かかり、解釈できない要素は落ちる。
+ここではテンプレートのzipをメンバーごとにコピーし、書き込みのあるシートXMLの
+<sheetData> の該当セル・行だけを差し替える。それ以外のメンバー
+（vbaProject.bin、スタイル、図形等）と、シートXMLの書き込み以外の部分は原文のまま残す。
+
+使い方:
+    template = get_ooxml_template(template_path)
+    buffer = template.buffer()            # ワークブック互換の書き込み先
+    buffer['４ページ']['M41'] = 1.1        # ws.cell(row=41, column=13, value=1.1) も可
+    template.write(output_path, buffer)
+
+制限（該当する場合は OoxmlUnsupported を送出、呼び出し側で openpyxl に切り替える）:
+    - セルコメントは書けない
+    - 数値・文字列・真偽値以外の値（日付等）は書けない
+    - 共有数式の親セルは上書きできない
+"""
+
+import io
+import os
+import re
+import math
+import threading
+import zipfile
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Set, Tuple
+from xml.sax.saxutils import escape
+
+WORKBOOK_PART = 'xl/workbook.xml'
+WORKBOOK_RELS_PART = 'xl/_rels/workbook.xml.rels'
+CONTENT_TYPES_PART = '[Content_Types].xml'
+CALC_CHAIN_PART = 'xl/calcChain.xml'
+
+_SHEET_RE = re.compile(r'<sheet\b[^>]*/>')
+_RELATIONSHIP_RE = re.compile(r'<Relationship\b[^>]*/>')
+_ATTR_RE = re.compile(r'([\w:]+)="([^"]*)"')
+_ROW_RE = re.compile(r'<row\b[^>]*?(?:/>|>.*?</row>)', re.S)
+_CELL_RE = re.compile(r'<c\b[^>]*?(?:/>|>.*?</c>)', re.S)
+_MERGE_RE = re.compile(r'<mergeCell\b[^>]*\bref="([A-Z]+)(\d+):([A-Z]+)(\d+)"')
+_COORD_RE = re.compile(r'^\$?([A-Za-z]{1,3})\$?(\d+)$')
+_ILLEGAL_XML_RE = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+class OoxmlUnsupported(ValueError):
+    """直接書き込みで扱えない内容（openpyxl で書く必要がある）"""
+
+
+class OoxmlTemplate:
+    """
+    直接書き込み用のテンプレート（zipのバイト列とシート構成を保持）
+
+    Args:
+        data: テンプレート（.xlsx / .xlsm）のバイト列
+
+    Attributes:
+        sheet_parts: シート名 → シートXMLのzipメンバー名（ブック内の順）
+    """
+
+    def __init__(self, data: bytes):
+        self.data = data
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            self._names = archive.namelist()
+            workbook = archive.read(WORKBOOK_PART).decode('utf-8')
+            rels = archive.read(WORKBOOK_RELS_PART).decode('utf-8')
+
+        targets = {}
+        for match in _RELATIONSHIP_RE.finditer(rels):
+            attrs = dict(_ATTR_RE.findall(match.group(0)))
+            target = attrs.get('Target', '')
+            targets[attrs.get('Id')] = target.lstrip('/') if target.startswith('/') else 'xl/' + target
+
+        self.sheet_parts: Dict[str, str] = {}
+        for match in _SHEET_RE.finditer(workbook):
+            attrs = dict(_ATTR_RE.findall(match.group(0)))
+            name = _unescape(attrs.get('name', ''))
+            part = targets.get(attrs.get('r:id'))
+            if part:
+                self.sheet_parts[name] = part
+
+        self._merged: Dict[str, Set[Tuple[int, int]]] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_file(cls, template_path: Path) -> 'OoxmlTemplate':
+        return cls(Path(template_path).read_bytes())
+
+    @property
+    def sheetnames(self) -> List[str]:
+        return list(self.sheet_parts)
+
+    def buffer(self) -> 'CellBuffer':
+        """このテンプレートへの書き込みを貯めるバッファを作成"""
+        return CellBuffer(self)
+
+    def merged_cells(self, sheet_name: str) -> Set[Tuple[int, int]]:
+        """シートの結合セルのうち左上以外のセル {(行, 列)}（書き込めないセル）"""
+        with self._lock:
+            cells = self._merged.get(sheet_name)
+            if cells is None:
+                with zipfile.ZipFile(io.BytesIO(self.data)) as archive:
+                    xml = archive.read(self.sheet_parts[sheet_name]).decode('utf-8')
+                cells = set()
+                for c1, r1, c2, r2 in _MERGE_RE.findall(xml):
+                    min_row, min_col, max_row, max_col = int(r1), column_index(c1), int(r2), column_index(c2)
+                    cells.update((row, column) for row in range(min_row, max_row + 1)
+                                 for column in range(min_col, max_col + 1))
+                    cells.discard((min_row, min_col))
+                self._merged[sheet_name] = cells
+            return cells
+
+    def write(self, output_path: Path, buffer: 'CellBuffer'):
+        """
+        テンプレートに buffer のセルを書き込んで保存
+
+        Args:
+            output_path: 出力パス
+            buffer: 書き込むセル（CellBuffer）
+
+        Raises:
+            OoxmlUnsupported: 直接書き込みで扱えない内容を含む場合（ファイルは作成しない）
+        """
+        if buffer.comments:
+            raise OoxmlUnsupported("セルコメントは直接書き込みできません")
+
+        output_path = Path(output_path)
+        parts: Dict[str, bytes] = {}
+        formulas_replaced = False
+        with zipfile.ZipFile(io.BytesIO(self.data)) as archive:
+            for sheet_name, cells in buffer.sheets.items():
+                if not cells.cells:
+                    continue
+                part = self.sheet_parts[sheet_name]
+                xml, replaced = inject_cells(archive.read(part).decode('utf-8'), cells.cells)
+                parts[part] = xml.encode('utf-8')
+                formulas_replaced = formulas_replaced or replaced
+
+            if parts:
+                # 書き込んだ値に依存する数式は開いたときに再計算させる
+                parts[WORKBOOK_PART] = _full_calc_on_load(archive.read(WORKBOOK_PART).decode('utf-8')).encode('utf-8')
+
+            drop = set()
+            if formulas_replaced and CALC_CHAIN_PART in self._names:
+                # 数式を値で上書きした場合、計算チェーンは古くなるので削除（Excel が作り直す）
+                drop.add(CALC_CHAIN_PART)
+                parts[WORKBOOK_RELS_PART] = _drop_calc_chain_rel(
+                    parts.get(WORKBOOK_RELS_PART) or archive.read(WORKBOOK_RELS_PART))
+                parts[CONTENT_TYPES_PART] = _drop_calc_chain_type(
+                    parts.get(CONTENT_TYPES_PART) or archive.read(CONTENT_TYPES_PART))
+
+            tmp_path = output_path.with_name(f"{output_path.name}.{os.getpid()}.tmp")
+            try:
+                with zipfile.ZipFile(tmp_path, 'w', zipfile.ZIP_DEFLATED) as out:
+                    for info in archive.infolist():
+                        if info.filename in drop:
+                            continue
+                        data = parts.get(info.filename)
+                        out.writestr(info, data if data is not None else archive.read(info.filename))
+                os.replace(tmp_path, output_path)
+            finally:
+                if tmp_path.exists():
+                    tmp_path.unlink()
+
+
+class CellBuffer:
+    """
+    ワークブック互換の書き込みバッファ（wb.sheetnames / wb[シート名][座標] = 値）
+
+    Attributes:
+        sheets: シート名 → SheetBuffer
+        comments: [(シート名, 行, 列, コメント)]（直接書き込みでは扱えないため記録のみ）
+    """
+
+    def __init__(self, template: OoxmlTemplate):
+        self.template = template
+        self.sheets: Dict[str, 'SheetBuffer'] = {}
+        self.comments: List[Tuple[str, int, int, Any]] = []
+
+    @property
+    def sheetnames(self) -> List[str]:
+        return self.template.sheetnames
+
+    def __getitem__(self, sheet_name: str) -> 'SheetBuffer':
+        if sheet_name not in self.template.sheet_parts:
+            raise KeyError(f"Worksheet {sheet_name} does not exist.")
+        sheet = self.sheets.get(sheet_name)
+        if sheet is None:
+            sheet = self.sheets[sheet_name] = SheetBuffer(self, sheet_name)
+        return sheet
+
+    def apply_to(self, workbook):
+        """貯めた書き込みを openpyxl のワークブックに適用（直接書き込みできない場合の代替）"""
+        for sheet_name, sheet in self.sheets.items():
+            ws = workbook[sheet_name]
+            for (row, column), value in sheet.cells.items():
+                ws.cell(row=row, column=column).value = value
+        for sheet_name, row, column, comment in self.comments:
+            workbook[sheet_name].cell(row=row, column=column).comment = comment
+
+
+class SheetBuffer:
+    """1シート分の書き込み（(行, 列) → 値）"""
+
+    def __init__(self, buffer: CellBuffer, title: str):
+        self.buffer = buffer
+        self.title = title
+        self.cells: Dict[Tuple[int, int], Any] = {}
+        self._merged = buffer.template.merged_cells(title)
+
+    def __setitem__(self, coordinate: str, value: Any):
+        self.set_value(*split_coordinate(coordinate), value)
+
+    def __getitem__(self, coordinate: str) -> '_CellRef':
+        return _CellRef(self, *split_coordinate(coordinate))
+
+    def cell(self, row: int, column: int, value: Any = None) -> '_CellRef':
+        """openpyxl の ws.cell と同じ（value が None なら書き込まない）"""
+        if value is not None:
+            self.set_value(row, column, value)
+        return _CellRef(self, row, column)
+
+    def set_value(self, row: int, column: int, value: Any):
+        if (row, column) in self._merged:
+            # openpyxl の MergedCell と同じく結合セルの左上以外には書けない
+            raise AttributeError("'MergedCell' object attribute 'value' is read-only")
+        self.cells[(row, column)] = value
+
+
+class _CellRef:
+    """ws[座標] / ws.cell() の代わり（.value / .comment の代入のみ対応）"""
+
+    __slots__ = ('_sheet', '_row', '_column')
+
+    def __init__(self, sheet: SheetBuffer, row: int, column: int):
+        self._sheet = sheet
+        self._row = row
+        self._column = column
+
+    @property
+    def value(self):
+        return self._sheet.cells.get((self._row, self._column))
+
+    @value.setter
+    def value(self, value):
+        self._sheet.set_value(self._row, self._column, value)
+
+    @property
+    def comment(self):
+        return None
+
+    @comment.setter
+    def comment(self, comment):
+        self._sheet.buffer.comments.append((self._sheet.title, self._row, self._column, comment))
+
+
+def inject_cells(xml: str, cells: Dict[Tuple[int, int], Any]) -> Tuple[str, bool]:
+    """
+    シートXMLの <sheetData> に値を書き込む（それ以外の部分は原文のまま）
+
+    既存のセルはスタイル（s属性）を残して値だけ置き換え、
+    ないセル・行は列順・行順の位置に追加する。
+
+    Args:
+        xml: シートXML
+        cells: (行, 列) → 値
+
+    Returns:
+        (書き込み後のXML, 数式を値で上書きしたか)
+
+    Raises:
+        OoxmlUnsupported: 扱えない値・構造の場合
+    """
+    targets: Dict[int, Dict[int, Any]] = {}
+    for (row, column), value in cells.items():
+        targets.setdefault(row, {})[column] = value
+
+    start = xml.find('<sheetData')
+    if start == -1:
+        raise OoxmlUnsupported("sheetData がありません")
+    open_end = xml.index('>', start) + 1
+    if xml[open_end - 2] == '/':
+        # <sheetData/>（空のシート）
+        head, body, tail = xml[:start] + '<sheetData>', '', '</sheetData>' + xml[open_end:]
+    else:
+        close = xml.index('</sheetData>', open_end)
+        head, body, tail = xml[:open_end], xml[open_end:close], xml[close:]
+
+    out = []
+    replaced_formula = False
+    pending = sorted(targets)
+    position = 0
+    for match in _ROW_RE.finditer(body):
+        row_xml = match.group(0)
+        row = _row_number(row_xml)
+        while pending and pending[0] < row:
+            out.append(body[position:match.start()])
+            position = match.start()
+            number = pending.pop(0)
+            out.append(_new_row(number, targets[number]))
+        out.append(body[position:match.start()])
+        position = match.end()
+        if pending and pending[0] == row:
+            pending.pop(0)
+            row_xml, replaced = _inject_row(row_xml, row, targets[row])
+            replaced_formula = replaced_formula or replaced
+        out.append(row_xml)
+    out.append(body[position:])
+    for number in pending:
+        out.append(_new_row(number, targets[number]))
+
+    return _widen_dimension(head, targets) + ''.join(out) + tail, replaced_formula
+
+
+def _inject_row(row_xml: str, row: int, values: Dict[int, Any]) -> Tuple[str, bool]:
+    open_end = row_xml.index('>') + 1
+    # 列範囲のヒント（spans）は書き込みで外れる場合があるので外す
+    open_tag = re.sub(r'\s+spans="[^"]*"', '', row_xml[:open_end])
+    if open_tag.endswith('/>'):
+        open_tag, body, close = open_tag[:-2].rstrip() + '>', '', '</row>'
+    else:
+        body, close = row_xml[open_end:-len('</row>')], '</row>'
+
+    out = []
+    pending = sorted(values)
+    replaced_formula = False
+    position = 0
+    for match in _CELL_RE.finditer(body):
+        cell_xml = match.group(0)
+        attrs = dict(_ATTR_RE.findall(cell_xml[:cell_xml.index('>')]))
+        column = split_coordinate(attrs.get('r', ''))[1] if 'r' in attrs else None
+        if column is None:
+            raise OoxmlUnsupported(f"行 {row} に座標のないセルがあります")
+        while pending and pending[0] < column:
+            out.append(body[position:match.start()])
+            position = match.start()
+            number = pending.pop(0)
+            out.append(_cell_xml(number, row, values[number], None))
+        out.append(body[position:match.start()])
+        position = match.end()
+        if pending and pending[0] == column:
+            pending.pop(0)
+            if '<f' in cell_xml:
+                if re.search(r'<f\b[^>]*\bref="', cell_xml):
+                    raise OoxmlUnsupported(f"共有数式・配列数式のセル {attrs['r']} は上書きできません")
+                replaced_formula = True
+            cell_xml = _cell_xml(column, row, values[column], attrs.get('s'))
+        out.append(cell_xml)
+    out.append(body[position:])
+    for number in pending:
+        out.append(_cell_xml(number, row, values[number], None))
+
+    return open_tag + ''.join(out) + close, replaced_formula
+
+
+def _new_row(row: int, values: Dict[int, Any]) -> str:
+    return f'<row r="{row}">' + ''.join(
+        _cell_xml(column, row, values[column], None) for column in sorted(values)) + '</row>'
+
+
+def _cell_xml(column: int, row: int, value: Any, style: Optional[str]) -> str:
+    """
+    セル要素（openpyxl と同じ要素・同じ書式、None は値なし）
+
+    数値は openpyxl と同じく有効桁16桁の %g 形式（4.0 は 4、巨大な整数は指数表記）。
+    """
+    attrs = f'r="{column_letter(column)}{row}"'
+    if style is not None:
+        attrs += f' s="{style}"'
+
+    if value is None:
+        return f'<c {attrs}/>'
+    if isinstance(value, bool):
+        return f'<c {attrs} t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float)):
+        if isinstance(value, float) and not math.isfinite(value):
+            raise OoxmlUnsupported(f"有限でない数値は書けません: {value}")
+        return f'<c {attrs} t="n"><v>{value:.16g}</v></c>'
+    if isinstance(value, str):
+        if _ILLEGAL_XML_RE.search(value):
+            raise OoxmlUnsupported("XMLに書けない制御文字を含みます")
+        if not value:
+            return f'<c {attrs} t="inlineStr"/>'
+        if value.startswith('=') and len(value) > 1:
+            return f'<c {attrs}><f>{escape(value[1:])}</f><v/></c>'
+        space = ' xml:space="preserve"' if value != value.strip() else ''
+        return f'<c {attrs} t="inlineStr"><is><t{space}>{escape(value)}</t></is></c>'
+    raise OoxmlUnsupported(f"直接書き込みできない値の型: {type(value).__name__}")
+
+
+def _row_number(row_xml: str) -> int:
+    match = re.match(r'<row\b[^>]*?\br="(\d+)"', row_xml)
+    if match is None:
+        raise OoxmlUnsupported("行番号のない行があります")
+    return int(match.group(1))
+
+
+def _full_calc_on_load(workbook_xml: str) -> str:
+    match = re.search(r'<calcPr\b[^>]*?/>', workbook_xml)
+    if match:
+        tag = re.sub(r'\s+fullCalcOnLoad="[^"]*"', '', match.group(0))
+        tag = tag[:-2].rstrip() + ' fullCalcOnLoad="1"/>'
+        return workbook_xml[:match.start()] + tag + workbook_xml[match.end():]
+    # calcPr は definedNames / externalReferences / sheets の後
+    for anchor in ('definedNames', 'externalReferences', 'sheets'):
+        match = re.search(rf'</{anchor}>|<{anchor}\b[^>]*/>', workbook_xml)
+        if match:
+            index = match.end()
+            return workbook_xml[:index] + '<calcPr fullCalcOnLoad="1"/>' + workbook_xml[index:]
+    return workbook_xml
+
+
+def _widen_dimension(head: str, targets: Dict[int, Dict[int, Any]]) -> str:
+    """<dimension ref="A1:C5"/> を書き込んだセルを含む範囲に広げる"""
+    match = re.search(r'<dimension\b[^>]*?\bref="([^"]*)"', head)
+    if match is None:
+        return head
+    try:
+        corners = [split_coordinate(ref) for ref in match.group(1).split(':')]
+    except ValueError:
+        return head
+    rows = [row for row, _ in corners] + list(targets)
+    columns = [column for _, column in corners] + [column for values in targets.values() for column in values]
+    ref = f"{column_letter(min(columns))}{min(rows)}:{column_letter(max(columns))}{max(rows)}"
+    if ref == match.group(1) or (len(corners) == 1 and ref == match.group(1) + ':' + match.group(1)):
+        return head
+    return head[:match.start(1)] + ref + head[match.end(1):]
+
+
+def _drop_calc_chain_rel(rels: bytes) -> bytes:
+    text = rels.decode('utf-8')
+    text = re.sub(r'<Relationship\b[^>]*Target="/?(?:xl/)?calcChain\.xml"[^>]*/>', '', text)
+    return text.encode('utf-8')
+
+
+def _drop_calc_chain_type(content_types: bytes) -> bytes:
+    text = content_types.decode('utf-8')
+    text = re.sub(r'<Override\b[^>]*PartName="/xl/calcChain\.xml"[^>]*/>', '', text)
+    return text.encode('utf-8')
+
+
+def split_coordinate(coordinate: str) -> Tuple[int, int]:
+    """'M41' → (41, 13)"""
+    match = _COORD_RE.match(coordinate)
+    if match is None:
+        raise ValueError(f"Invalid cell coordinates ({coordinate})")
+    return int(match.group(2)), column_index(match.group(1))
+
+
+def column_index(letters: str) -> int:
+    """'A' → 1, 'AA' → 27"""
+    index = 0
+    for char in letters.upper():
+        index = index * 26 + ord(char) - 64
+    return index
+
+
+def column_letter(index: int) -> str:
+    """1 → 'A', 27 → 'AA'"""
+    letters = ''
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def _unescape(text: str) -> str:
+    return (text.replace('&lt;', '<').replace('&gt;', '>').replace('&quot;', '"')
+            .replace('&apos;', "'").replace('&amp;', '&'))
+
+
+# テンプレートのパス → ((更新時刻ns, サイズ), OoxmlTemplate)
+_templates: Dict[str, Tuple[Tuple[int, int], OoxmlTemplate]] = {}
+_templates_lock = threading.Lock()
+
+
+def get_ooxml_template(template_path: Path) -> OoxmlTemplate:
+    """テンプレートを読み込み（プロセス内で共有、更新時刻・サイズが変わったら読み直す）"""
+    template_path = Path(template_path)
+    stat = template_path.stat()
+    stat_key = (stat.st_mtime_ns, stat.st_size)
+    key = str(template_path.resolve())
+    with _templates_lock:
+        entry = _templates.get(key)
+        if entry is None or entry[0] != stat_key:
+            entry = _templates[key] = (stat_key, OoxmlTemplate.from_file(template_path))
+        return entry[1]
@@ -0,0 +1,150 @@
+"""
+BML CSV 解析結果キャッシュ
+
+同じCSVを指す複数のリクエスト（修正後の再出力など）で
+再解析しないよう、解析結果（ParsedBatch）をLRUで保持する。
+キーは (パス, サイズ, 更新時刻ns[, 内容ハッシュ])。
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from .batch import ParsedBatch
+from .constants import PARSE_CACHE_MAX_ENTRIES, READ_CHUNK_SIZE, DIAG_MAX_SAMPLES
+from .validation import ParseDiagnostics
+
+CacheKey = Tuple[str, int, int, Optional[str]]
+
+
+class ParseCache:
+    """
+    解析結果のLRUキャッシュ（スレッドセーフ）
+
+    Args:
+        max_entries: 保持するCSVの最大数
+        content_hash: Trueならキーに内容ハッシュを含める
+                      （更新時刻が変わらない上書きコピーにも対応、ただし毎回全体を読む）
+    """
+
+    def __init__(self, max_entries: int = PARSE_CACHE_MAX_ENTRIES, content_hash: bool = False):
+        self.max_entries = max_entries
+        self.content_hash = content_hash
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: 'OrderedDict[CacheKey, ParsedBatch]' = OrderedDict()
+        self._path_keys: Dict[str, CacheKey] = {}
+        self._lock = threading.Lock()
+
+    def get_or_parse(
+        self,
+        csv_path: Path,
+        parser,
+        validate: bool = False,
+        max_samples: int = DIAG_MAX_SAMPLES
+    ) -> ParsedBatch:
+        """
+        キャッシュ済みの解析結果を返す（なければ解析して登録）
+
+        返すオブジェクトはキャッシュと共有されるため変更しないこと。
+
+        Args:
+            csv_path: CSVファイルパス
+            parser: BMLResultParser インスタンス
+            validate: Trueなら検証付きで解析（検証なしのキャッシュはミス扱い）
+            max_samples: 検証時に診断種別ごとに保持する件数
+
+        Returns:
+            ParsedBatch（validate=True なら batch.diagnostics に診断レポート）
+        """
+        key = self._make_key(Path(csv_path))
+
+        with self._lock:
+            batch = self._entries.get(key)
+            if batch is not None and (not validate or batch.diagnostics is not None):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return batch
+            self.misses += 1
+
+        diagnostics = ParseDiagnostics(csv_path, max_samples) if validate else None
+        batch = parser.parse_batch(csv_path, diagnostics)
+
+        with self._lock:
+            # 同じパスの古い版（更新前の内容）は破棄
+            stale = self._path_keys.get(key[0])
+            if stale is not None and stale != key:
+                self._entries.pop(stale, None)
+            self._entries[key] = batch
+            self._path_keys[key[0]] = key
+
+            while len(self._entries) > self.max_entries:
+                old_key, _ = self._entries.popitem(last=False)
+                if self._path_keys.get(old_key[0]) == old_key:
+                    del self._path_keys[old_key[0]]
+                self.evictions += 1
+
+        return batch
+
+    def stats(self) -> Dict:
+        """ヒット/ミス統計"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'hit_rate': self.hits / total if total else 0.0,
+            }
+
+    def clear(self):
+        """全エントリを破棄（統計は保持）"""
+        with self._lock:
+            self._entries.clear()
+            self._path_keys.clear()
+
+    def _make_key(self, csv_path: Path) -> CacheKey:
+        stat = csv_path.stat()
+        digest = self._hash_file(csv_path) if self.content_hash else None
+        return (str(csv_path.resolve()), stat.st_size, stat.st_mtime_ns, digest)
+
+    @staticmethod
+    def _hash_file(csv_path: Path) -> str:
+        h = hashlib.blake2b(digest_size=16)
+        with open(csv_path, 'rb') as f:
+            while True:
+                chunk = f.read(READ_CHUNK_SIZE)
+                if not chunk:
+                    break
+                h.update(chunk)
+        return h.hexdigest()
+
+
+# ウォッチャープロセス内の全トランスクライバーで共有するキャッシュ
+_shared_cache: Optional[ParseCache] = None
+_shared_lock = threading.Lock()
+
+
+def get_parse_cache() -> ParseCache:
+    """プロセス共有の解析キャッシュを取得"""
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = ParseCache()
+        return _shared_cache
+
+
+def configure_parse_cache(max_entries: int = PARSE_CACHE_MAX_ENTRIES, content_hash: bool = False) -> ParseCache:
+    """プロセス共有キャッシュの設定を変更（既存エントリは設定が変わった場合のみ破棄）"""
+    cache = get_parse_cache()
+    with cache._lock:
+        if cache.content_hash != content_hash:
+            cache._entries.clear()
+            cache._path_keys.clear()
+        cache.max_entries = max_entries
+        cache.content_hash = content_hash
+    return cache
@@ -2,15 +2,30 @@
 BML検査結果CSVパーサー
 """
 
+import os
+import csv
+import time
+import codecs
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from pathlib import Path
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Iterator, Tuple, Iterable
 
 from .constants import (
     SUPPORTED_ENCODINGS,
+    ENCODING_SNIFF_BYTES,
+    READ_CHUNK_SIZE,
     MIN_CSV_FIELDS,
     TEST_RESULT_START_INDEX,
     TEST_RESULT_FIELD_COUNT,
+    TOKENIZER_CSV,
+    TOKENIZER_SPLIT,
+    TAIL_FINGERPRINT_BYTES,
 )
+from .line_index import LineIndex
+from .batch import ParsedBatch
+from .normalize import normalize_value
+from .validation import ParseDiagnostics
 
 
 class BMLResultParser:
@@ -22,12 +37,37 @@ class BMLResultParser:
         検査コード,結果値,フラグ,コメント,検査コード,結果値,フラグ,コメント,...
     """
 
-    def parse(self, csv_path: Path) -> List[Dict]:
+    # 親フォルダ → 検出済みエンコーディング（同じ検査機関のファイルは同じ文字コード）
+    _encoding_cache: Dict[str, str] = {}
+
+    # CSVパス → 行オフセットインデックス（プロセス内で共有）
+    _line_indexes: Dict[str, LineIndex] = {}
+
+    def __init__(self, tokenizer: str = TOKENIZER_CSV):
+        """
+        Args:
+            tokenizer: 行の分割方式
+                TOKENIZER_CSV: 引用符を含む行だけCの csv モジュールで分割（コメント内のカンマ対応）
+                TOKENIZER_SPLIT: 常に str.split(',')（従来方式）
+
+        Raises:
+            ValueError: 未対応の分割方式が指定された場合
+        """
+        if tokenizer not in (TOKENIZER_CSV, TOKENIZER_SPLIT):
+            raise ValueError(f"未対応の分割方式です: {tokenizer}")
+        self.tokenizer = tokenizer
+
+        # CSVパス → (確定済みバイトオフセット, エンコーディング, (デバイス, inode),
+        #           更新時刻ns, 確定位置直前のバイト列)（追記分の差分解析用）
+        self._tail_offsets: Dict[str, Tuple[int, Optional[str], Tuple[int, int], int, bytes]] = {}
+
+    def parse(self, csv_path: Path, diagnostics: Optional[ParseDiagnostics] = None) -> List[Dict]:
         """
         BML結果CSVを解析
 
         Args:
             csv_path: CSVファイルパス
+            diagnostics: 指定時は解析しながら検証し、診断を集める
 
         Returns:
             患者ごとの検査結果リスト
@@ -36,30 +76,460 @@ class BMLResultParser:
             ValueError: エンコーディング検出失敗時
             FileNotFoundError: ファイルが見つからない場合
         """
-        content = self._read_file(csv_path)
+        return list(self.iter_records(csv_path, diagnostics))
+
+    def parse_batch(self, csv_path: Path, diagnostics: Optional[ParseDiagnostics] = None) -> ParsedBatch:
+        """
+        BML結果CSVを列指向コンテナ ParsedBatch に解析
+
+        iter_records() から1患者ずつ取り込むため、辞書リスト全体は作らない。
+
+        Args:
+            csv_path: CSVファイルパス
+            diagnostics: 指定時は解析しながら検証し、batch.diagnostics に診断レポートを保持
+
+        Returns:
+            ParsedBatch（辞書ビューは batch[i] / iter(batch) で取得可能）
+        """
+        batch = ParsedBatch.from_records(self.iter_records(csv_path, diagnostics))
+        if diagnostics is not None:
+            batch.diagnostics = diagnostics.summary()
+        return batch
+
+    def parse_many(
+        self,
+        csv_paths: Iterable[Path],
+        workers: Optional[int] = None,
+        validate: bool = False
+    ) -> Dict:
+        """
+        複数のBML結果CSVをプロセスプールで並列解析
+
+        結果は入力順に連結する（完了順には依存しない）。
+        ファイル単位の失敗は例外にせず files[].error に記録する。
+
+        Args:
+            csv_paths: CSVファイルパスのリスト
+            workers: ワーカープロセス数（省略時はCPUコア数、1以下なら逐次処理）
+            validate: Trueなら各ファイルを検証し files[].diagnostics に診断レポートを付ける
+
+        Returns:
+            {
+                'results': 全ファイルの患者ごとの検査結果リスト,
+                'files': [{'path', 'count', 'seconds', 'error'[, 'diagnostics']}, ...],
+                'seconds': 全体の処理時間
+            }
+        """
+        paths = [str(p) for p in csv_paths]
+        workers = workers or os.cpu_count() or 1
+        start = time.perf_counter()
+
+        worker = partial(_parse_file_worker, self, validate=validate)
+        if workers <= 1 or len(paths) <= 1:
+            outcomes = [worker(p) for p in paths]
+        else:
+            with ProcessPoolExecutor(max_workers=min(workers, len(paths))) as executor:
+                outcomes = list(executor.map(worker, paths))
 
         results = []
-        for line in content.strip().split('\n'):
+        files = []
+        for path, records, seconds, error, diagnostics in outcomes:
+            results.extend(records)
+            file_report = {
+                'path': path,
+                'count': len(records),
+                'seconds': seconds,
+                'error': error,
+            }
+            if validate:
+                file_report['diagnostics'] = diagnostics
+            files.append(file_report)
+
+        return {
+            'results': results,
+            'files': files,
+            'seconds': time.perf_counter() - start,
+        }
+
+    def iter_records(self, csv_path: Path, diagnostics: Optional[ParseDiagnostics] = None) -> Iterator[Dict]:
+        """
+        BML結果CSVを1患者ずつ解析して返すジェネレータ
+
+        ファイル全体をメモリに載せず、1行ずつデコード・解析するため
+        大きなバッチファイルでもメモリ使用量は一定。
+
+        Args:
+            csv_path: CSVファイルパス
+            diagnostics: 指定時は各行を検証して行番号付きの診断を集める
+                         （省略時は検証処理を一切行わない）
+
+        Yields:
+            患者ごとの検査結果辞書 {'patient_info': ..., 'test_results': ...}
+
+        Raises:
+            ValueError: エンコーディング検出失敗時
+            FileNotFoundError: ファイルが見つからない場合
+        """
+        lines = self._join_quoted(self._iter_lines(csv_path))
+        if diagnostics is not None:
+            yield from self._iter_validated(lines, diagnostics)
+            return
+
+        for line in lines:
             if not line.strip():
                 continue
 
             parsed = self._parse_line(line)
             if parsed:
-                results.append(parsed)
+                yield parsed
+
+    def _iter_validated(self, lines: Iterable[str], diagnostics: ParseDiagnostics) -> Iterator[Dict]:
+        """iter_records の検証付き版（行番号を数え、分割結果を診断に渡す）"""
+        line_no = 1
+        for line in lines:
+            start = line_no
+            line_no += 1
+            if '"' in line:
+                # 引用符内の改行で連結された行は物理行番号を進める
+                line_no += line.count('\n')
+                if self.tokenizer == TOKENIZER_CSV and line.count('"') % 2 == 1:
+                    diagnostics.check_unterminated(start, line)
+
+            if not line.strip():
+                continue
+
+            fields = self._split_fields(line)
+            parsed = self._parse_fields(fields)
+            diagnostics.check_line(start, line, fields, parsed)
+            if parsed:
+                yield parsed
+
+    def find_record(self, csv_path: Path, request_id: str) -> Optional[Dict]:
+        """
+        依頼IDを指定して1患者分だけ解析
+
+        初回はCSVをmmapしてサイドカーインデックス（依頼ID → オフセット）を作成し、
+        以降は該当行だけをシークして読み出す。CSVのサイズまたは更新時刻が
+        変わった場合はインデックスを作り直す。
+
+        Args:
+            csv_path: CSVファイルパス
+            request_id: 依頼ID（CSV 2列目）
+
+        Returns:
+            検査結果辞書、または該当行がない場合None
+        """
+        csv_path = Path(csv_path)
+        index = self.get_line_index(csv_path)
+
+        raw = index.read_line(csv_path, request_id)
+        if raw is None:
+            return None
+
+        try:
+            line = raw.decode(index.encoding)
+        except UnicodeDecodeError:
+            _, _, line = self._fallback_decode(raw, index.encoding, csv_path)
+
+        return self._parse_line(line)
+
+    def get_line_index(self, csv_path: Path) -> LineIndex:
+        """有効な行オフセットインデックスを取得（メモリ → サイドカー → 新規作成の順）"""
+        csv_path = Path(csv_path)
+        key = str(csv_path.resolve())
+        stat = csv_path.stat()
 
-        return results
+        index = self._line_indexes.get(key)
+        if index is None or not index.matches(stat):
+            index = LineIndex.load(csv_path)
+            if index is None:
+                with open(csv_path, 'rb') as f:
+                    prefix = f.read(ENCODING_SNIFF_BYTES)
+                index = LineIndex.build(csv_path, self._detect_encoding(prefix, csv_path))
+                index.save(csv_path)
+            self._line_indexes[key] = index
+
+        return index
+
+    def parse_appended(self, csv_path: Path) -> List[Dict]:
+        """
+        前回呼び出し以降に追記された完結レコードだけを解析（差分）
+
+        改行で終わっていない末尾の行と、引用符が閉じていないレコード
+        （引用符内の改行の途中）は書き込み途中とみなし、その先頭から次回に回す。
+        ファイルが置き換えられた場合（inode の変化、前回の確定位置より小さい、
+        確定位置直前の内容が変わった）は先頭から読み直す。
+
+        Args:
+            csv_path: 追記され続けるCSVファイルパス
+
+        Returns:
+            新たに確定した患者ごとの検査結果リスト
+        """
+        csv_path = Path(csv_path)
+        key = str(csv_path.resolve())
+        stat = csv_path.stat()
+        file_id = (stat.st_dev, stat.st_ino)
+
+        offset, encoding, known_id, mtime_ns, fingerprint = self._tail_offsets.get(key, (0, None, None, None, b''))
+        if known_id == file_id and stat.st_size == offset and stat.st_mtime_ns == mtime_ns:
+            return []
+
+        with open(csv_path, 'rb') as f:
+            if offset and not self._same_tail(f, stat, offset, known_id, fingerprint):
+                offset, encoding, fingerprint = 0, None, b''
+            if encoding is None:
+                encoding = self._detect_encoding(f.read(ENCODING_SNIFF_BYTES), csv_path)
+            f.seek(offset)
+            data = f.read(stat.st_size - offset)
+
+        end = self._complete_length(data)
+        if end:
+            fingerprint = (fingerprint + data[:end])[-TAIL_FINGERPRINT_BYTES:]
+        self._tail_offsets[key] = (offset + end, encoding, file_id, stat.st_mtime_ns, fingerprint)
+        if not end:
+            return []
+
+        data = data[:end]
+        try:
+            text = data.decode(encoding)
+        except UnicodeDecodeError:
+            encoding, _, text = self._fallback_decode(data, encoding, csv_path)
+            self._tail_offsets[key] = (offset + end, encoding, file_id, stat.st_mtime_ns, fingerprint)
+
+        records = []
+        for line in self._join_quoted(line.rstrip('\r') for line in text.split('\n')):
+            if not line.strip():
+                continue
+            parsed = self._parse_line(line)
+            if parsed:
+                records.append(parsed)
+        return records
+
+    def skip_to_end(self, csv_path: Path) -> int:
+        """
+        既存の完結レコードを解析済みとして確定位置を末尾へ進める
+
+        Returns:
+            確定したバイトオフセット
+        """
+        csv_path = Path(csv_path)
+        with open(csv_path, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            encoding = self._detect_encoding(f.read(ENCODING_SNIFF_BYTES), csv_path)
+            f.seek(0)
+            data = f.read(stat.st_size)
+
+        committed = self._complete_length(data)
+        self._tail_offsets[str(csv_path.resolve())] = (
+            committed, encoding, (stat.st_dev, stat.st_ino), stat.st_mtime_ns,
+            data[max(0, committed - TAIL_FINGERPRINT_BYTES):committed]
+        )
+        return committed
+
+    def _complete_length(self, data: bytes) -> int:
+        """
+        data の先頭から、完結したレコードが続く部分のバイト数
+
+        レコードは改行で終わり、引用符が閉じている（_join_quoted が連結を終える）もの。
+        改行・引用符は Shift_JIS / UTF-8 のマルチバイト文字の一部にならないため、
+        デコードせずに数えられる。
+        """
+        end = data.rfind(b'\n') + 1
+        if self.tokenizer != TOKENIZER_CSV or data.find(b'"', 0, end) == -1:
+            return end
+
+        complete = 0
+        in_quotes = False
+        pos = 0
+        while pos < end:
+            nl = data.index(b'\n', pos)
+            if data.count(b'"', pos, nl) % 2:
+                in_quotes = not in_quotes
+            pos = nl + 1
+            if not in_quotes:
+                complete = pos
+        return complete
+
+    @staticmethod
+    def _same_tail(f, stat: os.stat_result, offset: int, file_id: Optional[Tuple[int, int]],
+                   fingerprint: bytes) -> bool:
+        """前回の確定位置までが同じファイル・同じ内容のままか（追記されただけか）"""
+        if file_id != (stat.st_dev, stat.st_ino) or stat.st_size < offset:
+            return False
+        f.seek(offset - len(fingerprint))
+        return f.read(len(fingerprint)) == fingerprint
 
     def _read_file(self, csv_path: Path) -> str:
         """ファイルを読み込み（エンコーディング自動検出）"""
+        return '\n'.join(self._iter_lines(csv_path))
+
+    def _iter_lines(self, csv_path: Path) -> Iterator[str]:
+        """
+        ファイルを1行ずつデコードして返す
+
+        先頭バイト列から推定したエンコーディングがファイル全体をデコードできるかを
+        _confirm_encoding で確かめてから、インクリメンタルデコーダでチャンク単位に
+        デコードする。途中でエンコーディングを切り替えると、それまでに返した行と
+        以降の行でデコード結果が混在するため、確定前には1行も返さない。
+
+        Raises:
+            ValueError: どのエンコーディングでもデコードできない場合
+        """
+        csv_path = Path(csv_path)
+        with open(csv_path, 'rb') as f:
+            prefix = f.read(ENCODING_SNIFF_BYTES)
+            encoding = self._detect_encoding(prefix, csv_path)
+
+            start = 0
+            if encoding == 'utf-8-sig':
+                start = len(codecs.BOM_UTF8)
+                encoding = 'utf-8'
+            encoding = self._confirm_encoding(f, start, encoding, csv_path)
+
+            f.seek(start)
+            decoder = codecs.getincrementaldecoder(encoding)()
+            pending = ''
+            while True:
+                chunk = f.read(READ_CHUNK_SIZE)
+                if not chunk:
+                    break
+
+                lines = (pending + decoder.decode(chunk)).split('\n')
+                pending = lines.pop()
+                for line in lines:
+                    yield line.rstrip('\r')
+
+            pending += decoder.decode(b'', final=True)
+            if pending:
+                yield pending.rstrip('\r')
+
+    def _confirm_encoding(self, f, start: int, encoding: str, csv_path: Path) -> str:
+        """
+        推定したエンコーディングでファイル全体（start 以降）をデコードできるか確認する
+
+        デコードできなければ SUPPORTED_ENCODINGS の他の候補を先頭から順に試し、
+        全体をデコードできた最初のものを返す（フォルダのキャッシュも更新）。
+        ASCIIのみのチャンクはどの候補でも同じ結果になるためデコードを省く。
+
+        Raises:
+            ValueError: どのエンコーディングでもデコードできない場合
+        """
+        candidates = [encoding] + [enc for enc in SUPPORTED_ENCODINGS if enc != encoding]
+        for enc in candidates:
+            f.seek(start)
+            if self._decodes(f, enc):
+                if enc != encoding:
+                    self._encoding_cache[str(csv_path.parent)] = enc
+                return enc
+
+        raise ValueError(f"ファイルのエンコーディングを検出できません: {csv_path}")
+
+    @staticmethod
+    def _decodes(f, encoding: str) -> bool:
+        """f の現在位置から末尾までを encoding でデコードできるか"""
+        decoder = codecs.getincrementaldecoder(encoding)()
+        try:
+            while True:
+                chunk = f.read(READ_CHUNK_SIZE)
+                if not chunk:
+                    break
+                # マルチバイト文字の途中でなければ、ASCIIのみのチャンクは検証不要
+                if chunk.isascii() and not decoder.getstate()[0]:
+                    continue
+                decoder.decode(chunk)
+            decoder.decode(b'', final=True)
+        except UnicodeDecodeError:
+            return False
+        return True
+
+    def _detect_encoding(self, prefix: bytes, csv_path: Path) -> str:
+        """
+        先頭バイト列からエンコーディングを推定
+
+        判定順:
+            1. UTF-8 BOM があれば utf-8-sig
+            2. ASCIIのみなら同一フォルダで前回検出したエンコーディング
+               （未検出なら SUPPORTED_ENCODINGS の先頭）。推定にすぎないため、
+               ファイル全体をデコードできなければ _confirm_encoding が他の全候補を試す
+            3. SUPPORTED_ENCODINGS を順に試し、先頭部分をデコードできた最初のもの
+               （cp932 にしかない NEC/IBM 拡張文字があれば shift_jis は失敗する）
+
+        Args:
+            prefix: ファイル先頭のバイト列（最大 ENCODING_SNIFF_BYTES）
+            csv_path: CSVファイルパス（親フォルダをキャッシュのキーに使用）
+
+        Raises:
+            ValueError: どのエンコーディングでもデコードできない場合
+        """
+        if prefix.startswith(codecs.BOM_UTF8):
+            return 'utf-8-sig'
+
+        cache_key = str(csv_path.parent)
+        if prefix.isascii():
+            return self._encoding_cache.get(cache_key, SUPPORTED_ENCODINGS[0])
+
         for enc in SUPPORTED_ENCODINGS:
+            # 末尾で途切れたマルチバイト文字は判定に含めない（final=False）
+            decoder = codecs.getincrementaldecoder(enc)()
             try:
-                with open(csv_path, 'r', encoding=enc) as f:
-                    return f.read()
+                decoder.decode(prefix)
             except UnicodeDecodeError:
                 continue
+            self._encoding_cache[cache_key] = enc
+            return enc
 
         raise ValueError(f"ファイルのエンコーディングを検出できません: {csv_path}")
 
+    def _fallback_decode(
+        self,
+        data: bytes,
+        current: str,
+        csv_path: Path
+    ) -> Tuple[str, codecs.IncrementalDecoder, str]:
+        """
+        現在のエンコーディング以外の候補（SUPPORTED_ENCODINGS の順）で data をデコード
+
+        ASCIIのみの先頭部分からフォルダのキャッシュで utf-8 と推定した場合でも
+        shift_jis / cp932 を試せるよう、current より前の候補も含める。
+
+        Returns:
+            (エンコーディング名, 以降に使うデコーダ, デコード結果)
+        """
+        for enc in (enc for enc in SUPPORTED_ENCODINGS if enc != current):
+            decoder = codecs.getincrementaldecoder(enc)()
+            try:
+                return enc, decoder, decoder.decode(data)
+            except UnicodeDecodeError:
+                continue
+
+        raise ValueError(f"ファイルのエンコーディングを検出できません: {csv_path}")
+
+    def _join_quoted(self, lines: Iterable[str]) -> Iterator[str]:
+        """
+        引用符内の改行で分断された行を1行に戻す（TOKENIZER_CSV のみ）
+
+        引用符の数が奇数の行は、偶数になるまで後続行と改行で連結する。
+        """
+        if self.tokenizer != TOKENIZER_CSV:
+            yield from lines
+            return
+
+        pending = None
+        for line in lines:
+            if pending is not None:
+                pending += '\n' + line
+                if pending.count('"') % 2 == 0:
+                    yield pending
+                    pending = None
+            elif '"' in line and line.count('"') % 2 == 1:
+                pending = line
+            else:
+                yield line
+
+        if pending is not None:
+            yield pending
+
     def _parse_line(self, line: str) -> Optional[Dict]:
         """
         1行を解析
@@ -70,8 +540,18 @@ class BMLResultParser:
         Returns:
             解析結果辞書、または無効行の場合None
         """
-        fields = line.split(',')
+        return self._parse_fields(self._split_fields(line))
 
+    def _split_fields(self, line: str) -> List[str]:
+        """行をフィールドに分割"""
+        if self.tokenizer == TOKENIZER_CSV and '"' in line:
+            # 引用符付きフィールド（カンマを含むコメント等）はCの csv モジュールで分割
+            return next(csv.reader((line,)))
+        # 引用符のない行（大半）は高速な split
+        return line.split(',')
+
+    def _parse_fields(self, fields: List[str]) -> Optional[Dict]:
+        """分割済みフィールドを解析（列数不足の行はNone）"""
         if len(fields) < MIN_CSV_FIELDS:
             return None
 
@@ -124,9 +604,32 @@ class BMLResultParser:
         if not value:
             return None
 
+        numeric, qualifier, qualitative = normalize_value(value, code)
+
         return {
             'code': code,
             'value': value,
             'flag': flag,
-            'comment': comment
+            'comment': comment,
+            'numeric': numeric,          # 数値（数値化できない場合None）
+            'qualifier': qualifier,      # 打ち切り修飾子 "<" / ">" / ""
+            'qualitative': qualitative,  # 定性区分 "(-)" 等 / ""
         }
+
+
+def _parse_file_worker(
+    parser: BMLResultParser,
+    csv_path: str,
+    validate: bool = False
+) -> Tuple[str, List[Dict], float, Optional[str], Optional[Dict]]:
+    """parse_many のワーカー関数（プロセスプールから呼ぶためモジュールレベルに定義）"""
+    start = time.perf_counter()
+    diagnostics = ParseDiagnostics(csv_path) if validate else None
+    try:
+        records = parser.parse(Path(csv_path), diagnostics)
+        error = None
+    except Exception as e:
+        records = []
+        error = f"{type(e).__name__}: {e}"
+    summary = diagnostics.summary() if diagnostics is not None else None
+    return csv_path, records, time.perf_counter() - start, error, summary
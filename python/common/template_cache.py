@@ -0,0 +1,166 @@
+"""
+Excelテンプレートのメモリキャッシュ
+
+リクエストごとの load_workbook(テンプレート) は、Google Drive 上のファイル読み込みと
+全シート・スタイルの解析で数秒かかる。テンプレートのバイト列と解析済みの
+原本ワークブックをメモリに保持し、リクエストには原本の複製を渡す。
+テンプレートの更新時刻(ns)・サイズが変わったら読み直す。
+"""
+
+import io
+import copy
+import logging
+import threading
+import zipfile
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from openpyxl import load_workbook
+from openpyxl.utils.indexed_list import IndexedList
+
+from .constants import TEMPLATE_CACHE_MAX_ENTRIES
+
+logger = logging.getLogger(__name__)
+
+
+class _Entry:
+    """1テンプレート分（バイト列と原本）"""
+
+    __slots__ = ('stat_key', 'data', 'keep_vba', 'pristine', 'clonable')
+
+    def __init__(self, stat_key: Tuple[int, int], data: bytes, keep_vba: bool):
+        self.stat_key = stat_key
+        self.data = data
+        self.keep_vba = keep_vba
+        self.pristine = None
+        self.clonable = True
+
+
+class TemplateCache:
+    """
+    テンプレートのメモリキャッシュ（スレッドセーフ）
+
+    Args:
+        max_entries: 保持するテンプレートの最大数
+        clone: Trueなら解析済みの原本を複製して渡す（Falseならメモリ上のバイト列から毎回解析）
+    """
+
+    def __init__(self, max_entries: int = TEMPLATE_CACHE_MAX_ENTRIES, clone: bool = True):
+        self.max_entries = max_entries
+        self.clone = clone
+        self.hits = 0
+        self.misses = 0
+        self._entries: 'OrderedDict[Tuple[str, bool], _Entry]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def load(self, template_path: Path, keep_vba: bool = False):
+        """
+        テンプレートから新しいワークブックを作成（load_workbook と同じ結果）
+
+        返すワークブックはリクエストごとに独立しており、自由に書き換えてよい。
+
+        Args:
+            template_path: テンプレートのパス
+            keep_vba: VBAを保持するか（.xlsm）
+
+        Returns:
+            openpyxl Workbook
+        """
+        template_path = Path(template_path)
+        stat = template_path.stat()
+        key = (str(template_path.resolve()), keep_vba)
+        stat_key = (stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.stat_key == stat_key:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+                logger.info(f"📄 テンプレート読み込み: {template_path.name}")
+                entry = _Entry(stat_key, template_path.read_bytes(), keep_vba)
+                self._entries[key] = entry
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+
+            if not (self.clone and entry.clonable):
+                return self._parse(entry)
+
+            if entry.pristine is None:
+                entry.pristine = self._parse(entry)
+            try:
+                return _clone_workbook(entry.pristine, entry.data)
+            except Exception as e:
+                # 複製できないテンプレートは毎回バイト列から解析
+                logger.warning(f"⚠️ テンプレートを複製できません、再解析で代替 {template_path.name}: {e}")
+                entry.pristine = None
+                entry.clonable = False
+                return self._parse(entry)
+
+    def stats(self) -> Dict:
+        """ヒット/ミス統計"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'entries': len(self._entries),
+                'hit_rate': self.hits / total if total else 0.0,
+            }
+
+    def clear(self):
+        """全エントリを破棄（統計は保持）"""
+        with self._lock:
+            self._entries.clear()
+
+    @staticmethod
+    def _parse(entry: _Entry):
+        return load_workbook(io.BytesIO(entry.data), keep_vba=entry.keep_vba)
+
+
+def _clone_workbook(workbook, data: bytes):
+    """
+    解析済みワークブックの複製（deepcopy）
+
+    openpyxl の IndexedList（スタイル表・共有文字列）は deepcopy すると
+    重複要素が落ちて添字がずれるため、先に正しく複製して memo に登録する。
+    VBAの ZipFile は複製できないので、複製先にはバイト列から開き直したものを付ける。
+    """
+    memo = {}
+    vba_archive = workbook.vba_archive
+    if vba_archive is not None:
+        memo[id(vba_archive)] = None
+    for value in workbook.__dict__.values():
+        if isinstance(value, IndexedList):
+            memo[id(value)] = IndexedList(copy.deepcopy(list(value), memo))
+
+    clone = copy.deepcopy(workbook, memo)
+    if vba_archive is not None:
+        clone.vba_archive = zipfile.ZipFile(io.BytesIO(data))
+    return clone
+
+
+# プロセス内の全トランスクライバーで共有するキャッシュ
+_shared_cache: Optional[TemplateCache] = None
+_shared_lock = threading.Lock()
+
+
+def get_template_cache() -> TemplateCache:
+    """プロセス共有のテンプレートキャッシュを取得"""
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            _shared_cache = TemplateCache()
+        return _shared_cache
+
+
+def configure_template_cache(max_entries: int = TEMPLATE_CACHE_MAX_ENTRIES, clone: bool = True) -> TemplateCache:
+    """プロセス共有キャッシュの設定を変更"""
+    cache = get_template_cache()
+    with cache._lock:
+        cache.max_entries = max_entries
+        cache.clone = clone
+    return cache
@@ -0,0 +1,190 @@
+"""
+BML CSV 解析時検証
+
+解析ストリームの途中で不正行・欠落項目を検出し、行番号付きの診断として集める。
+行ごとに例外は投げず、種別ごとの件数と先頭 DIAG_MAX_SAMPLES 件だけを保持する。
+"""
+
+import json
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .constants import (
+    MIN_CSV_FIELDS,
+    TEST_RESULT_START_INDEX,
+    TEST_RESULT_FIELD_COUNT,
+    NUMERIC_CODES,
+    DIAG_TOO_FEW_FIELDS,
+    DIAG_MISSING_REQUEST_ID,
+    DIAG_INVALID_CODE,
+    DIAG_MISALIGNED_RESULT,
+    DIAG_EMPTY_VALUE,
+    DIAG_TRUNCATED_RESULT,
+    DIAG_NON_NUMERIC_VALUE,
+    DIAG_UNTERMINATED_QUOTE,
+    DIAG_MAX_SAMPLES,
+    DIAG_EXCERPT_CHARS,
+    DIAGNOSTICS_SUFFIX,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class ParseDiagnostics:
+    """
+    解析時の診断を集めるコレクタ
+
+    BMLResultParser.iter_records(csv_path, diagnostics=...) に渡すと、
+    各行を解析した直後に check_line() が呼ばれる。渡さない場合は
+    検証処理自体が実行されない。
+
+    Attributes:
+        source: 対象CSVパス
+        lines: 検証した行数
+        records: 有効な患者行数
+        counts: 診断種別 → 件数
+        samples: 診断種別 → [{'line', 'field', 'message', 'excerpt'}, ...]（先頭 max_samples 件）
+    """
+
+    def __init__(self, source: Optional[Path] = None, max_samples: int = DIAG_MAX_SAMPLES):
+        self.source = str(source) if source is not None else None
+        self.max_samples = max_samples
+        self.lines = 0
+        self.records = 0
+        self.counts: Dict[str, int] = {}
+        self.samples: Dict[str, List[Dict]] = {}
+
+    def add(self, kind: str, line_no: int, message: str, line: str = '', field: Optional[int] = None):
+        """診断を1件追加（件数は常に加算、詳細は先頭 max_samples 件のみ保持）"""
+        count = self.counts.get(kind, 0)
+        self.counts[kind] = count + 1
+        if count < self.max_samples:
+            self.samples.setdefault(kind, []).append({
+                'line': line_no,
+                'field': field,
+                'message': message,
+                'excerpt': line[:DIAG_EXCERPT_CHARS],
+            })
+
+    def check_line(self, line_no: int, line: str, fields: List[str], parsed: Optional[Dict]):
+        """
+        分割済みの1行を検証
+
+        Args:
+            line_no: 物理行番号（1始まり、引用符内改行で連結した行は先頭行）
+            line: 行文字列（抜粋用）
+            fields: 分割済みフィールド
+            parsed: _parse_line の結果（破棄された行はNone）
+        """
+        self.lines += 1
+
+        if len(fields) < MIN_CSV_FIELDS:
+            self.add(DIAG_TOO_FEW_FIELDS, line_no,
+                     f"列数 {len(fields)} < {MIN_CSV_FIELDS}（行を破棄）", line)
+            return
+
+        self.records += 1
+        if not fields[1].strip():
+            self.add(DIAG_MISSING_REQUEST_ID, line_no, "依頼IDが空です", line, 2)
+
+        test_results = parsed['test_results']
+        value_fields = None
+        for n, result in enumerate(test_results):
+            if result['numeric'] is None and result['code'] in NUMERIC_CODES:
+                if value_fields is None:
+                    value_fields = _value_fields(fields)
+                self.add(DIAG_NON_NUMERIC_VALUE, line_no,
+                         f"検査コード {result['code']} の値を数値化できません: {result['value']!r}",
+                         line, value_fields[n] + 1)
+
+        # 4列単位の全グループが項目として取り込まれていれば構造は正常（大半の行）
+        groups, rest = divmod(len(fields) - TEST_RESULT_START_INDEX, TEST_RESULT_FIELD_COUNT)
+        if not rest and len(test_results) == groups:
+            return
+
+        # _extract_test_results と同じ走査で、破棄・ずれの原因を記録
+        last = len(fields) - 1
+        i = TEST_RESULT_START_INDEX
+        while i <= last:
+            code = fields[i].strip()
+            if not code or not code.isdigit():
+                if code:
+                    self.add(DIAG_INVALID_CODE, line_no, f"検査コードが数字ではありません: {code!r}", line, i + 1)
+                i += 1
+                continue
+
+            if (i - TEST_RESULT_START_INDEX) % TEST_RESULT_FIELD_COUNT:
+                self.add(DIAG_MISALIGNED_RESULT, line_no, f"検査コード {code} の位置がずれています", line, i + 1)
+
+            if i == last:
+                self.add(DIAG_TRUNCATED_RESULT, line_no, f"検査コード {code} に結果値がありません", line, i + 1)
+            elif not fields[i + 1].strip():
+                self.add(DIAG_EMPTY_VALUE, line_no, f"検査コード {code} の結果値が空です（項目を破棄）", line, i + 2)
+
+            i += TEST_RESULT_FIELD_COUNT
+
+    def check_unterminated(self, line_no: int, line: str):
+        """引用符が閉じないままファイル末尾に達した行を記録"""
+        self.add(DIAG_UNTERMINATED_QUOTE, line_no, "引用符が閉じていません（ファイル末尾まで連結）", line)
+
+    @property
+    def total(self) -> int:
+        """診断の総件数"""
+        return sum(self.counts.values())
+
+    def summary(self) -> Dict:
+        """JSON化できる診断レポート"""
+        return {
+            'source': self.source,
+            'lines': self.lines,
+            'records': self.records,
+            'total': self.total,
+            'counts': dict(self.counts),
+            'samples': {kind: list(items) for kind, items in self.samples.items()},
+        }
+
+
+def _value_fields(fields: List[str]) -> List[int]:
+    """取り込まれた検査結果ごとの結果値の列位置（0始まり、_extract_test_results と同じ走査）"""
+    positions = []
+    i = TEST_RESULT_START_INDEX
+    while i < len(fields) - 1:
+        code = fields[i].strip()
+        if not code or not code.isdigit():
+            i += 1
+            continue
+        if fields[i + 1].strip():
+            positions.append(i + 1)
+        i += TEST_RESULT_FIELD_COUNT
+    return positions
+
+
+def diagnostics_path(result_path: Path) -> Path:
+    """結果JSONの横に置く診断レポートのパス（<結果JSON名>_diagnostics.json）"""
+    result_path = Path(result_path)
+    stem = result_path.stem
+    if stem.endswith('_result'):
+        stem = stem[:-len('_result')]
+    return result_path.with_name(stem + DIAGNOSTICS_SUFFIX)
+
+
+def write_diagnostics(summary: Dict, result_path: Path) -> Optional[Path]:
+    """
+    診断レポートを結果JSONの横に書き込み（書き込めない場所でも処理は続行）
+
+    Args:
+        summary: ParseDiagnostics.summary() の戻り値
+        result_path: 結果JSONのパス
+
+    Returns:
+        書き込んだパス、または失敗時None
+    """
+    path = diagnostics_path(result_path)
+    try:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        return path
+    except OSError as e:
+        logger.warning(f"⚠️ 診断レポート保存エラー {path}: {e}")
+        return None
@@ -107,10 +107,25 @@ class ExportRequestHandler:
             logger.error(f"❌ 処理エラー: {json_path.name} - {e}")
             self._move_to_error(json_path, {'error': str(e)})
 
+    def _write_diagnostics(self, result_path: Path, result: Dict) -> Dict:
+        """CSV検証の診断レポートを結果JSONの横に書き出し、結果からは取り除く"""
+        diagnostics = result.get('diagnostics')
+        if diagnostics is None:
+            return result
+
+        from common import write_diagnostics
+        result = {k: v for k, v in result.items() if k != 'diagnostics'}
+        diagnostics_path = write_diagnostics(diagnostics, result_path)
+        if diagnostics_path:
+            result['diagnostics_path'] = str(diagnostics_path)
+            result['diagnostics_total'] = diagnostics.get('total', 0)
+        return result
+
     def _move_to_processed(self, json_path: Path, result: Dict):
         """処理済みフォルダへ移動"""
         # 結果ファイルを作成
         result_path = self.processed_folder / f"{json_path.stem}_result.json"
+        result = self._write_diagnostics(result_path, result)
         with open(result_path, 'w', encoding='utf-8') as f:
             json.dump({
                 'request_id': json_path.stem,
@@ -127,13 +142,17 @@ class ExportRequestHandler:
         """エラーフォルダへ移動"""
         # エラー結果ファイルを作成
         error_result_path = self.error_folder / f"{json_path.stem}_error.json"
+        result = self._write_diagnostics(error_result_path, result)
+        error_data = {
+            'request_id': json_path.stem,
+            'status': 'error',
+            'error_at': datetime.now().isoformat(),
+            'error': result.get('error', 'Unknown error')
+        }
+        if 'diagnostics_path' in result:
+            error_data['diagnostics_path'] = result['diagnostics_path']
         with open(error_result_path, 'w', encoding='utf-8') as f:
-            json.dump({
-                'request_id': json_path.stem,
-                'status': 'error',
-                'error_at': datetime.now().isoformat(),
-                'error': result.get('error', 'Unknown error')
-            }, f, ensure_ascii=False, indent=2)
+            json.dump(error_data, f, ensure_ascii=False, indent=2)
 
         # 元ファイルを移動
         dest_path = self.error_folder / json_path.name
@@ -156,7 +175,8 @@ class DriveWatcher:
         processed_folder: str,
         error_folder: str,
         processor: Callable[[Dict], Dict],
-        poll_interval: float = 5.0
+        poll_interval: float = 5.0,
+        criteria_paths: Optional[List[str]] = None
     ):
         """
         初期化
@@ -167,6 +187,7 @@ class DriveWatcher:
             error_folder: エラーフォルダパス
             processor: 処理関数
             poll_interval: ポーリング間隔（秒）- デフォルト5秒
+            criteria_paths: 判定基準を含むマッピングJSON（ポーリングごとに更新を確認）
         """
         self.pending_folder = Path(pending_folder)
         self.processed_folder = Path(processed_folder)
@@ -177,6 +198,7 @@ class DriveWatcher:
         self.handler = None
         self._running = False
         self._processed_files: Set[str] = set()  # 処理済みファイル追跡用
+        self.criteria_stores = self._criteria_stores(criteria_paths or [])
 
     @classmethod
     def from_settings(cls, settings_path: str, processor: Callable[[Dict], Dict]) -> 'DriveWatcher':
@@ -197,12 +219,17 @@ class DriveWatcher:
 
         folders = settings.get('folders', {})
 
+        # 判定基準を持つマッピング（人間ドック）
+        human_dock = settings.get('exam_types', {}).get('HUMAN_DOCK', {})
+        criteria_paths = [human_dock['mapping_path']] if human_dock.get('mapping_path') else []
+
         return cls(
             pending_folder=folders.get('pending', './pending'),
             processed_folder=folders.get('processed', './processed'),
             error_folder=folders.get('error', './error'),
             processor=processor,
-            poll_interval=settings.get('poll_interval', 5.0)
+            poll_interval=settings.get('poll_interval', 5.0),
+            criteria_paths=criteria_paths
         )
 
     def start(self, process_existing: bool = True):
@@ -233,12 +260,35 @@ class DriveWatcher:
 
         try:
             while self._running:
+                # 判定基準の更新を確認（変更時のみ再コンパイルして差し替え）
+                self._refresh_criteria()
                 # ポーリング: pendingフォルダをスキャン
                 self._poll_pending_folder()
                 time.sleep(self.poll_interval)
         except KeyboardInterrupt:
             self.stop()
 
+    @staticmethod
+    def _criteria_stores(criteria_paths: List[str]) -> list:
+        """存在するマッピングファイルのプロセス共有ストアを取得"""
+        paths = [Path(p) for p in criteria_paths if Path(p).exists()]
+        if not paths:
+            return []
+        try:
+            sys.path.insert(0, str(Path(__file__).parent))
+            from common import get_criteria_store
+        except ImportError:
+            return []
+        return [get_criteria_store(p) for p in paths]
+
+    def _refresh_criteria(self):
+        """マッピングファイルが更新されていれば判定基準スナップショットを差し替え"""
+        for store in self.criteria_stores:
+            try:
+                store.current()
+            except Exception as e:
+                logger.error(f"❌ 判定基準読み込みエラー {store.mapping_path}: {e}")
+
     def _poll_pending_folder(self):
         """
         pendingフォルダをスキャンして新規ファイルを処理
@@ -280,6 +330,121 @@ class DriveWatcher:
         logger.info("👋 Drive Watcher 終了")
 
 
+class CsvTailWatcher:
+    """
+    追記され続けるBML CSVの監視クラス（ポーリング方式）
+
+    検査機関が1日分の結果を同じCSVに追記していく運用向け。
+    フォルダ内のCSVごとに確定済みバイトオフセットを保持し、
+    新たに追記された完結行の患者だけを1人ずつ処理関数へ渡す。
+    """
+
+    def __init__(
+        self,
+        csv_folder: str,
+        processor: Callable[[Dict], Dict],
+        poll_interval: float = 5.0,
+        pattern: str = '*.csv'
+    ):
+        """
+        初期化
+
+        Args:
+            csv_folder: 監視するCSVフォルダパス
+            processor: 処理関数（1患者分の解析結果を受け取り結果を返す）
+            poll_interval: ポーリング間隔（秒）
+            pattern: 対象ファイルのglobパターン
+        """
+        sys.path.insert(0, str(Path(__file__).parent))
+        from common import BMLResultParser
+
+        self.csv_folder = Path(csv_folder)
+        self.processor = processor
+        self.poll_interval = poll_interval
+        self.pattern = pattern
+
+        self.parser = BMLResultParser()
+        self._running = False
+        self._known_files: Set[str] = set()
+
+    def start(self, process_existing: bool = False):
+        """
+        監視開始
+
+        Args:
+            process_existing: 起動時点で既にある行も処理するか
+                              （Falseなら起動時点の末尾から追記分のみ処理）
+        """
+        logger.info("=" * 60)
+        logger.info("🚀 CSV Tail Watcher 起動（ポーリング方式）")
+        logger.info(f"   監視フォルダ: {self.csv_folder}")
+        logger.info(f"   ポーリング間隔: {self.poll_interval}秒")
+        logger.info("=" * 60)
+
+        if not process_existing:
+            for csv_file in self.csv_folder.glob(self.pattern):
+                offset = self.parser.skip_to_end(csv_file)
+                self._known_files.add(csv_file.name)
+                logger.info(f"   既存行をスキップ: {csv_file.name} ({offset} bytes)")
+
+        self._running = True
+        logger.info("👁️ 監視中... (Ctrl+C で終了)")
+
+        try:
+            while self._running:
+                self.poll()
+                time.sleep(self.poll_interval)
+        except KeyboardInterrupt:
+            self.stop()
+
+    def poll(self) -> List[Dict]:
+        """
+        フォルダを1回スキャンし、追記分の患者を処理
+
+        Returns:
+            処理結果のリスト
+        """
+        results = []
+        try:
+            for csv_file in sorted(self.csv_folder.glob(self.pattern)):
+                if csv_file.name not in self._known_files:
+                    self._known_files.add(csv_file.name)
+                    logger.info(f"📥 新規CSV検知: {csv_file.name}")
+
+                try:
+                    delta = self.parser.parse_appended(csv_file)
+                except (OSError, ValueError) as e:
+                    logger.error(f"❌ 追記分の解析エラー: {csv_file.name} - {e}")
+                    continue
+
+                if delta:
+                    logger.info(f"📝 追記検知: {csv_file.name} +{len(delta)}患者")
+
+                for record in delta:
+                    request_id = record['patient_info'].get('request_id', 'UNKNOWN')
+                    try:
+                        result = self.processor(record)
+                    except Exception as e:
+                        result = {'success': False, 'error': str(e)}
+
+                    if result.get('success', False):
+                        logger.info(f"✅ 処理完了: {request_id} → {result.get('output_path', 'N/A')}")
+                    else:
+                        logger.error(f"❌ 処理失敗: {request_id} - {result.get('error', 'Unknown error')}")
+                    results.append(result)
+
+        except Exception as e:
+            logger.error(f"❌ ポーリングエラー: {e}")
+
+        return results
+
+    def stop(self):
+        """監視停止"""
+        logger.info("🛑 監視停止中...")
+        self._running = False
+        logger.info("👋 CSV Tail Watcher 終了")
+
+
 # テスト用ダミープロセッサ
 def dummy_processor(request_data: Dict) -> Dict:
     """
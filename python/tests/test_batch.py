@@ -0,0 +1,18 @@
+"""
+列指向コンテナ ParsedBatch の確認
+"""
+
+from common.batch import ParsedBatch
+
+
+def test_more_than_256_distinct_flags_round_trip():
+    records = [
+        {
+            'patient_info': {'request_id': f"{900000 + n}"},
+            'test_results': [{'code': '0000401', 'value': '1.0', 'flag': f"F{n}", 'comment': ''}],
+        }
+        for n in range(300)
+    ]
+    batch = ParsedBatch.from_records(records)
+
+    assert [r['test_results'][0]['flag'] for r in batch] == [f"F{n}" for n in range(300)]
@@ -0,0 +1,116 @@
+"""
+生成コード版の判定（codegen）と逐次評価（judge_rules）・決定表（DecisionTable）の一致確認
+
+ランダムな判定基準（重なり・隙間・or の連鎖・性別限定・None を含む）と、
+境界値そのもの・前後の最近接値・NaN・無限大を含む値で全項目を比較する。
+"""
+
+import math
+import random
+
+import pytest
+
+from common import codegen
+from common.criteria_snapshot import criteria_version
+from common.decision_table import DecisionTable, compile_criteria, judge_rules
+
+GENDERS = ('M', 'F', None)
+
+
+def random_criteria(rng: random.Random, items: int) -> dict:
+    def bound():
+        return rng.choice([None, rng.randint(0, 100), round(rng.uniform(0, 100), rng.randint(1, 3))])
+
+    def rule(depth=0):
+        r = {'min': bound(), 'max': bound()}
+        if depth < 2 and rng.random() < 0.3:
+            r['or'] = rule(depth + 1)
+        return r
+
+    criteria = {}
+    for i in range(items):
+        spec = {grade: rule() for grade in ('A', 'B', 'C', 'D') if rng.random() < 0.8}
+        if rng.random() < 0.2:
+            spec['gender'] = rng.choice(['M', 'F'])
+        criteria[f"RANDOM_{i}"] = spec
+    return criteria
+
+
+def probes(criteria: dict, rng: random.Random, count: int = 200) -> list:
+    values = [math.nan, math.inf, -math.inf, 0.0, -0.0, -1.0]
+    for spec in criteria.values():
+        for grade in ('A', 'B', 'C', 'D'):
+            rule = spec.get(grade)
+            while isinstance(rule, dict):
+                for bound in (rule.get('min'), rule.get('max')):
+                    if bound is not None:
+                        values += [bound, float(bound), math.nextafter(bound, -math.inf),
+                                   math.nextafter(bound, math.inf), bound - 0.05, bound + 0.05]
+                rule = rule.get('or')
+    values += [rng.uniform(-10, 150) for _ in range(count)]
+    return values
+
+
+def generated_tables(criteria: dict, cache_dir) -> dict:
+    return codegen.load_generated_tables(compile_criteria(criteria), criteria_version(criteria), cache_dir)
+
+
+@pytest.mark.parametrize('seed', range(25))
+def test_random_criteria_match_interpreter(seed, tmp_path):
+    rng = random.Random(seed)
+    criteria = random_criteria(rng, 40)
+    tables = compile_criteria(criteria)
+    generated = generated_tables(criteria, tmp_path)
+
+    for key, spec in criteria.items():
+        assert isinstance(generated[key], codegen.GeneratedTable) == isinstance(tables[key], DecisionTable)
+        for gender in GENDERS:
+            for value in probes({key: spec}, rng):
+                expected = judge_rules(spec, value, gender)
+                assert generated[key].grade(value, gender) == expected, (spec, value, gender)
+                assert tables[key].grade(value, gender) == expected, (spec, value, gender)
+
+
+def test_gender_specific_items(tmp_path):
+    criteria = {
+        'HB_M': {'gender': 'M', 'A': {'min': 13.1, 'max': 16.3}, 'D': {'min': None, 'max': 12.0}},
+        'HB_F': {'gender': 'F', 'A': {'min': 12.1, 'max': 14.5}, 'C': {'min': 14.6, 'max': None}},
+    }
+    generated = generated_tables(criteria, tmp_path)
+
+    assert generated['HB_M'].grade(14.0, 'M') == 'A'
+    assert generated['HB_M'].grade(14.0, 'F') == ''
+    assert generated['HB_M'].grade(14.0) == ''
+    assert generated['HB_F'].grade(14.6, 'F') == 'C'
+    assert generated['HB_F'].grade(14.6, 'M') == ''
+    for key, spec in criteria.items():
+        for gender in GENDERS:
+            for value in probes({key: spec}, random.Random(0), 50):
+                assert generated[key].grade(value, gender) == judge_rules(spec, value, gender)
+
+
+def test_nan_and_boundaries(tmp_path):
+    # min/max の両方が None のルールは何にも一致しない、NaN は比較がすべて偽
+    criteria = {
+        'ITEM': {'A': {'min': None, 'max': 10, 'or': {'min': 20, 'max': None}},
+                 'B': {'min': None, 'max': None}, 'C': {'min': 10, 'max': 20}},
+    }
+    generated = generated_tables(criteria, tmp_path)['ITEM']
+
+    assert generated.grade(10) == 'A'
+    assert generated.grade(math.nextafter(10, math.inf)) == 'C'
+    assert generated.grade(20) == 'A'
+    assert generated.grade(math.nextafter(20, -math.inf)) == 'C'
+    assert generated.grade(math.nan) == judge_rules(criteria['ITEM'], math.nan)
+
+
+def test_item_key_is_escaped_in_source(tmp_path):
+    key = "ITEM\nTABLES = {}  # '\"\\"
+    criteria = {key: {'A': {'min': 0, 'max': 5}, 'B': {'min': 5.1, 'max': None}}}
+    source = codegen.generate_source(compile_criteria(criteria), criteria_version(criteria))
+
+    assert "\nTABLES = {}" not in source
+    compile(source, 'generated', 'exec')
+    generated = generated_tables(criteria, tmp_path)
+    assert generated[key].grade(3) == 'A'
+    assert generated[key].grade(6) == 'B'
@@ -0,0 +1,30 @@
+"""
+行オフセットインデックス（LineIndex）と find_record の確認
+
+引用符内に改行を含むコメントを1レコードとして索引し、parse() と同じ結果を返すこと。
+"""
+
+from common.line_index import LineIndex
+from common.parser import BMLResultParser
+
+LINES = [
+    '203017,900001,20251120,0000,,123456,1,,,1,60,0000401,12.3,H,"溶血あり,',
+    '900002 再検査済み"',
+    '203017,900002,20251120,0000,,234567,2,,,1,60,0000401,8.5,,',
+    '203017,900003,20251120,0000,,345678,1,,,1,60,0000401,4.1,L,"改行なし"',
+]
+
+
+def test_quoted_newline_stays_in_one_record(tmp_path):
+    csv_path = tmp_path / 'quoted.csv'
+    csv_path.write_bytes(('\r\n'.join(LINES) + '\r\n').encode('cp932'))
+
+    index = LineIndex.build(csv_path, 'cp932')
+    assert sorted(index.offsets) == ['900001', '900002', '900003']
+    assert index.read_line(csv_path, '900001').decode('cp932') == '\n'.join(LINES[:2])
+
+    parser = BMLResultParser()
+    records = {r['patient_info']['request_id']: r for r in parser.parse(csv_path)}
+    for request_id, record in records.items():
+        assert parser.find_record(csv_path, request_id) == record
+    assert records['900001']['test_results'][0]['comment'] == '溶血あり,\n900002 再検査済み'
@@ -0,0 +1,55 @@
+"""
+OOXML直接書き込み（ooxml_writer）と openpyxl のセルXMLの一致確認
+"""
+
+import zipfile
+import xml.etree.ElementTree as ET
+
+import openpyxl
+
+from common.ooxml_writer import OoxmlTemplate
+
+SHEET = '結果'
+VALUES = [
+    4.0, 4, -3, 0.1, 2.5, 0.1 + 0.2, 1 / 3, 1e20, 1.5e-7, -0.0, 12345678901234567890,
+    True, False, 'abc', ' 陰性 ', '', '=SUM(1,2)',
+]
+
+
+def sheet_cells(xlsx_path):
+    """シートXMLのセル要素（座標 → (属性, 子要素の (タグ, 属性, テキスト))）"""
+    with zipfile.ZipFile(xlsx_path) as z:
+        name = next(n for n in z.namelist() if n.startswith('xl/worksheets/sheet'))
+        root = ET.fromstring(z.read(name))
+
+    cells = {}
+    for c in root.iter():
+        if c.tag.endswith('}c'):
+            cells[c.get('r')] = (
+                dict(c.attrib),
+                [(e.tag, dict(e.attrib), e.text or '') for e in c.iter() if e is not c],
+            )
+    return cells
+
+
+def test_cell_xml_matches_openpyxl(tmp_path):
+    template_path = tmp_path / 'template.xlsx'
+    wb = openpyxl.Workbook()
+    wb.active.title = SHEET
+    wb.save(template_path)
+
+    wb = openpyxl.load_workbook(template_path)
+    for row, value in enumerate(VALUES, 1):
+        wb[SHEET].cell(row=row, column=2, value=value)
+    wb.save(tmp_path / 'openpyxl.xlsx')
+
+    template = OoxmlTemplate.from_file(template_path)
+    buffer = template.buffer()
+    for row, value in enumerate(VALUES, 1):
+        buffer[SHEET].cell(row=row, column=2, value=value)
+    template.write(tmp_path / 'ooxml.xlsx', buffer)
+
+    expected = sheet_cells(tmp_path / 'openpyxl.xlsx')
+    actual = sheet_cells(tmp_path / 'ooxml.xlsx')
+    for row, value in enumerate(VALUES, 1):
+        assert actual[f"B{row}"] == expected[f"B{row}"], value
@@ -0,0 +1,44 @@
+"""
+BMLResultParser のストリーミングデコードの確認
+
+先頭部分だけでは推定を誤るファイル（UTF-8 の「陰性」は Shift_JIS としても
+デコードできてしまう）で、途中からエンコーディングが混在しないこと。
+"""
+
+from common.constants import READ_CHUNK_SIZE
+from common.parser import BMLResultParser
+
+HEADER = '203017,{rid:06d},20251120,0000,,123456,1,,,1,60'
+
+
+def write_lines(csv_path, comments, encoding):
+    lines = [f"{HEADER.format(rid=n)},0000401,12.3,H,{comment}" for n, comment in enumerate(comments)]
+    csv_path.write_bytes(('\r\n'.join(lines) + '\r\n').encode(encoding))
+    return csv_path
+
+
+def test_large_utf8_file_is_not_mixed_with_shift_jis(tmp_path):
+    # 先頭の 1 チャンク以上は Shift_JIS としてもデコードできる「陰性」だけ、
+    # 末尾に Shift_JIS / cp932 でデコードできない「要再検」を置く
+    line_bytes = len(f"{HEADER.format(rid=0)},0000401,12.3,H,陰性\r\n".encode('utf-8'))
+    patients = READ_CHUNK_SIZE // line_bytes * 2
+    comments = ['陰性'] * patients + ['要再検']
+    csv_path = write_lines(tmp_path / 'large_utf8.csv', comments, 'utf-8')
+
+    BMLResultParser._encoding_cache.pop(str(tmp_path), None)
+    records = BMLResultParser().parse(csv_path)
+
+    assert len(records) == len(comments)
+    assert {r['test_results'][0]['comment'] for r in records} == {'陰性', '要再検'}
+    assert BMLResultParser._encoding_cache[str(tmp_path)] == 'utf-8'
+
+
+def test_ascii_prefix_then_cp932(tmp_path):
+    comments = [''] * (READ_CHUNK_SIZE // 60 * 2) + ['①再検']
+    csv_path = write_lines(tmp_path / 'ascii_then_cp932.csv', comments, 'cp932')
+
+    BMLResultParser._encoding_cache[str(tmp_path)] = 'utf-8'
+    records = BMLResultParser().parse(csv_path)
+
+    assert records[-1]['test_results'][0]['comment'] == '①再検'
+    assert BMLResultParser._encoding_cache[str(tmp_path)] == 'cp932'
@@ -0,0 +1,20 @@
+"""
+解析時検証（ParseDiagnostics）の確認
+"""
+
+from common.constants import DIAG_EMPTY_VALUE, DIAG_NON_NUMERIC_VALUE
+from common.parser import BMLResultParser
+from common.validation import ParseDiagnostics
+
+
+def test_non_numeric_value_reports_field(tmp_path):
+    # 列: 12 検査コード 13 結果値（空・破棄） / 16 検査コード 17 結果値（数値化できない）
+    line = '203017,900001,20251120,0000,,123456,1,,,1,60,0000301,,,,0000302,abc,,'
+    csv_path = tmp_path / 'non_numeric.csv'
+    csv_path.write_bytes((line + '\r\n').encode('cp932'))
+
+    diagnostics = ParseDiagnostics(csv_path)
+    BMLResultParser().parse(csv_path, diagnostics)
+
+    assert diagnostics.samples[DIAG_EMPTY_VALUE][0]['field'] == 13
+    assert diagnostics.samples[DIAG_NON_NUMERIC_VALUE][0]['field'] == 17
@@ -11,11 +11,17 @@ import os
 import sys
 import json
 import logging
+import threading
+import time
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 from openpyxl import load_workbook
 from openpyxl.cell.cell import MergedCell
+from openpyxl.comments import Comment
+from openpyxl.utils import get_column_letter
+from openpyxl.utils.cell import coordinate_to_tuple
+from openpyxl.utils.exceptions import CellCoordinatesException
 
 try:
     import yaml
@@ -29,6 +35,11 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# 書き込み計画の種別（HumanDockTranscriber._compile_write_plan）
+WRITE_VALUE = 0      # 検査値
+WRITE_JUDGMENT = 1   # 判定
+WRITE_FLAG = 2       # H/Lフラグ
+
 
 class RosaiTranscriber:
     """労災二次検診 Excel転記エンジン（セル位置固定）"""
@@ -296,7 +307,6 @@ class HumanDockTranscriber:
         self.template_path = Path(exam_config.get('template_path', ''))
         self.mapping_path = Path(exam_config.get('mapping_path', ''))
         self.output_dir = Path(self.settings.get('output_dir', './output'))
-        self.sheet_cache = {}  # シート名 → wsオブジェクトのキャッシュ
 
         if not self.template_path.exists():
             raise FileNotFoundError(f"テンプレートが見つかりません: {self.template_path}")
@@ -310,18 +320,68 @@ class HumanDockTranscriber:
         # マッピングをフラット化（BMLコード → セル情報）
         self.flat_mapping = self._flatten_mapping()
 
+        # 書き込み計画（転記のたびにシート名の検索・座標文字列の解析をしない）
+        self.plan_sheets, self.write_plan, self.patient_plan = self._compile_write_plan()
+
         # 判定エンジン初期化
         sys.path.insert(0, str(Path(__file__).parent))
         try:
-            from common import JudgmentEngine, GENDER_CODE_TO_INTERNAL
-            self.judgment_engine = JudgmentEngine(
-                self.mapping.get('judgment_criteria', {}).get('items', {})
+            from common import (
+                JudgmentEngine, GENDER_CODE_TO_INTERNAL, configure_parse_cache, get_criteria_store,
+                configure_template_cache, get_ooxml_template,
+            )
+            from common.constants import (
+                PARSE_CACHE_MAX_ENTRIES, DIAG_MAX_SAMPLES, JUDGMENT_MEMO_MAX_ENTRIES, TEMPLATE_CACHE_MAX_ENTRIES,
+            )
+            performance = self.settings.get('performance') or {}
+            memo_config = performance.get('judgment_memo') or {}
+
+            # 判定基準はプロセス共有のスナップショット（マッピング変更時のみ再コンパイル）
+            self.criteria_store = get_criteria_store(self.mapping_path)
+            self.judgment_engine = JudgmentEngine.from_snapshot(
+                self.criteria_store.current(),
+                memo_size=memo_config.get('max_entries', JUDGMENT_MEMO_MAX_ENTRIES)
+                if memo_config.get('enabled', False) else 0
             )
+            codegen_config = performance.get('judgment_codegen') or {}
+            if codegen_config.get('enabled', False):
+                try:
+                    self.judgment_engine.enable_codegen(codegen_config.get('cache_dir'))
+                except OSError as e:
+                    logger.warning(f"⚠️ 判定モジュールを生成できません、決定表で判定: {e}")
+            logger.info(f"  判定基準: 版 {self.judgment_engine.criteria_version}")
             self.GENDER_CODE_TO_INTERNAL = GENDER_CODE_TO_INTERNAL
+
+            # 解析結果キャッシュ（プロセス内の全トランスクライバーで共有）
+            cache_config = performance.get('parse_cache') or {}
+            configure_parse_cache(
+                max_entries=cache_config.get('max_entries', PARSE_CACHE_MAX_ENTRIES),
+                content_hash=cache_config.get('content_hash', False)
+            )
+
+            # テンプレートキャッシュ（プロセス内の全トランスクライバーで共有）
+            template_config = performance.get('template_cache') or {}
+            self.template_cache = configure_template_cache(
+                max_entries=template_config.get('max_entries', TEMPLATE_CACHE_MAX_ENTRIES),
+                clone=template_config.get('clone', True)
+            ) if template_config.get('enabled', True) else None
+
+            # 書き込み方式（ooxml: テンプレートのシートXMLに直接書き込み、openpyxl: ブック全体を再保存）
+            self.ooxml_template = get_ooxml_template if performance.get('writer', 'openpyxl') == 'ooxml' else None
+
+            # 解析時検証（診断レポートは結果JSONの横に出力）
+            validation_config = self.settings.get('validation') or {}
+            self.validate = validation_config.get('enabled', False)
+            self.validation_max_samples = validation_config.get('max_samples', DIAG_MAX_SAMPLES)
         except ImportError:
             logger.warning("common モジュールをインポートできません。判定なしで実行")
             self.judgment_engine = None
+            self.criteria_store = None
+            self.template_cache = None
+            self.ooxml_template = None
             self.GENDER_CODE_TO_INTERNAL = {'1': 'M', '2': 'F'}
+            self.validate = False
+            self.validation_max_samples = 0
 
         logger.info("✅ HumanDockTranscriber 初期化完了")
 
@@ -335,6 +395,38 @@ class HumanDockTranscriber:
                 return yaml.safe_load(f)
         return {}
 
+    def _load_template(self):
+        """テンプレートから新しいワークブックを作成（キャッシュ有効時はメモリ上の原本を複製）"""
+        if self.template_cache is not None:
+            return self.template_cache.load(self.template_path, keep_vba=True)
+        return load_workbook(self.template_path, keep_vba=True)
+
+    def _new_workbook(self):
+        """
+        転記先を作成
+
+        直接書き込み（performance.writer: ooxml）ではワークブック互換の書き込みバッファ、
+        それ以外は openpyxl のワークブックを返す。どちらも _save_workbook で保存する。
+        """
+        if self.ooxml_template is not None:
+            return self.ooxml_template(self.template_path).buffer()
+        return self._load_template()
+
+    def _save_workbook(self, wb, output_path):
+        """転記先を保存（直接書き込みできない内容は openpyxl で保存し直す）"""
+        if self.ooxml_template is None:
+            wb.save(output_path)
+            return
+
+        from common import OoxmlUnsupported
+        try:
+            wb.template.write(output_path, wb)
+        except OoxmlUnsupported as e:
+            logger.info(f"  直接書き込み不可のため openpyxl で保存: {e}")
+            workbook = self._load_template()
+            wb.apply_to(workbook)
+            workbook.save(output_path)
+
     def _flatten_mapping(self) -> Dict[str, Dict]:
         """ネストしたマッピングをBMLコード→セル情報のフラットマップに変換"""
         flat = {}
@@ -353,43 +445,315 @@ class HumanDockTranscriber:
         logger.info(f"  マッピング読込: {len(flat)}項目")
         return flat
 
-    def _get_sheet(self, wb, sheet_name: str):
-        """シートを取得（キャッシュ使用）"""
-        if sheet_name not in self.sheet_cache:
-            if sheet_name not in wb.sheetnames:
-                raise ValueError(f"シート '{sheet_name}' が見つかりません。利用可能: {wb.sheetnames}")
-            self.sheet_cache[sheet_name] = wb[sheet_name]
-        return self.sheet_cache[sheet_name]
+    def _compile_write_plan(self) -> tuple:
+        """
+        マッピングを書き込み計画にコンパイル
+
+        セル指定 "M23" を (シート番号, 行, 列, 種別) に変換しておき、
+        転記時は ws.cell(row, column) で直接書き込む。
+        検査コードごとの順序は 値 → 判定 → フラグ（従来の転記順）。
+        座標が不正なセルは警告して計画から除外する。
+
+        Returns:
+            (シート名リスト,
+             検査コード → ((シート番号, 行, 列, 種別), ...),
+             ((患者情報の項目名, シート番号, 行, 列), ...))
+        """
+        sheet_names: List[str] = []
+        sheet_numbers: Dict[str, int] = {}
 
-    def transcribe_from_csv(self, csv_path: str, output_path: str = None) -> Dict:
+        def locate(label: str, sheet_name: str, coordinate: str) -> Optional[tuple]:
+            try:
+                row, column = coordinate_to_tuple(coordinate)
+            except (CellCoordinatesException, ValueError, TypeError):
+                logger.warning(f"⚠️ マッピングのセル指定が不正です {label}: {coordinate!r}")
+                return None
+            number = sheet_numbers.get(sheet_name)
+            if number is None:
+                number = sheet_numbers[sheet_name] = len(sheet_names)
+                sheet_names.append(sheet_name)
+            return number, row, column
+
+        write_plan = {}
+        for code, spec in self.flat_mapping.items():
+            sheet_name = spec.get('sheet', '４ページ')
+            targets = []
+            for key, kind in (('value_cell', WRITE_VALUE), ('judgment_cell', WRITE_JUDGMENT),
+                              ('flag_cell', WRITE_FLAG)):
+                if spec.get(key):
+                    location = locate(code, sheet_name, spec[key])
+                    if location:
+                        targets.append(location + (kind,))
+            if targets:
+                write_plan[code] = tuple(targets)
+
+        patient_plan = []
+        for field, spec in self.mapping.get('patient_info', {}).items():
+            if isinstance(spec, dict) and 'cell' in spec:
+                location = locate(field, spec.get('sheet', '１ページ'), spec['cell'])
+                if location:
+                    patient_plan.append((field,) + location)
+
+        return sheet_names, write_plan, tuple(patient_plan)
+
+    def _plan_sheets(self, wb) -> list:
+        """書き込み計画のシート番号 → シート（ブックにないシートはNone）"""
+        available = set(wb.sheetnames)
+        return [wb[name] if name in available else None for name in self.plan_sheets]
+
+    def _missing_sheet(self, wb, number: int) -> ValueError:
+        return ValueError(f"シート '{self.plan_sheets[number]}' が見つかりません。利用可能: {wb.sheetnames}")
+
+    def transcribe_from_csv(
+        self,
+        csv_path: str,
+        output_path: str = None,
+        request_id: str = None,
+        age: Optional[float] = None
+    ) -> Dict:
         """
         BML CSVファイルからExcelに転記
 
         Args:
             csv_path: 入力CSVパス
             output_path: 出力パス（省略時は自動決定）
+            request_id: BML依頼ID（指定時はその患者のみ行インデックスから読み出す）
+            age: 患者の年齢（eGFR推算用、CSVには年齢がないためリクエスト側から渡す）
 
         Returns:
             {'success': bool, 'output_path': str, 'count': int}
+            検証有効時（依頼ID指定なし）は 'diagnostics' に診断レポートを含む
+            依頼ID指定なしの場合は先頭の患者のみ（全患者は transcribe_batch）
         """
+        diagnostics = None
         try:
             # CSVパース
             sys.path.insert(0, str(Path(__file__).parent))
             from common import BMLResultParser
             parser = BMLResultParser()
-            results = parser.parse(Path(csv_path))
 
-            if not results:
-                return {'success': False, 'error': 'CSVに患者データが見つかりません'}
+            if request_id:
+                # 依頼ID指定: サイドカーインデックスで該当行だけ読み出す
+                patient_data = parser.find_record(Path(csv_path), request_id)
+                if not patient_data:
+                    return {'success': False, 'error': f'CSVに依頼ID {request_id} の患者データが見つかりません'}
+            else:
+                # 先頭の患者を処理（全患者は transcribe_batch / --batch / batch: true）
+                batch = self._parse_csv(Path(csv_path), parser)
+                patient_data = batch[0] if len(batch) else None
+                diagnostics = batch.diagnostics
+
+            if not patient_data:
+                result = {'success': False, 'error': 'CSVに患者データが見つかりません'}
+                if diagnostics:
+                    result['diagnostics'] = diagnostics
+                return result
+
+        except Exception as e:
+            logger.error(f"❌ 転記エラー: {e}")
+            import traceback
+            traceback.print_exc()
+            return {'success': False, 'error': str(e)}
+
+        result = self.transcribe_record(patient_data, output_path, age)
+        if diagnostics:
+            result['diagnostics'] = diagnostics
+        return result
+
+    def _parse_csv(self, csv_path: Path, parser=None):
+        """CSVを解析（同じCSVへの再出力リクエストでは解析済みの結果を再利用）"""
+        from common import BMLResultParser, get_parse_cache
+        parse_cache = get_parse_cache()
+        batch = parse_cache.get_or_parse(
+            csv_path, parser or BMLResultParser(), self.validate, self.validation_max_samples
+        )
+        diagnostics = batch.diagnostics
+        if diagnostics and diagnostics['total']:
+            logger.warning(f"⚠️ CSV検証: {diagnostics['total']}件の診断 {diagnostics['counts']}")
+
+        stats = parse_cache.stats()
+        logger.info(f"  解析キャッシュ: ヒット{stats['hits']} / ミス{stats['misses']} "
+                    f"(保持{stats['entries']}件)")
+        return batch
+
+    def transcribe_batch(
+        self,
+        csv_path: str,
+        output_dir: str = None,
+        ages: Optional[Dict[str, float]] = None
+    ) -> Dict:
+        """
+        BML CSVの全患者をそれぞれExcelに転記し、出力一覧（マニフェスト）を保存
+
+        CSVの解析は1回（解析キャッシュ）、テンプレートの読み込みも1回
+        （テンプレートキャッシュ / 直接書き込みのテンプレート）で、患者ごとに1ファイル出力する。
+        eGFRの推算と判定は転記前に全患者まとめて1回行い（判定は列指向の judge_batch）、
+        患者ごとのループではブックへの書き込みだけを行う。
+        1患者の失敗で中断せず、結果はマニフェストの outputs に患者ごとに記録する。
+
+        Args:
+            csv_path: 入力CSVパス
+            output_dir: 出力先フォルダ（省略時は settings.yaml の output_dir）
+            ages: 依頼ID → 年齢（eGFR推算用、省略可）
+
+        Returns:
+            {'success': bool（全患者成功）, 'output_path': マニフェストのパス, 'count': 出力ファイル数,
+             'failed': 失敗患者数, 'outputs': [患者ごとの結果]}
+            検証有効時は 'diagnostics' に診断レポートを含む
+        """
+        from common.constants import BATCH_MANIFEST_SUFFIX, BATCH_MANIFEST_VERSION
+
+        csv_path = Path(csv_path)
+        try:
+            batch = self._parse_csv(csv_path)
+        except Exception as e:
+            logger.error(f"❌ 転記エラー: {e}")
+            return {'success': False, 'error': str(e)}
+
+        output_dir = Path(output_dir) if output_dir else self.output_dir
+        output_dir.mkdir(parents=True, exist_ok=True)
+        ages = ages or {}
+        logger.info(f"📋 一括転記: {csv_path.name} {len(batch)}患者 → {output_dir}")
+
+        start = time.perf_counter()
+
+        # eGFR推算は全患者まとめて1回（クレアチニン・年齢・性別の配列で一括計算）
+        records = [batch.record(index) for index in range(len(batch))]
+        derived = self._derive_missing(
+            records, [ages.get(record['patient_info'].get('request_id', '')) for record in records]
+        )
+        judgments = self._judge_batch(batch, records)
+
+        outputs = []
+        used_names = set()
+        for index, patient_data in enumerate(records):
+            patient_info = patient_data['patient_info']
+            request_id = patient_info.get('request_id', '')
+
+            # 同じ依頼IDが複数行ある場合は連番を付けて上書きしない
+            name = self._output_name(patient_info)
+            if name in used_names:
+                stem = name[:-len('.xlsm')]
+                name = next(f"{stem}_{n}.xlsm" for n in range(2, len(batch) + 2)
+                            if f"{stem}_{n}.xlsm" not in used_names)
+            used_names.add(name)
+
+            result = self.transcribe_record(
+                patient_data, output_dir / name, derived=derived[index],
+                judgments=judgments[index] if judgments is not None else None
+            )
+            outputs.append({
+                'index': index,
+                'request_id': request_id,
+                'exam_date': patient_info.get('exam_date', ''),
+                'success': result['success'],
+                'output_path': result.get('output_path'),
+                'count': result.get('count', 0),
+                'derived': result.get('derived', []),
+                'error': result.get('error'),
+            })
+
+        failed = sum(1 for output in outputs if not output['success'])
+        manifest = {
+            'version': BATCH_MANIFEST_VERSION,
+            'source': str(csv_path),
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'patients': len(outputs),
+            'succeeded': len(outputs) - failed,
+            'failed': failed,
+            'seconds': round(time.perf_counter() - start, 3),
+            'outputs': outputs,
+        }
+        manifest_path = output_dir / f"{csv_path.stem}{BATCH_MANIFEST_SUFFIX}"
+        tmp_path = manifest_path.with_name(manifest_path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, manifest_path)
+
+        status = '✅' if not failed else '⚠️'
+        logger.info(f"{status} 一括転記完了: {manifest['succeeded']}/{len(outputs)}患者 "
+                    f"({manifest['seconds']:.2f} 秒) → {manifest_path}")
+
+        result = {
+            'success': failed == 0 and len(outputs) > 0,
+            'output_path': str(manifest_path),
+            'count': manifest['succeeded'],
+            'failed': failed,
+            'outputs': outputs,
+        }
+        if not outputs:
+            result['error'] = 'CSVに患者データが見つかりません'
+        elif failed:
+            result['error'] = f'{failed}患者の転記に失敗しました（詳細: {manifest_path}）'
+        if batch.diagnostics:
+            result['diagnostics'] = batch.diagnostics
+        return result
+
+    def _judge_batch(self, batch, records: List[Dict]) -> Optional[List[List[str]]]:
+        """
+        ParsedBatch の全検査値をまとめて判定し、患者ごとに test_results と同じ並びで返す
+
+        CSVの検査値は judge_batch で列のまま判定し、推算で追記した結果（records 側の
+        末尾）だけ judge_result で判定する。判定エンジンがない場合はNone。
+        """
+        if self.judgment_engine is None:
+            return None
+
+        self._refresh_criteria()
+        grades = self.judgment_engine.judge_batch(batch)
+
+        judgments = []
+        for index, record in enumerate(records):
+            rows = batch.patient_rows(index)
+            patient = grades[rows.start:rows.stop]
+            extra = record['test_results'][len(rows):]
+            if extra:
+                gender = self.GENDER_CODE_TO_INTERNAL.get(record['patient_info'].get('gender', ''), 'M')
+                patient += [self.judgment_engine.judge_result(result, gender) for result in extra]
+            judgments.append(patient)
+        return judgments
+
+    def _output_name(self, patient_info: Dict) -> str:
+        """出力ファイル名（result_<検査日>_<依頼ID>.xlsm）"""
+        request_id = patient_info.get('request_id', 'unknown')
+        exam_date = patient_info.get('exam_date', datetime.now().strftime('%Y%m%d'))
+        return f"result_{exam_date}_{request_id}.xlsm"
+
+    def transcribe_record(
+        self,
+        patient_data: Dict,
+        output_path: str = None,
+        age: Optional[float] = None,
+        derived: Optional[list] = None,
+        judgments: Optional[List[str]] = None
+    ) -> Dict:
+        """
+        解析済みの1患者分をExcelに転記
+
+        eGFRが報告されていない場合はクレアチニン・年齢・性別から推算して転記する
+        （値セルにコメントで計算値である旨を付ける）。
 
-            # 最初の患者を処理（複数患者は将来対応）
-            patient_data = results[0]
+        Args:
+            patient_data: BMLResultParser の1要素 {'patient_info': ..., 'test_results': [...]}
+            output_path: 出力パス（省略時は自動決定）
+            age: 患者の年齢（省略時は patient_info の age / birthdate）
+            derived: 呼び出し側で推算済みの場合はその検査コードのリスト（指定時は推算しない）
+            judgments: 呼び出し側で判定済みの場合は test_results と同じ並びの判定結果
+                       （指定時は判定基準の再読み込み・判定をしない）
+
+        Returns:
+            {'success': bool, 'output_path': str, 'count': int, 'derived': [推算した検査コード]}
+        """
+        try:
             patient_info = patient_data['patient_info']
             test_results = patient_data['test_results']
+            if derived is None:
+                derived = self._derive_missing([patient_data], [age])[0]
+            if judgments is None:
+                self._refresh_criteria()
 
-            # テンプレート読み込み（VBA保持）
-            wb = load_workbook(self.template_path, keep_vba=True)
-            self.sheet_cache = {}  # キャッシュクリア
+            # テンプレート読み込み（VBA保持、直接書き込み時は書き込みバッファ）
+            wb = self._new_workbook()
 
             count = 0
 
@@ -401,23 +765,22 @@ class HumanDockTranscriber:
             count += self._transfer_patient_info(wb, patient_info, gender)
 
             # 検査結果転記
-            count += self._transfer_test_results(wb, test_results, gender)
+            count += self._transfer_test_results(wb, test_results, gender, judgments)
 
             # 出力パス決定
             if not output_path:
                 self.output_dir.mkdir(parents=True, exist_ok=True)
-                request_id = patient_info.get('request_id', 'unknown')
-                exam_date = patient_info.get('exam_date', datetime.now().strftime('%Y%m%d'))
-                output_path = self.output_dir / f"result_{exam_date}_{request_id}.xlsm"
+                output_path = self.output_dir / self._output_name(patient_info)
 
             # 保存
-            wb.save(output_path)
+            self._save_workbook(wb, output_path)
             logger.info(f"✅ 転記完了: {count}項目 → {output_path}")
 
             return {
                 'success': True,
                 'output_path': str(output_path),
-                'count': count
+                'count': count,
+                'derived': derived
             }
 
         except Exception as e:
@@ -432,6 +795,7 @@ class HumanDockTranscriber:
 
         Args:
             data: GASからのリクエストJSON
+                  （csv_path + batch: true で一括転記、output_dir・ages を指定可）
             output_path: 出力パス
 
         Returns:
@@ -439,8 +803,13 @@ class HumanDockTranscriber:
         """
         # CSV パス指定の場合
         csv_path = data.get('csv_path')
+        if csv_path and data.get('batch'):
+            # 一括転記（CSVの全患者、年齢は ages: {依頼ID: 年齢} で指定可）
+            return self.transcribe_batch(csv_path, data.get('output_dir') or output_path, data.get('ages'))
         if csv_path:
-            return self.transcribe_from_csv(csv_path, output_path)
+            return self.transcribe_from_csv(
+                csv_path, output_path, data.get('bml_request_id'), self._request_age(data)
+            )
 
         # JSON直接データの場合（GAS方式）
         patient_info = data.get('patient_info')
@@ -462,9 +831,8 @@ class HumanDockTranscriber:
                         test_results_list.append(item)
                     logger.info(f"  検査結果: {len(test_results_list)}項目")
 
-                # テンプレート読み込み（VBA保持）
-                wb = load_workbook(self.template_path, keep_vba=True)
-                self.sheet_cache = {}  # キャッシュクリア
+                # テンプレート読み込み（VBA保持、直接書き込み時は書き込みバッファ）
+                wb = self._new_workbook()
 
                 count = 0
 
@@ -477,6 +845,13 @@ class HumanDockTranscriber:
                 else:
                     gender = self.GENDER_CODE_TO_INTERNAL.get(gender_raw, 'M')
 
+                self._refresh_criteria()
+
+                # eGFR推算（未報告の場合）
+                derived = self._derive_missing(
+                    [{'patient_info': patient_info, 'test_results': test_results_list}], [self._request_age(data)]
+                )[0]
+
                 # 患者情報転記
                 count += self._transfer_patient_info(wb, patient_info, gender)
 
@@ -494,13 +869,14 @@ class HumanDockTranscriber:
                     output_path = self.output_dir / f"result_{exam_date}_{request_id}.xlsm"
 
                 # 保存
-                wb.save(output_path)
+                self._save_workbook(wb, output_path)
                 logger.info(f"✅ 転記完了: {count}項目 → {output_path}")
 
                 return {
                     'success': True,
                     'output_path': str(output_path),
-                    'count': count
+                    'count': count,
+                    'derived': derived
                 }
 
             except Exception as e:
@@ -515,77 +891,86 @@ class HumanDockTranscriber:
     def _transfer_patient_info(self, wb, patient_info: Dict, gender: str) -> int:
         """患者基本情報を転記（複数シート対応）"""
         count = 0
-        patient_map = self.mapping.get('patient_info', {})
+        sheets = self._plan_sheets(wb)
 
         # マッピングに患者情報定義がある場合
-        for field, spec in patient_map.items():
-            if isinstance(spec, dict) and 'cell' in spec:
-                sheet_name = spec.get('sheet', '１ページ')
-                try:
-                    ws = self._get_sheet(wb, sheet_name)
-                    value = patient_info.get(field)
-                    if value:
-                        ws[spec['cell']] = value
-                        count += 1
-                except Exception as e:
-                    logger.warning(f"⚠️ 患者情報転記エラー {field}: {e}")
+        for field, number, row, column in self.patient_plan:
+            try:
+                ws = sheets[number]
+                if ws is None:
+                    raise self._missing_sheet(wb, number)
+                value = patient_info.get(field)
+                if value:
+                    ws.cell(row=row, column=column).value = value
+                    count += 1
+            except Exception as e:
+                logger.warning(f"⚠️ 患者情報転記エラー {field}: {e}")
 
         logger.info(f"  患者情報: {count}項目転記 (request_id={patient_info.get('request_id')})")
         return count
 
-    def _transfer_test_results(self, wb, test_results: list, gender: str) -> int:
-        """検査結果を複数シートに転記"""
+    def _transfer_test_results(
+        self,
+        wb,
+        test_results: list,
+        gender: str,
+        judgments: Optional[List[str]] = None
+    ) -> int:
+        """
+        検査結果を複数シートに転記（書き込み計画の行・列に直接書き込み）
+
+        judgments（test_results と同じ並びの判定済み結果）があれば判定エンジンを呼ばない。
+        """
         count = 0
+        sheets = self._plan_sheets(wb)
+        debug = logger.isEnabledFor(logging.DEBUG)
 
-        for result in test_results:
+        for index, result in enumerate(test_results):
             code = result.get('code') or result.get('item_code')
             if not code:
                 continue
 
-            # フラット化されたマッピングから取得
-            if code not in self.flat_mapping:
+            # コンパイル済みの書き込み計画から取得
+            targets = self.write_plan.get(code)
+            if targets is None:
                 continue
 
-            spec = self.flat_mapping[code]
-            sheet_name = spec.get('sheet', '４ページ')
-
             try:
-                ws = self._get_sheet(wb, sheet_name)
-
-                # 値を転記（M列）
-                value_cell = spec.get('value_cell')
-                if value_cell:
-                    raw_value = result.get('value')
-                    if raw_value is not None and raw_value != '':
-                        try:
-                            numeric_value = float(raw_value)
-                            ws[value_cell] = numeric_value
-                        except (ValueError, TypeError):
-                            ws[value_cell] = raw_value
-                        count += 1
-                        logger.debug(f"  {code} → {sheet_name}!{value_cell}: {raw_value}")
-
-                # 判定を転記（K列）
-                judgment_cell = spec.get('judgment_cell')
-                if judgment_cell:
-                    judgment = result.get('judgment')
-                    if judgment:
-                        ws[judgment_cell] = judgment
-                        count += 1
-                    elif self.judgment_engine:
-                        # 判定エンジンで自動判定
-                        auto_judgment = self.judgment_engine.judge_by_code(
-                            code, result.get('value'), result.get('flag', ''), gender
-                        )
-                        if auto_judgment:
-                            ws[judgment_cell] = auto_judgment
+                for number, row, column, kind in targets:
+                    ws = sheets[number]
+                    if ws is None:
+                        raise self._missing_sheet(wb, number)
+
+                    if kind == WRITE_VALUE:
+                        # 値を転記（M列）
+                        raw_value = result.get('value')
+                        if raw_value is not None and raw_value != '':
+                            cell = ws.cell(row=row, column=column)
+                            cell.value = self._cell_value(result)
+                            if result.get('derived'):
+                                from common.constants import DERIVED_COMMENT
+                                cell.comment = Comment(DERIVED_COMMENT, 'transcriber')
+                            count += 1
+                            if debug:
+                                logger.debug(f"  {code} → {self.plan_sheets[number]}!"
+                                             f"{get_column_letter(column)}{row}: {raw_value}")
+
+                    elif kind == WRITE_JUDGMENT:
+                        # 判定を転記（K列）
+                        judgment = result.get('judgment')
+                        if not judgment and judgments is not None:
+                            judgment = judgments[index]
+                        elif not judgment and self.judgment_engine:
+                            # 判定エンジンで自動判定
+                            judgment = self.judgment_engine.judge_result(result, gender)
+                        if judgment:
+                            ws.cell(row=row, column=column).value = judgment
                             count += 1
 
-                # H/Lフラグ（flag_cellがある場合）
-                flag_cell = spec.get('flag_cell')
-                if flag_cell and result.get('flag'):
-                    ws[flag_cell] = result['flag']
-                    count += 1
+                    elif result.get('flag'):
+                        # H/Lフラグ（flag_cellがある場合）
+                        ws.cell(row=row, column=column).value = result['flag']
+                        count += 1
 
             except Exception as e:
                 logger.warning(f"⚠️ 転記エラー {code}: {e}")
@@ -593,25 +978,179 @@ class HumanDockTranscriber:
         logger.info(f"  検査結果: {count}項目転記")
         return count
 
+    def _refresh_criteria(self):
+        """マッピングファイルが更新されていれば新しい判定基準スナップショットに切り替え"""
+        if self.criteria_store is not None and self.judgment_engine is not None:
+            self.judgment_engine.load_snapshot(self.criteria_store.current())
+
+    def _derive_missing(self, records: List[Dict], ages: Optional[List[Optional[float]]] = None) -> List[list]:
+        """
+        未報告の推算項目（eGFR）を各患者の test_results に追加（全患者まとめて1回で計算）
+
+        Args:
+            records: parse() 形式の患者リスト
+            ages: 患者ごとの年齢（None の患者・省略時は patient_info の age / birthdate）
+
+        Returns:
+            患者ごとの推算した検査コードのリスト
+        """
+        try:
+            from common import derive_egfr
+            from common.derived import patient_age
+        except ImportError:
+            return [[] for _ in records]
+
+        if ages is not None:
+            ages = [age if age is not None else patient_age(record['patient_info'])
+                    for record, age in zip(records, ages)]
+        if not derive_egfr(records, ages):
+            return [[] for _ in records]
+
+        derived = [[r['code'] for r in record['test_results'] if r.get('derived')] for record in records]
+        codes = sorted({code for codes in derived for code in codes})
+        logger.info(f"  推算値: {', '.join(codes)} ({sum(1 for c in derived if c)}/{len(records)}患者)")
+        return derived
+
+    def _request_age(self, data: Dict) -> Optional[float]:
+        """リクエストJSONの患者情報から年齢を取得（patient / patient_info の age・birthdate）"""
+        try:
+            from common.derived import patient_age
+        except ImportError:
+            return None
+        for key in ('patient', 'patient_info'):
+            info = data.get(key)
+            if isinstance(info, dict):
+                age = patient_age(info)
+                if age is not None:
+                    return age
+        return None
+
+    def _cell_value(self, result: Dict) -> Any:
+        """
+        値セルに書く値を決定
+
+        解析時に正規化済みの結果（'numeric' あり）はそのまま使い、再変換しない。
+        打ち切り値は "<0.1" のように原文のまま、定性結果は正規表記で書く。
+        """
+        raw_value = result.get('value')
+
+        if 'numeric' in result:
+            if result.get('qualitative'):
+                return result['qualitative']
+            if result['numeric'] is not None and not result.get('qualifier'):
+                return result['numeric']
+            return raw_value
+
+        # JSON直接データ（正規化なし）
+        try:
+            return float(raw_value)
+        except (ValueError, TypeError):
+            return raw_value
+
 
 # ============================================================
 # DriveWatcher用エントリーポイント
 # ============================================================
+class TranscriberRegistry:
+    """
+    初期化済みトランスクライバーの保持（プロセス内で共有、スレッドセーフ）
+
+    検査種別ごとに1インスタンスを保持し、設定ファイル・マッピングファイルの
+    更新時刻(ns)・サイズ（設定の版）が変わった場合だけ作り直す。
+    同じインスタンスを使う転記は1件ずつ実行する（判定エンジン等を共有するため）。
+
+    Args:
+        settings_path: settings.yaml のパス（省略時はこのファイルと同じフォルダ）
+    """
+
+    def __init__(self, settings_path: Path = None):
+        self.settings_path = Path(settings_path) if settings_path else Path(__file__).parent / 'settings.yaml'
+        self.builds = 0
+        # 検査種別 → (設定の版, トランスクライバー, 転記ロック)
+        self._entries: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    def get(self, exam_type: str):
+        """検査種別のトランスクライバーを取得（設定が変わっていれば作り直す）"""
+        return self._entry(exam_type)[1]
+
+    def transcribe(self, request_data: Dict) -> Dict:
+        """リクエストの検査種別のトランスクライバーで転記"""
+        exam_type = request_data.get('exam_type', 'ROSAI_SECONDARY')
+        _, transcriber, lock = self._entry(exam_type)
+        with lock:
+            return transcriber.transcribe(request_data)
+
+    def clear(self):
+        """全インスタンスを破棄（次回の取得で作り直す）"""
+        with self._lock:
+            self._entries.clear()
+
+    def _entry(self, exam_type: str) -> tuple:
+        with self._lock:
+            entry = self._entries.get(exam_type)
+            if entry is not None and entry[0] == self._config_version(entry[1]):
+                return entry
+
+            if entry is not None:
+                logger.info(f"🔄 設定変更を検知、トランスクライバーを再作成: {exam_type}")
+            transcriber = self._build(exam_type)
+            entry = (self._config_version(transcriber), transcriber, threading.Lock())
+            self._entries[exam_type] = entry
+            self.builds += 1
+            return entry
+
+    def _build(self, exam_type: str):
+        if exam_type == 'HUMAN_DOCK':
+            return HumanDockTranscriber(self.settings_path)
+        return RosaiTranscriber()
+
+    def _config_version(self, transcriber) -> tuple:
+        """設定の版（設定ファイル・マッピングファイルの (更新時刻ns, サイズ)）"""
+        paths = [self.settings_path]
+        mapping_path = getattr(transcriber, 'mapping_path', None)
+        if mapping_path is not None:
+            paths.append(mapping_path)
+
+        version = []
+        for path in paths:
+            try:
+                stat = path.stat()
+                version.append((stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                version.append(None)
+        return tuple(version)
+
+
+# DriveWatcher 用の共有レジストリ
+_registry: Optional[TranscriberRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_transcriber_registry() -> TranscriberRegistry:
+    """プロセス共有のトランスクライバーレジストリを取得"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = TranscriberRegistry()
+        return _registry
+
+
 def process_export_request(request_data: Dict) -> Dict:
     """
     DriveWatcherから呼び出されるエントリーポイント
     exam_type に基づいて適切なトランスクライバーを選択
+
+    トランスクライバーはプロセス共有のレジストリから取得し、
+    設定・マッピングが変わらない限りリクエスト間で使い回す。
     """
     exam_type = request_data.get('exam_type', 'ROSAI_SECONDARY')
 
     if exam_type == 'HUMAN_DOCK':
         logger.info("📋 人間ドック モードで処理")
-        transcriber = HumanDockTranscriber()
-        return transcriber.transcribe(request_data)
     else:
         logger.info("📋 労災二次検診 モードで処理")
-        transcriber = RosaiTranscriber()
-        return transcriber.transcribe(request_data)
+    return get_transcriber_registry().transcribe(request_data)
 
 
 if __name__ == '__main__':
@@ -621,8 +1160,31 @@ if __name__ == '__main__':
     parser.add_argument('json_file', nargs='?', help='入力JSONファイル')
     parser.add_argument('--csv', help='BML CSVファイル（人間ドック直接実行用）')
     parser.add_argument('--output', help='出力パス')
+    parser.add_argument('--request-id', help='BML依頼ID（--csv と併用、指定患者のみ転記）')
+    parser.add_argument('--batch', action='store_true',
+                        help='--csv の全患者を1人1ファイルで出力し出力一覧（マニフェスト）を保存'
+                             '（--output で出力先フォルダ指定）')
     parser.add_argument('--type', choices=['ROSAI_SECONDARY', 'HUMAN_DOCK'],
                         default='ROSAI_SECONDARY', help='検査種別')
+    parser.add_argument('--ingest', metavar='DIR',
+                        help='BML CSVフォルダを並列解析して結果JSONを出力（--output で保存先指定）')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='--ingest のワーカープロセス数（省略時はCPUコア数）')
+    parser.add_argument('--validate', action='store_true',
+                        help='--ingest で各CSVを検証し、診断レポートを --output の横に出力')
+    parser.add_argument('--stats', metavar='JSON',
+                        help='--ingest の結果から企業別の集団統計を集計してJSONで出力（GAS貼り付け用）')
+    parser.add_argument('--group-by', default='facility_code',
+                        help='--stats のグループ（患者情報の項目名）')
+    parser.add_argument('--previous', metavar='JSON',
+                        help='--stats で悪化人数を数える前回の --ingest 結果JSON')
+    parser.add_argument('--diff-criteria', nargs=2, metavar=('OLD', 'NEW'),
+                        help='新旧のマッピングJSONの判定基準を比較し、--cohort の患者を差分再判定'
+                             '（--output に作り直しが必要な患者一覧を出力）')
+    parser.add_argument('--cohort', metavar='JSON',
+                        help='--diff-criteria で再判定する --ingest の結果JSON')
+    parser.add_argument('--tail', metavar='DIR',
+                        help='追記監視モード: CSVフォルダへの追記患者を順次Excel出力（人間ドック）')
     parser.add_argument('--watch', action='store_true',
                         help='監視モード: pendingフォルダを監視して自動処理')
     parser.add_argument('--settings', default='settings.yaml',
@@ -630,8 +1192,90 @@ if __name__ == '__main__':
 
     args = parser.parse_args()
 
+    # 並列取り込みモード（解析のみ、Excel出力なし）
+    if args.ingest:
+        sys.path.insert(0, str(Path(__file__).parent))
+        from common import BMLResultParser, write_diagnostics
+        csv_files = sorted(Path(args.ingest).glob('*.csv'))
+        report = BMLResultParser().parse_many(csv_files, workers=args.workers, validate=args.validate)
+
+        # 診断レポートは結果JSONとは別ファイルに分ける
+        diagnostics = [file_report.pop('diagnostics') for file_report in report['files']
+                       if file_report.get('diagnostics') is not None]
+
+        for file_report in report['files']:
+            status = '❌ ' + file_report['error'] if file_report['error'] else '✅'
+            print(f"{status} {Path(file_report['path']).name}: "
+                  f"{file_report['count']}患者 ({file_report['seconds'] * 1000:.0f} ms)")
+        print(f"📊 合計: {len(csv_files)}ファイル / {len(report['results'])}患者 "
+              f"({report['seconds']:.2f} 秒)")
+        for summary in diagnostics:
+            if summary['total']:
+                print(f"⚠️ {Path(summary['source']).name}: {summary['total']}件の診断 {summary['counts']}")
+
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+            print(f"✅ 出力: {args.output}")
+            if args.validate:
+                diagnostics_path = write_diagnostics({'files': diagnostics}, Path(args.output))
+                if diagnostics_path:
+                    print(f"✅ 診断: {diagnostics_path}")
+
+        if args.stats:
+            from common import CohortStats, JudgmentEngine, get_criteria_store, previous_grades
+            settings = {}
+            if yaml and Path(args.settings).exists():
+                with open(args.settings, 'r', encoding='utf-8') as f:
+                    settings = yaml.safe_load(f) or {}
+            mapping_path = settings.get('exam_types', {}).get('HUMAN_DOCK', {}).get('mapping_path')
+            if mapping_path and Path(mapping_path).exists():
+                engine = JudgmentEngine.from_snapshot(get_criteria_store(Path(mapping_path)).current())
+            else:
+                print("⚠️ 判定基準（マッピング）が見つかりません。フラグのみで判定")
+                engine = JudgmentEngine({})
+
+            previous = None
+            if args.previous:
+                with open(args.previous, 'r', encoding='utf-8') as f:
+                    previous = previous_grades(json.load(f).get('results', []), engine)
+
+            stats = CohortStats(engine, group_by=args.group_by, previous=previous).add_all(report['results'])
+            stats.write_json(Path(args.stats))
+            print(f"✅ 集団統計: {args.stats} ({len(stats.groups)}グループ)")
+
+        failed = [r for r in report['files'] if r['error']]
+        sys.exit(1 if failed else 0)
+    # 判定基準の差分再判定
+    elif args.diff_criteria:
+        sys.path.insert(0, str(Path(__file__).parent))
+        from common import CriteriaSnapshot, rejudge_report
+        old_snapshot, new_snapshot = (CriteriaSnapshot.from_mapping_file(Path(p)) for p in args.diff_criteria)
+        records = []
+        if args.cohort:
+            with open(args.cohort, 'r', encoding='utf-8') as f:
+                records = json.load(f).get('results', [])
+        report = rejudge_report(old_snapshot, new_snapshot, records)
+
+        for key, intervals in report['items'].items():
+            print(f"🔀 {key}: {len(intervals)}区間")
+        print(f"📊 {report['checked']}検査値中 {report['candidates']}件を再判定 → "
+              f"{report['changed']}件変更 / {len(report['patients'])}患者")
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+            print(f"✅ 出力: {args.output}")
+        sys.exit(0)
+    # 追記監視モード
+    elif args.tail:
+        from drive_watcher import CsvTailWatcher
+        print("🚀 追記監視モード起動")
+        transcriber = HumanDockTranscriber()
+        watcher = CsvTailWatcher(args.tail, transcriber.transcribe_record)
+        watcher.start()
+        sys.exit(0)
     # 監視モード
-    if args.watch:
+    elif args.watch:
         from drive_watcher import DriveWatcher
         print("🚀 監視モード起動")
         watcher = DriveWatcher.from_settings(args.settings, process_export_request)
@@ -640,7 +1284,10 @@ if __name__ == '__main__':
     # CSVモード（人間ドック直接実行）
     elif args.csv:
         transcriber = HumanDockTranscriber()
-        result = transcriber.transcribe_from_csv(args.csv, args.output)
+        if args.batch:
+            result = transcriber.transcribe_batch(args.csv, args.output)
+        else:
+            result = transcriber.transcribe_from_csv(args.csv, args.output, args.request_id)
     # JSONモード
     elif args.json_file:
         with open(args.json_file, 'r', encoding='utf-8') as f:
@@ -653,7 +1300,10 @@ if __name__ == '__main__':
 
     if result['success']:
         print(f"✅ 成功: {result['output_path']}")
-        print(f"   転記項目数: {result['count']}")
+        if 'outputs' in result:
+            print(f"   出力ファイル数: {result['count']}")
+        else:
+            print(f"   転記項目数: {result['count']}")
     else:
         print(f"❌ 失敗: {result['error']}")
         sys.exit(1)